@@ -0,0 +1,12 @@
+#!/bin/bash
+
+set -e
+
+MODEL=models/contact_form.json
+GEN_STOP_COND="random(vertex_coverage(100) and edge_coverage(100))"
+#GEN_STOP_COND="random(vertex_coverage(100) and edge_coverage(100) and length(200))"
+TESTS_DIR=tests
+# check, verify and generate the path only when the models, the test code or the seed change
+PATH_FILE=$(python -m tests.walker compile $TESTS_DIR -m $MODEL "$GEN_STOP_COND" --quiet)
+python -m tests.walker online $TESTS_DIR --path $PATH_FILE
+
@@ -0,0 +1,8 @@
+#!/bin/bash
+
+set -e
+
+# replay a path planned with "python -m tests.walker plan" (see paths/)
+PATH_FILE=${PATH_FILE:-paths/contact_form.json}
+TESTS_DIR=tests
+python -m tests.walker online $TESTS_DIR --path $PATH_FILE
@@ -3,13 +3,13 @@ import pytest
 
 from tests.pages.front import FrontPage
 from tests.pages.admin import AdminPage
+from tests.pages.waits import waits
+from tests.driver_factory import create_firefox
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.firefox.options import Options
 
 import os
 import pdb
@@ -21,20 +21,44 @@ from configparser import ConfigParser
 from faker.providers import BaseProvider
 from tests.my_contact_provider import MyContactProvider
 from tests.booker_api import BookerAPI
+from tests.cleanup import Ledger
+from tests.data_pool import PooledContactProvider, load_shard
+from tests.driver_pool import DriverPool
+
+
+def create_driver():
+    driver = create_firefox(headless=HEADLESS, profile=BROWSER_PROFILE, blocked_urls=BLOCKED_URLS)
+    driver.maximize_window()
+    return driver
+
+
+def tearDownModule():
+    driver_pool.close()
+    waits.print_statistics()
+
 
 class ContactFormTestCase(unittest.TestCase):
 
-    def setUp(self):
-        options = Options()
-        self.driver = webdriver.Firefox(options=options)
-        self.driver.implicitly_wait(15)
-        self.driver.maximize_window()
+    @classmethod
+    def setUpClass(cls):
+        # share one pooled API session among all tests of the class
+        cls.booker_api = BookerAPI(base_url=BASE_URL,
+                                   username=BOOKER_API_USERNAME, password=BOOKER_API_PASSWORD,
+                                   pool_size=BOOKER_API_POOL_SIZE, max_retries=BOOKER_API_MAX_RETRIES, timeout=BOOKER_API_TIMEOUT,
+                                   cache_ttl={'/room': BOOKER_API_ROOMS_CACHE_TTL},
+                                   ledger=Ledger(BOOKER_API_LEDGER))
+
+    @classmethod
+    def tearDownClass(cls):
+        if CLEANUP:
+            print("Deleted {} test entities, {} failed".format(*cls.booker_api.delete_created()))
+        cls.booker_api.close()
 
-        self.booker_api = BookerAPI(base_url=BASE_URL,
-                                    username=BOOKER_API_USERNAME, password=BOOKER_API_PASSWORD)
+    def setUp(self):
+        self.driver = driver_pool.acquire()
 
     def tearDown(self):
-        self.driver.quit()
+        driver_pool.release(self.driver)
 
     @pytest.mark.ch1
     def test_contact_form_successful(self):
@@ -50,6 +74,7 @@ class ContactFormTestCase(unittest.TestCase):
 
         page.contact_form.fill_contact_data(
             name=name, email=email, phone=phone, subject=subject, description=description)
+        self.booker_api.track_created('message', name=name, subject=subject)
         self.assertEqual(page.contact_form.contact_feedback_message,
                          f"Thanks for getting in touch {name}!\nWe'll get back to you about\n{subject}\nas soon as possible.")
 
@@ -84,6 +109,7 @@ class ContactFormTestCase(unittest.TestCase):
 
         page.contact_form.fill_contact_data(
             name=name, email=email, phone=phone, subject=subject, description=description)
+        self.booker_api.track_created('message', name=name, subject=subject)
         page.click_admin_panel()
         page = AdminPage(self.driver)
         page.authenticate_with_valid_credentials()
@@ -92,16 +118,17 @@ class ContactFormTestCase(unittest.TestCase):
         page.click_inbox()
         self.assertTrue(page.inbox.is_message_section_open,
                         "message section is not opened")
-        page.inbox.find_and_open_unread_message(name=name, subject=subject)
-        self.assertEqual(page.inbox.message_detail_name,
+        page.inbox.find_and_open_unread_message(name=name, subject=subject, booker_api=self.booker_api)
+        details = page.inbox.message_details_snapshot()
+        self.assertEqual(details['name'],
                          f"From: {name}", "message's name doesnt match")
-        self.assertEqual(page.inbox.message_detail_email,
+        self.assertEqual(details['email'],
                          f"Email: {email}", "message's email doesnt match")
-        self.assertEqual(page.inbox.message_detail_phone,
+        self.assertEqual(details['phone'],
                          f"Phone: {phone}", "message's phone doesnt match")
-        self.assertEqual(page.inbox.message_detail_subject, subject,
+        self.assertEqual(details['subject'], subject,
                          "message's subject doesnt match")
-        self.assertEqual(page.inbox.message_detail_description,
+        self.assertEqual(details['description'],
                          description, "message's description doesnt match")
 
     @pytest.mark.ch3
@@ -142,27 +169,56 @@ class ContactFormTestCase(unittest.TestCase):
         page.rooms.click_submit_booking()
 
         # check confirmation message and stored booking on system
-        last_booking = self.booker_api.get_bookings()[-1]
         self.assertEqual(page.rooms.booking_confirmed_message,
                          f"Booking Successful!\nCongratulations! Your booking has been confirmed for:\n{start_date_str} - {end_date_str}\nClose")
-        self.assertTrue(last_booking['firstname'] == first_name and last_booking['lastname'] == last_name and last_booking['bookingdates']['checkin']
-                        == start_date_str and last_booking['bookingdates']['checkout'] == end_date_str, f"booking not found (last_booking={last_booking}")
+        room_id = self.booker_api.get_rooms()[0]['roomid']
+        booking = self.booker_api.find_booking(room_id=room_id, firstname=first_name, lastname=last_name,
+                                               checkin=start_date_str, checkout=end_date_str)
+        self.assertIsNotNone(booking, f"booking not found (room={room_id}, guest={first_name} {last_name}, dates={start_date_str} - {end_date_str})")
+        self.booker_api.track_created('booking', booking['bookingid'])
 
 
 ################
 
-HEADLESS = False
-
 config = ConfigParser()
 config.read('config.ini')
 BASE_URL = os.environ.get("BASE_URL", config.get('app', 'base_url'))
 BOOKER_API_USERNAME = config.get('app', 'booker_api_username')
 BOOKER_API_PASSWORD = config.get('app', 'booker_api_password')
+BOOKER_API_POOL_SIZE = config.getint('app', 'booker_api_pool_size', fallback=10)
+BOOKER_API_MAX_RETRIES = config.getint('app', 'booker_api_max_retries', fallback=3)
+BOOKER_API_TIMEOUT = config.getfloat('app', 'booker_api_timeout', fallback=10)
+BOOKER_API_ROOMS_CACHE_TTL = config.getfloat('app', 'booker_api_rooms_cache_ttl', fallback=300)
+BOOKER_API_LEDGER = config.get('app', 'booker_api_ledger', fallback='.booker_ledger.jsonl')
+CLEANUP = config.getboolean('app', 'cleanup', fallback=True)
+if "HEADLESS" in os.environ:
+    config.set('browser', 'headless', os.environ["HEADLESS"])
+HEADLESS = config.getboolean('browser', 'headless', fallback=False)
+BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE", config.get('browser', 'profile', fallback='lean'))
+# URL patterns blocked by the lean profile; empty for the defaults of tests/driver_factory.py
+BLOCKED_URLS = [pattern.strip() for pattern in config.get('browser', 'blocked_urls', fallback='').split(',')
+                if pattern.strip()] or None
+WAIT_TIMEOUT = config.getfloat('waits', 'timeout', fallback=15)
+WAIT_PRESENCE_CHECK_TIMEOUT = config.getfloat('waits', 'presence_check_timeout', fallback=3)
+WAIT_POLL_INTERVAL = config.getfloat('waits', 'poll_interval', fallback=0.1)
+waits.configure(timeouts={'present': WAIT_TIMEOUT, 'all_present': WAIT_TIMEOUT, 'visible': WAIT_TIMEOUT,
+                          'clickable': WAIT_TIMEOUT, 'presence_check': WAIT_PRESENCE_CHECK_TIMEOUT},
+                poll_interval=WAIT_POLL_INTERVAL)
+SESSION_MAX_USES = config.getint('browser', 'session_max_uses', fallback=20)
+SESSION_MAX_MEMORY_MB = config.getint('browser', 'session_max_memory_mb', fallback=None)
+
+# warm browser sessions, leased per test; each pytest-xdist worker process has its own pool
+driver_pool = DriverPool(create_driver, max_uses=SESSION_MAX_USES, max_memory_mb=SESSION_MAX_MEMORY_MB)
 
 debugger = pdb.Pdb(stdout=sys.stdout)
 
 fake = Faker()
 fake.add_provider(MyContactProvider)
+# optionally take the contacts from a pre-generated data pool (see tests/data_pool.py), one shard per xdist worker
+DATA_POOL = os.environ.get("DATA_POOL", config.get('other', 'data_pool', fallback=''))
+if DATA_POOL:
+    fake.add_provider(PooledContactProvider(fake, load_shard(
+        DATA_POOL, os.environ.get("PYTEST_XDIST_WORKER", "gw0").removeprefix("gw") or 0)))
 # Enforce a specific seed; there are currently some limitations in both AltWalker and GraphWalker though
 # seed works in GW 4.3 but AltWaker doesn't have a way to enforce it or obtain it
 seed = os.environ.get("SEED", config.getint('other', 'seed'))
@@ -0,0 +1,153 @@
+"""Browserless implementation of the contact form models, walking them against the REST API.
+
+The steps are the same as in ``tests/test.py``, with the same data from MyContactProvider,
+but submitting a contact is a POST to ``/message/`` and the verifications check the API's
+response, so the backend validation rules can be walked many times faster than through
+the UI. Checks of the page itself remain in ``tests/test.py``.
+
+    python -m tests.walker online tests/api -m models/contact_form_detailed.json "random(edge_coverage(100) and length(5000))"
+"""
+
+import os
+import unittest
+from configparser import ConfigParser
+
+import requests
+from faker import Faker
+
+from tests.booker_api import BookerAPI
+from tests.cleanup import Ledger
+from tests.data_pool import PooledContactProvider, load_shard
+from tests.my_contact_provider import MyContactProvider
+
+
+def setUpRun():
+    """Initialize the API client."""
+
+    global booker_api
+
+    booker_api = BookerAPI(
+        base_url=BASE_URL, username=BOOKER_API_USERNAME, password=BOOKER_API_PASSWORD,
+        pool_size=BOOKER_API_POOL_SIZE, max_retries=BOOKER_API_MAX_RETRIES, timeout=BOOKER_API_TIMEOUT,
+        ledger=Ledger(BOOKER_API_LEDGER))
+
+
+def tearDownRun():
+    """Delete the messages created and close the API session."""
+
+    if CLEANUP:
+        print("Deleted {} test entities, {} failed".format(*booker_api.delete_created()))
+    booker_api.close()
+
+
+class BaseModel(unittest.TestCase):
+    """Contains common methods for all models."""
+
+    def setUpModel(self):
+        print("Set up for: {} (API)".format(type(self).__name__))
+        self.booker_api = booker_api
+        self.message = None
+        self.errors = None
+
+    def submit_contact(self, name, email, phone, subject, description):
+        """ submit a contact message, keeping the created message or the validation errors """
+        try:
+            self.message = self.booker_api.create_message(name=name, email=email, phone=phone,
+                                                          subject=subject, description=description)
+            self.errors = None
+        except requests.HTTPError as e:
+            if e.response.status_code != 400:
+                raise
+            self.message = None
+            self.errors = e.response.json().get('errors')
+
+    def e_load_frontpage(self):
+        self.message = None
+        self.errors = None
+
+    def e_submit_valid_contact_data(self, data):
+        name = fake.valid_name()
+        email = fake.valid_email()
+        phone = fake.valid_phone()
+        subject = fake.valid_subject()
+        description = fake.valid_description()
+
+        data['global.last_contact_name'] = name
+        data['global.last_contact_email'] = email
+        data['global.last_contact_phone'] = phone
+        data['global.last_contact_subject'] = subject
+        data['global.last_contact_description'] = description
+
+        self.submit_contact(name=name, email=email, phone=phone, subject=subject, description=description)
+
+    def v_contact_successful(self, data):
+        self.assertIsNotNone(self.message, "message was not accepted: {}".format(self.errors))
+        self.assertEqual(self.message['name'], data['last_contact_name'])
+        self.assertEqual(self.message['email'], data['last_contact_email'])
+        self.assertEqual(self.message['phone'], str(data['last_contact_phone']))
+        self.assertEqual(self.message['subject'], data['last_contact_subject'])
+        self.assertEqual(self.message['description'], data['last_contact_description'])
+
+    def v_contact_unsuccessful(self):
+        self.assertIsNone(self.message, "invalid message was accepted")
+        self.assertTrue(self.errors, "no validation errors returned")
+
+    def v_frontpage_can_contact(self):
+        self.assertIsNone(self.message or self.errors, "a previous submission is still pending")
+
+    def v_start(self):
+        pass
+
+
+class ContactForm(BaseModel):
+
+    def e_submit_invalid_contact_data(self):
+        self.submit_contact(**fake.invalid_contact_data())
+
+
+class ContactFormDetailed(BaseModel):
+
+    def e_submit_invalid_contact_name(self):
+        self.submit_contact(
+            name=fake.invalid_name(), email=fake.valid_email(), phone=fake.valid_phone(), subject=fake.valid_subject(), description=fake.valid_description())
+
+    def e_submit_invalid_contact_email(self):
+        self.submit_contact(
+            name=fake.valid_name(), email=fake.invalid_email(), phone=fake.valid_phone(), subject=fake.valid_subject(), description=fake.valid_description())
+
+    def e_submit_invalid_contact_phone(self):
+        self.submit_contact(
+            name=fake.valid_name(), email=fake.valid_email(), phone=fake.invalid_phone(), subject=fake.valid_subject(), description=fake.valid_description())
+
+    def e_submit_invalid_contact_subject(self):
+        self.submit_contact(
+            name=fake.valid_name(), email=fake.valid_email(), phone=fake.valid_phone(), subject=fake.invalid_subject(), description=fake.valid_description())
+
+    def e_submit_invalid_contact_message(self):
+        self.submit_contact(
+            name=fake.valid_name(), email=fake.valid_email(), phone=fake.valid_phone(), subject=fake.valid_subject(), description=fake.invalid_description())
+
+#########
+
+
+booker_api = None
+
+config = ConfigParser()
+config.read('config.ini')
+BASE_URL = os.environ.get("BASE_URL", config.get('app', 'base_url'))
+BOOKER_API_USERNAME = config.get('app', 'booker_api_username')
+BOOKER_API_PASSWORD = config.get('app', 'booker_api_password')
+BOOKER_API_POOL_SIZE = config.getint('app', 'booker_api_pool_size', fallback=10)
+BOOKER_API_MAX_RETRIES = config.getint('app', 'booker_api_max_retries', fallback=3)
+BOOKER_API_TIMEOUT = config.getfloat('app', 'booker_api_timeout', fallback=10)
+BOOKER_API_LEDGER = config.get('app', 'booker_api_ledger', fallback='.booker_ledger.jsonl')
+CLEANUP = config.getboolean('app', 'cleanup', fallback=True)
+
+fake = Faker()
+fake.add_provider(MyContactProvider)
+DATA_POOL = os.environ.get("DATA_POOL", config.get('other', 'data_pool', fallback=''))
+if DATA_POOL:
+    fake.add_provider(PooledContactProvider(fake, load_shard(DATA_POOL, os.environ.get("WALKER_WORKER", 0))))
+seed = os.environ.get("SEED") or config.getint('other', 'seed')
+print(f'seed: {seed}')
+Faker.seed(int(seed))
@@ -0,0 +1,110 @@
+"""Screenshots and DOM snapshots of failed steps, written in the background.
+
+Only the capture itself (one screenshot and one page source command) happens on
+the test's thread; decoding and writing the files is left to a writer thread. File
+names carry the worker, the process, a counter and the step, so parallel workers
+never overwrite each other, and only the newest ``max_files`` captures (a screenshot
+and its page source) are kept; other files in the directory are left alone.
+"""
+
+import base64
+import collections
+import os
+import queue
+import re
+import threading
+
+
+def worker_name():
+    """Name of the current worker: walker job, pytest-xdist worker, or 'main'."""
+    worker = os.environ.get("WALKER_WORKER")
+    if worker is not None:
+        return f"job{worker}"
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+# <worker>-<pid>-<counter>-<step>.png|.html, see ArtifactWriter.capture()
+ARTIFACT_NAME = re.compile(r'^(?P<capture>(?:job\d+|gw\d+|main)-\d+-\d{4,}-[\w.-]+)\.(?:png|html)$')
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+class ArtifactWriter:
+
+    def __init__(self, directory='screenshots', max_files=50):
+        self.directory = directory
+        self.max_files = max_files
+        self._prefix = f"{worker_name()}-{os.getpid()}"
+        self._counter = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def capture(self, driver, step_name):
+        """Take a screenshot and a DOM snapshot now; return the (future) base path of the files."""
+        self._counter += 1
+        name = re.sub(r'[^\w.-]', '_', step_name)
+        path = os.path.join(self.directory, f"{self._prefix}-{self._counter:04d}-{name}")
+        try:
+            screenshot = driver.get_screenshot_as_base64()
+        except Exception as e:
+            print(f"Unable to take a screenshot of {step_name}: {e}")
+            screenshot = None
+        try:
+            page_source = driver.page_source
+        except Exception:
+            page_source = None
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_artifacts, daemon=True)
+            self._thread.start()
+        self._queue.put((path, screenshot, page_source))
+        return path
+
+    def _write_artifacts(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            path, screenshot, page_source = item
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                if screenshot:
+                    with open(path + '.png', 'wb') as f:
+                        f.write(base64.b64decode(screenshot))
+                if page_source is not None:
+                    with open(path + '.html', 'w', encoding='utf-8') as f:
+                        f.write(page_source)
+                self._prune()
+            except OSError as e:
+                print(f"Unable to save artifacts {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        """Keep the newest ``max_files`` captures (of any worker) in the directory."""
+        captures = collections.defaultdict(list)
+        for filename in os.listdir(self.directory):
+            match = ARTIFACT_NAME.match(filename)
+            if match:
+                captures[match.group('capture')].append(os.path.join(self.directory, filename))
+        newest = sorted(captures.values(), key=lambda paths: max(map(_mtime, paths)), reverse=True)
+        for paths in newest[self.max_files:]:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # already removed by another worker
+                    pass
+
+    def close(self):
+        """Wait until all pending artifacts are written."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
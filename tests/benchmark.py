@@ -0,0 +1,217 @@
+"""Benchmark the model-based (tests/test.py) and the standard (standard_pom_tests.py) flows.
+
+Every flow is run in both styles against the local stand-in of the platform
+(tests/fake_sut), for a number of iterations in the same browser session:
+
+- startup: time to get a ready browser (and API client) before the first iteration
+- steady state: mean/median time of the iterations after the first one
+- steps per second and WebDriver commands per step; a step is a model step for
+  the model-based flows and a test method for the standard ones
+
+Results are saved as JSON and can be compared against a previous run, failing
+if a flow got slower (or sends more WebDriver commands) than a threshold allows.
+
+    python -m tests.benchmark --iterations 10 --headless -o benchmarks/current.json
+    python -m tests.benchmark --iterations 10 --headless -o benchmarks/new.json --compare benchmarks/current.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import unittest
+
+from tests.driver_factory import PROFILES
+from tests.fake_sut.server import FakeBooker
+from tests.timing import timings
+
+FLOWS = {
+    'contact': {'path': 'paths/contact_form.json',
+                'tests': ['test_contact_form_successful', 'test_contact_form_unsuccessfail_invalid_name']},
+    'backoffice': {'path': 'paths/contact_form_with_message.json',
+                   'tests': ['test_contact_message_received_in_backoffice']},
+    'booking': {'path': 'paths/new_booking1.json',
+                'tests': ['test_book_successful']},
+}
+
+
+def _webdriver_commands():
+    return sum(stats['count'] for stats in timings.summary()['webdriver'].values())
+
+
+class MBTFlow:
+    """Replay a planned path with the in-process walker; the browser is started once, by setUpRun()."""
+
+    style = 'mbt'
+
+    def __init__(self, name, path_file):
+        from tests.walker.executor import Executor
+        from tests.walker.planner import load_path
+        from tests.walker.runner import Reporter
+
+        self.name = name
+        self.models, self.steps = load_path(path_file)
+        self.executor = Executor('tests')
+        self.reporter = Reporter(io.StringIO())
+
+    def set_up(self):
+        return self.executor.execute_step(None, 'setUpRun')['error'] is None
+
+    def run_iteration(self):
+        from tests.walker.machine import ReplayMachine
+        from tests.walker.runner import Walker
+
+        self.executor.reset()
+        walker = Walker(ReplayMachine(self.models, self.steps), self.executor, self.reporter)
+        model_names = {model.name for model in self.models}
+        passed = all(walker._execute_fixture('setUpModel', name) for name in model_names) and walker.walk()
+        for name in model_names:
+            walker._execute_fixture('tearDownModel', name)
+        return passed, sum(1 for step in self.steps if step.get('name'))
+
+    def tear_down(self):
+        self.executor.execute_step(None, 'tearDownRun')
+
+
+class POMFlow:
+    """Run the standard tests of a flow; browser sessions come from the module's pool."""
+
+    style = 'pom'
+
+    def __init__(self, name, test_names):
+        import standard_pom_tests
+
+        self.name = name
+        self.module = standard_pom_tests
+        self.test_names = test_names
+
+    def set_up(self):
+        self.module.ContactFormTestCase.setUpClass()
+        # start the browser before the first iteration, as setUpRun() does for the models
+        self.module.driver_pool.release(self.module.driver_pool.acquire())
+        return True
+
+    def run_iteration(self):
+        result = unittest.TestResult()
+        for name in self.test_names:
+            self.module.ContactFormTestCase(name).run(result)
+        return result.wasSuccessful(), len(self.test_names)
+
+    def tear_down(self):
+        self.module.ContactFormTestCase.tearDownClass()
+        self.module.tearDownModule()
+
+
+def run_flow(flow, iterations, fake):
+    """Run a flow for a number of iterations and return its measurements."""
+    fake.store.reset()
+    timings.reset()
+    start = time.perf_counter()
+    ready = flow.set_up()
+    startup = time.perf_counter() - start
+
+    durations, commands, steps, failures = [], [], 0, 0
+    if ready:
+        for _ in range(iterations):
+            # start every iteration from the same data (e.g. no conflicting bookings)
+            fake.store.reset()
+            commands_before = _webdriver_commands()
+            start = time.perf_counter()
+            passed, iteration_steps = flow.run_iteration()
+            durations.append(time.perf_counter() - start)
+            commands.append(_webdriver_commands() - commands_before)
+            steps += iteration_steps
+            failures += not passed
+    flow.tear_down()
+
+    steady = durations[1:] or durations
+    total = sum(durations)
+    return {
+        'style': flow.style, 'flow': flow.name, 'iterations': len(durations), 'failures': failures + (not ready),
+        'startup_seconds': round(startup, 4),
+        'first_iteration_seconds': round(durations[0], 4) if durations else None,
+        'steady_state_mean_seconds': round(statistics.mean(steady), 4) if steady else None,
+        'steady_state_median_seconds': round(statistics.median(steady), 4) if steady else None,
+        'steps_per_iteration': steps // len(durations) if durations else 0,
+        'steps_per_second': round(steps / total, 3) if total else 0,
+        'webdriver_commands_per_step': round(sum(commands) / steps, 2) if steps else 0,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return the regressions of ``results`` against ``baseline``: steady state time or commands per step
+    growing by more than ``threshold`` percent."""
+    previous = {(result['style'], result['flow']): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['style'], result['flow']))
+        if not before:
+            continue
+        for metric in ('steady_state_mean_seconds', 'webdriver_commands_per_step'):
+            if before[metric] and result[metric] and result[metric] > before[metric] * (1 + threshold / 100):
+                regressions.append(f"{result['style']}.{result['flow']}: {metric} {before[metric]} -> {result[metric]}")
+    return regressions
+
+
+def print_results(results, stream=sys.stdout):
+    print(f"{'flow':<16}{'startup':>9}{'steady':>9}{'steps/s':>10}{'cmd/step':>10}{'failures':>10}", file=stream)
+    for result in results:
+        print(f"{result['style'] + '.' + result['flow']:<16}{result['startup_seconds']:>9.2f}"
+              f"{result['steady_state_mean_seconds'] or 0:>9.2f}{result['steps_per_second']:>10.2f}"
+              f"{result['webdriver_commands_per_step']:>10.1f}{result['failures']:>10}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.benchmark', description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5, help="iterations of every flow (default: 5)")
+    parser.add_argument('--flows', nargs='+', choices=sorted(FLOWS), default=list(FLOWS))
+    parser.add_argument('--styles', nargs='+', choices=['mbt', 'pom'], default=['mbt', 'pom'])
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--profile', choices=PROFILES, help="browser profile (default: the one in config.ini)")
+    parser.add_argument('-o', '--output', help="save the results to this JSON file")
+    parser.add_argument('--compare', help="results of a previous run to compare against")
+    parser.add_argument('--threshold', type=float, default=10, help="allowed slowdown, in percent (default: 10)")
+    args = parser.parse_args(argv)
+
+    with FakeBooker(port=0) as fake:
+        # the test modules read BASE_URL, HEADLESS and BROWSER_PROFILE when imported
+        os.environ['BASE_URL'] = fake.base_url
+        if args.headless:
+            os.environ['HEADLESS'] = 'true'
+        if args.profile:
+            os.environ['BROWSER_PROFILE'] = args.profile
+        results = []
+        for name in args.flows:
+            flows = {'mbt': lambda: MBTFlow(name, FLOWS[name]['path']),
+                     'pom': lambda: POMFlow(name, FLOWS[name]['tests'])}
+            for style in args.styles:
+                print(f"benchmarking {style}.{name} ({args.iterations} iterations)")
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(run_flow(flows[style](), args.iterations, fake))
+
+    print_results(results)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                       'iterations': args.iterations, 'profile': os.environ.get('BROWSER_PROFILE'),
+                       'results': results}, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    status = 0 if all(not result['failures'] for result in results) else 1
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        status = status or (1 if regressions else 0)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,373 @@
+import asyncio
+import codecs
+import copy
+import functools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
 
 class BookerAPI:
+    """Basic REST API client for the Restful Booker platform.
+
+    All requests go through a single pooled, keep-alive session, so consecutive
+    calls reuse the same TCP/TLS connections instead of opening new ones.
+
+    Responses of reference data endpoints are kept in a TTL cache; ``cache_ttl``
+    maps an endpoint path to its TTL in seconds (0 disables caching for it).
+    Bookings and room reports (availability) are never cached, so creating or
+    deleting a booking leaves the cache valid.
+
+    Messages and bookings created by the tests are tracked (and recorded in the
+    ``ledger``, if given) so that ``delete_created()`` can remove them all at the end.
+    """
 
-    def __init__(self, base_url, username, password):
+    DEFAULT_CACHE_TTL = {'/room': 300, '/booking': 0}
+
+    def __init__(self, base_url, username, password, pool_size=10, max_retries=3, timeout=10, cache_ttl=None,
+                 ledger=None):
         self._base_url = base_url
         self._username = username
         self._password = password
         self._auth = HTTPBasicAuth(self._username, self._password)
+        self._timeout = timeout
+        self.pool_size = pool_size
+        self._session = self._create_session(pool_size, max_retries)
+        self.token = None
+        self._cache_ttl = dict(self.DEFAULT_CACHE_TTL, **(cache_ttl or {}))
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {path: {'hits': 0, 'misses': 0}
+                            for path in self._cache_ttl}
+        self._ledger = ledger
+        self.created = []
+        self._created_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return self._base_url
+
+    def _create_session(self, pool_size, max_retries):
+        retries = Retry(total=max_retries, backoff_factor=0.3,
+                        status_forcelist=(502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size, max_retries=retries)
+        session = requests.Session()
+        session.auth = self._auth
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def add_response_hook(self, hook):
+        """Call ``hook(response)`` for every response received, e.g. to time the requests."""
+        self._session.hooks['response'].append(hook)
+
+    def _get(self, path, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        response = self._session.get(f'{self._base_url}{path}', **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _post(self, path, payload, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        response = self._session.post(f'{self._base_url}{path}', json=payload, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _put(self, path, payload=None, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        response = self._session.put(f'{self._base_url}{path}', json=payload, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _get_json(self, path):
+        ttl = self._cache_ttl.get(path, 0)
+        if ttl <= 0:
+            return self._get(path).json()
+
+        with self._cache_lock:
+            stats = self.cache_stats.setdefault(path, {'hits': 0, 'misses': 0})
+            entry = self._cache.get(path)
+            if entry and time.monotonic() < entry[0]:
+                stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            stats['misses'] += 1
+
+        data = self._get(path).json()
+        with self._cache_lock:
+            self._cache[path] = (time.monotonic() + ttl, data)
+        return copy.deepcopy(data)
+
+    def invalidate(self, path=None):
+        """Drop the cached response of an endpoint (e.g. '/room'), or of all of them."""
+        with self._cache_lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(path, None)
 
     def get_rooms(self):
-        data = requests.get(f'{self._base_url}/room', auth=self._auth)
-        return data.json()['rooms']
+        return self._get_json('/room')['rooms']
 
     def get_bookings(self):
-        data = requests.get(f'{self._base_url}/booking', auth=self._auth)
-        return data.json()['bookings']
\ No newline at end of file
+        return self._get_json('/booking')['bookings']
+
+    def get_room_report(self, room_id):
+        """Return the booked (unavailable) dates of a room, as shown in its booking calendar."""
+        return self._get(f'/report/room/{room_id}').json()['report']
+
+    def create_booking(self, room_id, firstname, lastname, email, phone, checkin, checkout):
+        """Book a room, as the frontpage booking form does, and return the response (with the booking id)."""
+        data = self._post('/booking/', {'roomid': room_id, 'firstname': firstname, 'lastname': lastname,
+                                        'email': email, 'phone': str(phone), 'depositpaid': False,
+                                        'bookingdates': {'checkin': _isoformat(checkin),
+                                                         'checkout': _isoformat(checkout)}}).json()
+        self.track_created('booking', data.get('bookingid'))
+        return data
+
+    def get_messages(self):
+        """Return the summary (id, name, subject, read) of all messages, as listed in the admin inbox."""
+        return self._get('/message/').json()['messages']
+
+    def get_message(self, message_id):
+        return self._get(f'/message/{message_id}').json()
+
+    def mark_message_read(self, message_id):
+        self._put(f'/message/{message_id}/read')
+
+    def create_message(self, name, email, phone, subject, description):
+        """Submit a contact message, as the frontpage contact form does, and return it."""
+        data = self._post('/message/', {'name': name, 'email': email, 'phone': str(phone),
+                                        'subject': subject, 'description': description})
+        message = data.json()
+        self.track_created('message', message.get('messageid'))
+        return message
+
+    def find_message(self, name, subject, unread_only=True):
+        """Return the summary of the newest message with this exact name and subject, or None.
+
+        Besides the message's ``id``, the summary has its ``index`` in the listing, which
+        is also its row in the admin inbox. The API can't search messages or page through
+        them, and lists them oldest first, so the whole listing is downloaded to find the
+        newest match and its position; that's one request per lookup, parsed once.
+        """
+        messages = self.get_messages()
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if (message.get('name') == name and message.get('subject') == subject
+                    and not (unread_only and message.get('read'))):
+                return dict(message, index=index)
+        return None
+
+    def login(self, username=None, password=None):
+        """Log in to the admin side and return the auth token (also kept for later requests)."""
+        data = self._post('/auth/login', {'username': username or self._username,
+                                          'password': password or self._password})
+        self.token = data.cookies.get('token') or data.json().get('token')
+        return self.token
+
+    def find_booking(self, room_id=None, firstname=None, lastname=None, checkin=None, checkout=None):
+        """Return the newest (highest id) booking matching all the given criteria, or None.
+
+        The server is asked to filter by room; the (possibly long) list it returns is
+        streamed and parsed one booking at a time. The seeded guest names repeat across
+        runs, so a match can be an older run's booking: the whole list is read, to
+        return the one just made.
+        """
+        criteria = {'roomid': room_id, 'firstname': firstname, 'lastname': lastname,
+                    'checkin': _isoformat(checkin), 'checkout': _isoformat(checkout)}
+        params = {'roomid': room_id} if room_id is not None else None
+        newest = None
+        with self._get('/booking', params=params, stream=True) as response:
+            for booking in _iter_json_array(response, 'bookings'):
+                if _booking_matches(booking, criteria) and (newest is None or booking['bookingid'] > newest['bookingid']):
+                    newest = booking
+        return newest
+
+    def track_created(self, kind, entity_id=None, ref=None, record=True, **match):
+        """Track a 'message' or 'booking' created by the tests, for delete_created().
+
+        When the id isn't known (e.g. a message sent through the contact form), give the
+        ``name`` and ``subject`` of the message; it will be looked up before deleting it.
+        """
+        entity = dict(match, kind=kind, id=entity_id, ref=ref or uuid.uuid4().hex)
+        with self._created_lock:
+            self.created.append(entity)
+        if record and self._ledger is not None:
+            self._ledger.record_created(self._base_url, entity)
+
+    def _resolve_message_ids(self, entities):
+        """Fill in the ids of tracked messages known only by name and subject, with a single listing.
+
+        Messages sent through the contact form leave no id to the tests. Seeded names
+        repeat across runs and workers, so ids are only filled in when every listed
+        message with that name and subject is one of those tracked; otherwise they
+        could be someone else's, and the messages are left unresolved.
+        """
+        unresolved = {}
+        for entity in entities:
+            if entity['id'] is None:
+                unresolved.setdefault((entity.get('name'), entity.get('subject')), []).append(entity)
+        if not unresolved:
+            return
+        known_ids = {entity['id'] for entity in entities if entity['id'] is not None}
+        listed = {}
+        with self._get('/message/', stream=True) as response:
+            for message in _iter_json_array(response, 'messages'):
+                key = (message.get('name'), message.get('subject'))
+                if key in unresolved and message.get('id') not in known_ids:
+                    listed.setdefault(key, []).append(message.get('id'))
+        for key, tracked in unresolved.items():
+            if len(listed.get(key, [])) == len(tracked):
+                for entity, message_id in zip(tracked, listed[key]):
+                    entity['id'] = message_id
+
+    def _delete_entity(self, entity):
+        if entity['id'] is None:
+            # not in the listing (yet, or any more): leave it pending for a later sweep
+            return False
+        try:
+            response = self._session.delete(f"{self._base_url}/{entity['kind']}/{entity['id']}", timeout=self._timeout)
+        except requests.RequestException:
+            return False
+        return response.ok or response.status_code == 404
+
+    def delete_created(self):
+        """Delete every tracked entity, with concurrent requests over the pooled connections.
+
+        Returns the number of entities deleted and of those that couldn't be; the latter
+        remain pending in the ledger, for a later sweep (see tests/cleanup.py).
+        """
+        with self._created_lock:
+            entities, self.created = self.created, []
+        if not entities:
+            return 0, 0
+
+        if self.token is None:
+            # deletions need the admin token cookie
+            self.login()
+        self._resolve_message_ids([entity for entity in entities if entity['kind'] == 'message'])
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            results = list(executor.map(self._delete_entity, entities))
+
+        deleted = [entity['ref'] for entity, ok in zip(entities, results) if ok]
+        if self._ledger is not None and deleted:
+            self._ledger.record_deleted(self._base_url, deleted)
+        return len(deleted), len(entities) - len(deleted)
+
+    def close(self):
+        self._session.close()
+
+
+def _isoformat(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _booking_matches(booking, criteria):
+    values = dict(booking, **booking.get('bookingdates', {}))
+    return all(expected is None or values.get(field) == expected
+               for field, expected in criteria.items())
+
+
+def _iter_json_array(response, key, chunk_size=8192):
+    """Yield the items of the top-level ``key`` array of a streamed JSON response."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = response.iter_content(chunk_size=chunk_size)
+    buffer = ''
+    pos = None
+
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        if pos is None:
+            start = buffer.find(f'"{key}"')
+            if start < 0 or buffer.find('[', start) < 0:
+                continue
+            pos = buffer.find('[', start) + 1
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # incomplete item, wait for more data
+                break
+            yield item
+
+        buffer = buffer[pos:]
+        pos = 0
+
+
+class AsyncBookerAPI:
+    """asyncio flavour of BookerAPI, with the same methods as coroutines.
+
+    This is not non-blocking I/O: every call runs the wrapped (blocking) BookerAPI
+    on a thread pool, and the coroutine waits for its thread. So at most
+    ``max_workers`` requests (default: the BookerAPI's ``pool_size``) are in flight
+    at a time, however many tasks await them; the others queue for a thread. Size
+    it, and the BookerAPI's pool, from the number of concurrent callers (e.g. one
+    per virtual user, see tests/load.py).
+    """
+
+    def __init__(self, booker_api, max_workers=None):
+        self._booker_api = booker_api
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or booker_api.pool_size)
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def get_rooms(self):
+        return await self._call(self._booker_api.get_rooms)
+
+    async def get_bookings(self):
+        return await self._call(self._booker_api.get_bookings)
+
+    async def find_booking(self, **criteria):
+        return await self._call(self._booker_api.find_booking, **criteria)
+
+    async def find_message(self, name, subject, unread_only=True):
+        return await self._call(self._booker_api.find_message, name, subject, unread_only)
+
+    async def get_room_report(self, room_id):
+        return await self._call(self._booker_api.get_room_report, room_id)
+
+    async def create_booking(self, room_id, firstname, lastname, email, phone, checkin, checkout):
+        return await self._call(self._booker_api.create_booking, room_id, firstname, lastname, email, phone,
+                                checkin, checkout)
+
+    async def get_messages(self):
+        return await self._call(self._booker_api.get_messages)
+
+    async def get_message(self, message_id):
+        return await self._call(self._booker_api.get_message, message_id)
+
+    async def mark_message_read(self, message_id):
+        return await self._call(self._booker_api.mark_message_read, message_id)
+
+    async def create_message(self, name, email, phone, subject, description):
+        return await self._call(self._booker_api.create_message, name, email, phone, subject, description)
+
+    async def login(self, username=None, password=None):
+        return await self._call(self._booker_api.login, username, password)
+
+    def invalidate(self, path=None):
+        self._booker_api.invalidate(path)
+
+    @property
+    def cache_stats(self):
+        return self._booker_api.cache_stats
+
+    def close(self):
+        self._executor.shutdown(wait=True)
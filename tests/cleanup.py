@@ -0,0 +1,221 @@
+"""Ledger of the data created in the SUT by test runs, and a sweep deleting what was left behind.
+
+Every message and booking a run creates is appended to the ledger (one JSON object
+per line), and so is its deletion once ``BookerAPI.delete_created()`` removes it at
+the end of the run. Entities of runs that crashed or were interrupted stay pending
+in the ledger, and so do messages whose id couldn't be told for sure (see
+BookerAPI._resolve_message_ids()); the sweep deletes those older than a number of
+hours, then compacts the ledger:
+
+    python -m tests.cleanup --older-than 24
+
+With ``--listing``, the sweep also goes through the SUT's message listing, for test
+data this ledger never recorded (runs on other machines, or from before the ledger
+existed). The listing has no creation times, so such messages are recorded as seen
+the first time a sweep lists them, and deleted by the first sweep at least that
+many hours later. Every message with the subject shared by the tests' valid
+contacts is taken for test data, so only use it on an environment where nobody
+else sends that subject; bookings have nothing telling test data apart, so only
+those in the ledger are swept.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from configparser import ConfigParser
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from tests.booker_api import BookerAPI
+from tests.my_contact_provider import VALID_SUBJECT
+
+LEDGER_PATH = '.booker_ledger.jsonl'
+
+
+def is_test_message(message):
+    """Whether a message of the SUT's listing was sent by the tests (see MyContactProvider.valid_subject)."""
+    return message.get('subject') == VALID_SUBJECT
+
+
+class Ledger:
+    """Append-only record of created, seen and deleted entities, shared by all workers.
+
+    Writes and the compaction are serialized with a lock file (where fcntl is
+    available), so a compaction never drops what another process is appending.
+    With a ``batch_size``, entries are kept in memory and written that many at a
+    time (e.g. under load); flush() writes what's left.
+    """
+
+    def __init__(self, path=LEDGER_PATH, batch_size=1):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._buffer = []
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock, open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _append(self, entries):
+        with self._lock:
+            self._buffer.extend(entries)
+            if len(self._buffer) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+        with self._locked(), open(self.path, 'a') as f:
+            # a single write per call, so lines of concurrent workers don't interleave
+            f.write(lines)
+
+    def _read(self, base_url=None):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if base_url is None or entry.get('base_url') == base_url:
+                    entries.append(entry)
+        return entries
+
+    def record_created(self, base_url, entity):
+        """Record an entity, a dict with its kind, id (None if not known yet) and a unique ref."""
+        self._append([dict(entity, action='created', base_url=base_url, time=time.time())])
+
+    def record_seen(self, base_url, entities):
+        """Record entities found in the SUT's listings, which this ledger didn't know of."""
+        self._append([dict(entity, action='seen', base_url=base_url, time=time.time()) for entity in entities])
+
+    def record_deleted(self, base_url, refs):
+        self._append([{'action': 'deleted', 'base_url': base_url, 'ref': ref, 'time': time.time()} for ref in refs])
+
+    def _not_deleted(self, base_url, action):
+        self.flush()
+        entries = self._read(base_url)
+        deleted = {entry['ref'] for entry in entries if entry['action'] == 'deleted'}
+        return [entry for entry in entries if entry['action'] == action and entry['ref'] not in deleted]
+
+    def pending(self, base_url, older_than=None):
+        """Entities created and not deleted yet, optionally only those older than ``older_than`` seconds."""
+        deadline = time.time() - older_than if older_than is not None else None
+        return [entry for entry in self._not_deleted(base_url, 'created')
+                if deadline is None or entry['time'] <= deadline]
+
+    def seen(self, base_url):
+        """Entities seen in the SUT's listings and not deleted yet, by ref."""
+        return {entry['ref']: entry for entry in self._not_deleted(base_url, 'seen')}
+
+    def compact(self):
+        """Drop the entities already deleted, keeping those still pending or seen."""
+        self.flush()
+        with self._locked():
+            entries = self._read()
+            deleted = {entry['ref'] for entry in entries if entry['action'] == 'deleted'}
+            keep = [entry for entry in entries if entry['action'] != 'deleted' and entry['ref'] not in deleted]
+            if len(keep) == len(entries):
+                return
+            with open(self.path + '.tmp', 'w') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in keep))
+            os.replace(self.path + '.tmp', self.path)
+
+
+def _listed_ref(message):
+    # the id alone could be reused once the SUT resets its data
+    fingerprint = hashlib.sha1(f"{message.get('name')}\n{message.get('subject')}".encode()).hexdigest()[:12]
+    return f"listed-message-{message['id']}-{fingerprint}"
+
+
+def track_listed_messages(booker_api, ledger, older_than):
+    """Track for deletion the test messages of the SUT's listing first seen ``older_than`` seconds ago.
+
+    Messages listed for the first time are recorded as seen, and those seen before
+    but no longer listed as deleted. Returns the number of messages tracked.
+    """
+    known_ids = {entity['id'] for entity in booker_api.created if entity['kind'] == 'message'}
+    seen = ledger.seen(booker_api.base_url)
+    deadline = time.time() - older_than
+    listed, new, tracked = set(), [], 0
+    for message in booker_api.get_messages():
+        if not is_test_message(message):
+            continue
+        ref = _listed_ref(message)
+        listed.add(ref)
+        if ref not in seen:
+            new.append({'kind': 'message', 'id': message['id'], 'ref': ref})
+        elif seen[ref]['time'] <= deadline and message['id'] not in known_ids:
+            booker_api.track_created('message', message['id'], ref=ref, record=False)
+            tracked += 1
+    ledger.record_seen(booker_api.base_url, new)
+    ledger.record_deleted(booker_api.base_url, [ref for ref in seen if ref not in listed])
+    return tracked
+
+
+def sweep(booker_api, ledger, older_than_hours, listing=False):
+    """Delete the test data older than ``older_than_hours`` and compact the ledger.
+
+    That's the entities pending in the ledger and, with ``listing``, the test messages
+    of the SUT's listing (see track_listed_messages()). Returns the number of entities
+    deleted, of those that couldn't be, and of messages whose id wasn't found or was
+    ambiguous (they stay pending in the ledger).
+    """
+    pending = ledger.pending(booker_api.base_url, older_than=older_than_hours * 3600)
+    for entry in pending:
+        booker_api.track_created(entry['kind'], entry['id'], ref=entry['ref'], record=False,
+                                 **{key: entry[key] for key in ('name', 'subject') if key in entry})
+    if listing:
+        if booker_api.token is None:
+            # the listing needs the admin token cookie
+            booker_api.login()
+        track_listed_messages(booker_api, ledger, older_than_hours * 3600)
+    tracked = list(booker_api.created)
+    deleted, failed = booker_api.delete_created()
+    ledger.compact()
+    # delete_created() fills in the ids it finds in the listing
+    unresolved = sum(1 for entity in tracked if entity['id'] is None)
+    return deleted, failed - unresolved, unresolved
+
+
+def main(argv=None):
+    config = ConfigParser()
+    config.read('config.ini')
+    parser = argparse.ArgumentParser(prog='python -m tests.cleanup',
+                                     description="Delete test data left in the SUT by previous runs.")
+    parser.add_argument('--older-than', type=float, default=24, help="only data created this many hours ago (default: 24)")
+    parser.add_argument('--base-url', default=os.environ.get("BASE_URL", config.get('app', 'base_url')))
+    parser.add_argument('--ledger', default=config.get('app', 'booker_api_ledger', fallback=LEDGER_PATH))
+    parser.add_argument('--listing', action='store_true',
+                        help="also delete the messages of the SUT's listing with the tests' subject, "
+                             "recorded or not (only where nobody else uses it)")
+    args = parser.parse_args(argv)
+
+    ledger = Ledger(args.ledger)
+    booker_api = BookerAPI(args.base_url, config.get('app', 'booker_api_username'),
+                           config.get('app', 'booker_api_password'), ledger=ledger)
+    deleted, failed, unresolved = sweep(booker_api, ledger, args.older_than, listing=args.listing)
+    booker_api.close()
+    print(f"Deleted {deleted} entities older than {args.older_than}h from {args.base_url}, {failed} failed, "
+          f"{unresolved} messages not found or ambiguous (left pending)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
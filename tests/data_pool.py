@@ -0,0 +1,125 @@
+"""Contact data generated in bulk ahead of time, instead of one Faker call at a time in the steps.
+
+The pool is split in shards, one per worker; shard ``i`` is generated with the seed
+``worker_seed(seed, i)``, so the data of a single worker can be reproduced from the run
+seed alone. It is saved as gzipped JSON, column by column (one list per field and
+validity), and consumed through ``PooledContactProvider``, which has the same API as
+``MyContactProvider`` and falls back to it once a column is exhausted.
+
+    python -m tests.data_pool --seed 1234 --shards 4 --size 500 -o data/contacts.json.gz
+"""
+
+import argparse
+import gzip
+import json
+
+from faker import Faker
+
+from tests.my_contact_provider import MyContactProvider
+from tests.walker.parallel import worker_seed
+
+FIELDS = ('name', 'email', 'phone', 'subject', 'description')
+COLUMNS = [f'{kind}_{field}' for kind in ('valid', 'invalid') for field in FIELDS]
+FORMAT_VERSION = 1
+
+
+def generate_shard(seed, size):
+    """``size`` values of every column, generated with their own seeded Faker."""
+    fake = Faker()
+    fake.add_provider(MyContactProvider)
+    fake.seed_instance(seed)
+    return {column: [getattr(fake, column)() for _ in range(size)] for column in COLUMNS}
+
+
+def generate_pool(seed, shards, size):
+    return {'version': FORMAT_VERSION, 'seed': seed, 'size': size,
+            'shards': [generate_shard(worker_seed(seed, index), size) for index in range(shards)]}
+
+
+def save_pool(path, pool):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(pool, f, separators=(',', ':'))
+
+
+def load_pool(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        pool = json.load(f)
+    if pool.get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported data pool version {pool.get('version')}")
+    return pool
+
+
+def load_shard(path, worker=0):
+    """The shard of a worker; workers beyond the number of shards wrap around."""
+    shards = load_pool(path)['shards']
+    return shards[int(worker) % len(shards)]
+
+
+class PooledContactProvider(MyContactProvider):
+    """MyContactProvider serving the values of a data pool shard, in order.
+
+    Add it as an instance, e.g. ``fake.add_provider(PooledContactProvider(fake, shard))``.
+    """
+
+    def __init__(self, generator, shard=None):
+        super().__init__(generator)
+        self._columns = {column: iter(values) for column, values in (shard or {}).items()}
+
+    def _next(self, column):
+        return next(self._columns.get(column, iter(())), None)
+
+    def valid_name(self):
+        value = self._next('valid_name')
+        return super().valid_name() if value is None else value
+
+    def invalid_name(self):
+        value = self._next('invalid_name')
+        return super().invalid_name() if value is None else value
+
+    def valid_email(self):
+        value = self._next('valid_email')
+        return super().valid_email() if value is None else value
+
+    def invalid_email(self):
+        value = self._next('invalid_email')
+        return super().invalid_email() if value is None else value
+
+    def valid_phone(self):
+        value = self._next('valid_phone')
+        return super().valid_phone() if value is None else value
+
+    def invalid_phone(self):
+        value = self._next('invalid_phone')
+        return super().invalid_phone() if value is None else value
+
+    def valid_subject(self):
+        value = self._next('valid_subject')
+        return super().valid_subject() if value is None else value
+
+    def invalid_subject(self):
+        value = self._next('invalid_subject')
+        return super().invalid_subject() if value is None else value
+
+    def valid_description(self):
+        value = self._next('valid_description')
+        return super().valid_description() if value is None else value
+
+    def invalid_description(self):
+        value = self._next('invalid_description')
+        return super().invalid_description() if value is None else value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.data_pool', description="Generate a contact data pool.")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--shards', type=int, default=1, help="number of shards, usually one per worker")
+    parser.add_argument('--size', type=int, default=500, help="values per column and shard")
+    parser.add_argument('-o', '--output', required=True, help="pool file (gzipped JSON)")
+    args = parser.parse_args(argv)
+
+    save_pool(args.output, generate_pool(args.seed, args.shards, args.size))
+    print(f"Saved {args.shards} shard(s) of {args.size} contacts (seed {args.seed}) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
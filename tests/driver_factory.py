@@ -0,0 +1,156 @@
+"""Firefox sessions with a lean profile: no images, media, telemetry, disk cache or prefetching.
+
+No locator in tests/pages needs images, video or audio, yet every visit to the
+frontpage downloads and decodes them. The lean profile blocks them by URL pattern,
+through a proxy auto-config script that sends matching requests to a closed local
+port (so they fail at once) and lets everything else go direct. It also turns off
+what Firefox does in the background of every session: telemetry, safe browsing
+and update checks, the disk cache of a profile that is thrown away anyway, and
+DNS/link prefetching and speculative connections. The 'default' profile leaves
+Firefox as it is, e.g. to compare both:
+
+    python -m tests.driver_factory --runs 5 --headless
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from configparser import ConfigParser
+from urllib.parse import quote
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options
+
+from tests.timing import instrument_driver
+
+PROFILES = ('lean', 'default')
+
+# images and media, with or without a query string, and analytics scripts
+BLOCKED_URLS = tuple(pattern for extension in ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'bmp',
+                                               'mp4', 'webm', 'ogg', 'mp3', 'wav')
+                     for pattern in (f'*.{extension}', f'*.{extension}?*')) + (
+    '*://www.google-analytics.com/*', '*://www.googletagmanager.com/*')
+
+LEAN_PREFERENCES = {
+    # images that escape the URL patterns (e.g. CSS backgrounds without extension) and autoplay
+    'permissions.default.image': 2,
+    'media.autoplay.default': 5,
+    # telemetry, studies and background checks
+    'toolkit.telemetry.enabled': False,
+    'toolkit.telemetry.unified': False,
+    'toolkit.telemetry.archive.enabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'datareporting.policy.dataSubmissionEnabled': False,
+    'app.normandy.enabled': False,
+    'app.shield.optoutstudies.enabled': False,
+    'app.update.auto': False,
+    'extensions.update.enabled': False,
+    'browser.search.update': False,
+    'browser.safebrowsing.malware.enabled': False,
+    'browser.safebrowsing.phishing.enabled': False,
+    'browser.safebrowsing.downloads.enabled': False,
+    'network.captive-portal-service.enabled': False,
+    'network.connectivity-service.enabled': False,
+    # caches written to disk; the in-memory cache still serves the app's bundles on revisits
+    'browser.cache.disk.enable': False,
+    'browser.cache.offline.enable': False,
+    'browser.sessionstore.resume_from_crash': False,
+    # prefetching and speculative connections
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'network.predictor.enabled': False,
+    'network.http.speculative-parallel-limit': 0,
+    'browser.urlbar.speculativeConnect.enabled': False,
+    'browser.places.speculativeConnect.enabled': False,
+    # animations only delay the waits
+    'ui.prefersReducedMotion': 1,
+    'toolkit.cosmeticAnimations.enabled': False,
+}
+
+
+def _proxy_auto_config(blocked_urls):
+    """A PAC script as a data: URL; blocked requests go to the discard port of localhost, which refuses them."""
+    script = ("function FindProxyForURL(url, host) {"
+              f" var patterns = {json.dumps(list(blocked_urls))};"
+              " for (var i = 0; i < patterns.length; i++) {"
+              " if (shExpMatch(url, patterns[i])) return 'PROXY 127.0.0.1:9'; }"
+              " return 'DIRECT'; }")
+    return 'data:text/javascript,' + quote(script)
+
+
+def firefox_options(headless=False, profile='lean', blocked_urls=None):
+    """Options of a Firefox session with the given profile ('lean' or 'default')."""
+    if profile not in PROFILES:
+        raise ValueError(f"unknown browser profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    options = Options()
+    if headless:
+        options.add_argument('-headless')
+    if profile == 'lean':
+        for name, value in LEAN_PREFERENCES.items():
+            options.set_preference(name, value)
+        options.set_preference('network.proxy.type', 2)
+        options.set_preference('network.proxy.autoconfig_url',
+                               _proxy_auto_config(BLOCKED_URLS if blocked_urls is None else blocked_urls))
+        # match on the whole URL of https requests too, apply to localhost and never fall back to direct
+        options.set_preference('network.proxy.autoconfig_url.include_path', True)
+        options.set_preference('network.proxy.allow_hijacking_localhost', True)
+        options.set_preference('network.proxy.failover_direct', False)
+    return options
+
+
+def create_firefox(headless=False, profile='lean', blocked_urls=None):
+    """Start a Firefox session, with its WebDriver commands timed and no implicit wait."""
+    driver = instrument_driver(webdriver.Firefox(options=firefox_options(headless, profile, blocked_urls)))
+    # page objects use explicit waits (see tests/pages/waits.py), so no implicit wait
+    driver.implicitly_wait(0)
+    return driver
+
+
+def measure_page_loads(base_url, runs, headless=False, profile='lean', blocked_urls=None):
+    """Open the frontpage ``runs`` times in one session; return the load times and the resources transferred."""
+    from tests.pages.front import FrontPage
+
+    driver = create_firefox(headless, profile, blocked_urls)
+    durations, resources, transferred = [], [], []
+    try:
+        for _ in range(runs):
+            driver.get('about:blank')
+            start = time.perf_counter()
+            page = FrontPage(driver, base_url).open()
+            page.contact_form.wait_for_region_to_load()
+            durations.append(time.perf_counter() - start)
+            entries = driver.execute_script(
+                "return performance.getEntriesByType('resource').map(e => e.transferSize || 0);")
+            resources.append(len(entries))
+            transferred.append(sum(entries))
+    finally:
+        driver.quit()
+    return {'profile': profile, 'first_load_seconds': round(durations[0], 4),
+            'mean_load_seconds': round(statistics.mean(durations), 4),
+            'resources': max(resources), 'transferred_kb': round(max(transferred) / 1024, 1)}
+
+
+def main(argv=None):
+    config = ConfigParser()
+    config.read('config.ini')
+    parser = argparse.ArgumentParser(prog='python -m tests.driver_factory',
+                                     description="Report the page-load time saved by the lean browser profile.")
+    parser.add_argument('--base-url', default=os.environ.get("BASE_URL", config.get('app', 'base_url')))
+    parser.add_argument('--runs', type=int, default=5, help="frontpage loads per profile (default: 5)")
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = [measure_page_loads(args.base_url, args.runs, args.headless, profile) for profile in reversed(PROFILES)]
+    print(f"{'profile':<10}{'first':>9}{'mean':>9}{'resources':>11}{'KB':>9}")
+    for result in results:
+        print("{profile:<10}{first_load_seconds:>9.2f}{mean_load_seconds:>9.2f}{resources:>11}{transferred_kb:>9}".format(**result))
+    default, lean = results
+    saved = default['mean_load_seconds'] - lean['mean_load_seconds']
+    print(f"The lean profile saves {saved * 1000:.0f}ms per frontpage load "
+          f"({saved / default['mean_load_seconds'] * 100:.0f}%) on {args.base_url}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Reuse and recycle Firefox sessions instead of starting one per test, or keeping one for hours.
+
+DriverPool leases warm sessions to the tests of the pytest suite (standard_pom_tests.py)
+and resets them between leases. SessionRecycler replaces the single session of a long
+walk (tests/test.py) once it has grown too big or too slow, carrying its URL, cookies
+and storage over to the new one (see capture_state() and restore_state()). Both
+measure the browser's memory with browser_memory_mb(), which needs psutil.
+"""
+
+import collections
+import statistics
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class DriverPool:
+    """Pool of warm browser sessions, leased per test instead of starting a new browser each time.
+
+    Sessions are reset between leases (storage, cookies, about:blank) and recycled
+    after ``max_uses`` leases or once the browser uses more than ``max_memory_mb``
+    (memory is only checked if psutil is available). The pool lives in the process
+    that created it, so each pytest-xdist worker gets its own.
+    """
+
+    def __init__(self, factory, max_uses=20, max_memory_mb=None):
+        self._factory = factory
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._idle = []
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        driver = self._factory()
+        with self._lock:
+            self._uses[driver] = 0
+        return driver
+
+    def release(self, driver):
+        with self._lock:
+            self._uses[driver] += 1
+            uses = self._uses[driver]
+
+        if uses >= self.max_uses or self._exceeds_memory(driver) or not self._reset(driver):
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def _reset(self, driver):
+        """Leave the session as a fresh one; return False if it's no longer usable."""
+        try:
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                # pages such as about:blank have no storage
+                pass
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+    def _exceeds_memory(self, driver):
+        if not self.max_memory_mb or psutil is None:
+            return False
+        return browser_memory_mb(driver) > self.max_memory_mb
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            drivers = list(self._uses)
+            self._idle = []
+        for driver in drivers:
+            self._discard(driver)
+
+
+def browser_memory_mb(driver):
+    """Resident memory of the driver service and the browser processes it started, in MB."""
+    if psutil is None:
+        return 0
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except (AttributeError, psutil.Error):
+        return 0
+
+
+_STORAGE_JS = "return [Object.entries(window.localStorage), Object.entries(window.sessionStorage)];"
+
+_RESTORE_STORAGE_JS = """
+const [local, session] = arguments;
+for (const [key, value] of local) window.localStorage.setItem(key, value);
+for (const [key, value] of session) window.sessionStorage.setItem(key, value);
+"""
+
+
+def capture_state(driver):
+    """The URL, cookies, localStorage and sessionStorage of the current page."""
+    try:
+        local_storage, session_storage = driver.execute_script(_STORAGE_JS)
+    except Exception:
+        # pages such as about:blank have no storage
+        local_storage, session_storage = [], []
+    return {'url': driver.current_url, 'cookies': driver.get_cookies(),
+            'local_storage': local_storage, 'session_storage': session_storage}
+
+
+def restore_state(driver, state):
+    """Open the URL of a captured state, set its cookies and storage and reload, so the page starts with them."""
+    if not state['url'].startswith('http'):
+        return
+    # cookies and storage can only be set for the origin of the current page
+    driver.get(state['url'])
+    for cookie in state['cookies']:
+        driver.add_cookie(cookie)
+    driver.execute_script(_RESTORE_STORAGE_JS, state['local_storage'], state['session_storage'])
+    driver.refresh()
+
+
+class SessionRecycler:
+    """Replace a long-lived browser session, keeping its state, once it has grown too big or too slow.
+
+    Over hours-long walks the browser's memory grows and steps get slower. The
+    recycler is given the duration of every step: the first ``baseline_samples``
+    of each step are its baseline (steps faster than ``min_seconds`` are ignored),
+    and the latency drift is the median ratio of the last ``window`` steps to their
+    baselines. Baselines are kept across sessions, so later ones are compared with
+    the first, fresh one. Memory is only checked every ``check_every`` checks, and
+    only if psutil is available.
+    """
+
+    def __init__(self, factory, max_memory_mb=None, max_latency_drift=None, window=50, baseline_samples=5,
+                 min_seconds=0.05, check_every=10):
+        self._factory = factory
+        self.max_memory_mb = max_memory_mb
+        self.max_latency_drift = max_latency_drift
+        self.baseline_samples = baseline_samples
+        self.min_seconds = min_seconds
+        self.check_every = check_every
+        self.recycles = collections.Counter(memory=0, latency=0)
+        self._samples = {}
+        self._baselines = {}
+        self._ratios = collections.deque(maxlen=window)
+        self._checks = 0
+
+    def record(self, name, seconds):
+        baseline = self._baselines.get(name)
+        if baseline is None:
+            samples = self._samples.setdefault(name, [])
+            samples.append(seconds)
+            if len(samples) == self.baseline_samples:
+                self._baselines[name] = statistics.median(self._samples.pop(name))
+        elif baseline >= self.min_seconds:
+            self._ratios.append(seconds / baseline)
+
+    def latency_drift(self):
+        """Median ratio of the recent step durations to their baselines; None until there are enough steps."""
+        if len(self._ratios) < self._ratios.maxlen:
+            return None
+        return statistics.median(self._ratios)
+
+    def check(self, driver):
+        """Return why the session should be recycled, 'latency' or 'memory', or None."""
+        self._checks += 1
+        drift = self.latency_drift()
+        if self.max_latency_drift and drift is not None and drift >= self.max_latency_drift:
+            return 'latency'
+        if self.max_memory_mb and psutil is not None and self._checks % self.check_every == 0:
+            if browser_memory_mb(driver) > self.max_memory_mb:
+                return 'memory'
+        return None
+
+    def reset(self):
+        """Forget the recent steps, e.g. once the session has been replaced."""
+        self._ratios.clear()
+        self._checks = 0
+
+    def recycle(self, driver, reason):
+        """Quit the session and return a new one with the URL, cookies and storage of the old one."""
+        state = capture_state(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        driver = self._factory()
+        restore_state(driver, state)
+        self.reset()
+        self.recycles[reason] += 1
+        return driver
@@ -0,0 +1,30 @@
+"""Serve the stand-in Restful Booker platform until interrupted.
+
+    python -m tests.fake_sut --port 8080
+    BASE_URL=http://127.0.0.1:8080 ./run_walker_contact.sh
+"""
+
+import argparse
+
+from tests.fake_sut.server import BookerStore, FakeBooker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.fake_sut', description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--username', default='admin', help="admin username (default: admin)")
+    parser.add_argument('--password', default='password', help="admin password (default: password)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    fake = FakeBooker(args.host, args.port, store=BookerStore(args.username, args.password), verbose=args.verbose)
+    print(f"Serving the Restful Booker stand-in on {fake.base_url} (Ctrl+C to stop)")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+"""In-process stand-in for the Restful Booker platform.
+
+Serves the API endpoints used by the suite (``/room``, ``/booking``, ``/message``,
+``/auth``) from an in-memory store, plus a small single page app (``app.html``)
+rendering the frontpage and the admin pages with the markup the page objects in
+``tests/pages`` expect. Everything is local and deterministic, so walks against it
+measure the harness rather than a remote shared host.
+"""
+
+import base64
+import json
+import os
+import re
+import secrets
+import threading
+from datetime import date
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+APP_PATH = os.path.join(os.path.dirname(__file__), 'app.html')
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+DEFAULT_ROOMS = [
+    {'roomid': 1, 'roomName': '101', 'type': 'single', 'accessible': True, 'image': '',
+     'description': 'A cosy single room, close to the garden.', 'features': ['TV', 'WiFi', 'Safe'],
+     'roomPrice': 100},
+]
+DEFAULT_MESSAGES = [
+    {'messageid': 1, 'name': 'James Dean', 'email': 'james@email.com', 'phone': '01402 619211',
+     'subject': 'Booking enquiry', 'description': 'I would like to book a room at your place', 'read': False},
+]
+
+
+class BookerStore:
+    """In-memory data of the fake platform; safe to use from the server threads."""
+
+    def __init__(self, username='admin', password='password'):
+        self.username = username
+        self.password = password
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rooms = [dict(room) for room in DEFAULT_ROOMS]
+            self.messages = [dict(message) for message in DEFAULT_MESSAGES]
+            self.bookings = []
+            self.tokens = set()
+            self._next_booking_id = 1
+            self._next_message_id = len(self.messages) + 1
+
+    def login(self, username, password):
+        if (username, password) != (self.username, self.password):
+            return None
+        token = secrets.token_hex(8)
+        with self._lock:
+            self.tokens.add(token)
+        return token
+
+    def logout(self, token):
+        with self._lock:
+            self.tokens.discard(token)
+
+    def is_valid_token(self, token):
+        return token in self.tokens
+
+    def get_room(self, room_id):
+        return next((room for room in self.rooms if room['roomid'] == room_id), None)
+
+    def find_bookings(self, room_id=None):
+        with self._lock:
+            return [dict(booking) for booking in self.bookings
+                    if room_id is None or booking['roomid'] == room_id]
+
+    def create_booking(self, data):
+        with self._lock:
+            dates = data['bookingdates']
+            for booking in self.bookings:
+                if (booking['roomid'] == data['roomid']
+                        and dates['checkin'] < booking['bookingdates']['checkout']
+                        and booking['bookingdates']['checkin'] < dates['checkout']):
+                    return None
+            booking = {'bookingid': self._next_booking_id, 'roomid': data['roomid'],
+                       'firstname': data['firstname'], 'lastname': data['lastname'],
+                       'depositpaid': bool(data.get('depositpaid')),
+                       'bookingdates': {'checkin': dates['checkin'], 'checkout': dates['checkout']}}
+            self._next_booking_id += 1
+            self.bookings.append(booking)
+            return dict(booking)
+
+    def create_message(self, data):
+        with self._lock:
+            message = {'messageid': self._next_message_id, 'read': False,
+                       **{field: data[field] for field in ('name', 'email', 'phone', 'subject', 'description')}}
+            self._next_message_id += 1
+            self.messages.append(message)
+            return dict(message)
+
+    def get_message(self, message_id):
+        with self._lock:
+            message = next((message for message in self.messages if message['messageid'] == message_id), None)
+            return dict(message) if message else None
+
+    def delete(self, collection, key, entity_id):
+        with self._lock:
+            entities = getattr(self, collection)
+            remaining = [entity for entity in entities if entity[key] != entity_id]
+            setattr(self, collection, remaining)
+            return len(remaining) < len(entities)
+
+    def mark_message_read(self, message_id):
+        with self._lock:
+            for message in self.messages:
+                if message['messageid'] == message_id:
+                    message['read'] = True
+                    return True
+            return False
+
+
+def validate_message(data):
+    """Error messages for a contact message, with the rules of the real platform."""
+    errors = []
+    name, email = data.get('name') or '', data.get('email') or ''
+    phone, subject = str(data.get('phone') or ''), data.get('subject') or ''
+    description = data.get('description') or ''
+    if not name:
+        errors.append('Name may not be blank')
+    if not email:
+        errors.append('Email may not be blank')
+    elif not EMAIL_PATTERN.match(email):
+        errors.append('must be a well-formed email address')
+    if not phone:
+        errors.append('Phone may not be blank')
+    elif not 11 <= len(phone) <= 21:
+        errors.append('Phone must be between 11 and 21 characters.')
+    if not subject:
+        errors.append('Subject may not be blank')
+    elif not 5 <= len(subject) <= 100:
+        errors.append('Subject must be between 5 and 100 characters.')
+    if not description:
+        errors.append('Message may not be blank')
+    elif not 20 <= len(description) <= 2000:
+        errors.append('Message must be between 20 and 2000 characters.')
+    return errors
+
+
+def validate_booking(data):
+    errors = []
+    if not 3 <= len(data.get('firstname') or '') <= 18:
+        errors.append('Firstname should not be blank and have between 3 and 18 characters')
+    if not 3 <= len(data.get('lastname') or '') <= 30:
+        errors.append('Lastname should not be blank and have between 3 and 30 characters')
+    email = data.get('email')
+    if email is not None and not EMAIL_PATTERN.match(email):
+        errors.append('must be a well-formed email address')
+    phone = data.get('phone')
+    if phone is not None and not 11 <= len(str(phone)) <= 21:
+        errors.append('size must be between 11 and 21')
+    dates = data.get('bookingdates') or {}
+    try:
+        if date.fromisoformat(dates['checkin']) >= date.fromisoformat(dates['checkout']):
+            errors.append('Checkout must be after checkin')
+    except (KeyError, TypeError, ValueError):
+        errors.append('Booking dates are missing or invalid')
+    if not isinstance(data.get('roomid'), int):
+        errors.append('Room id is missing')
+    return errors
+
+
+class FakeBookerHandler(BaseHTTPRequestHandler):
+    """Routes the requests to the store; ``self.server.store`` holds the data."""
+
+    routes = [
+        ('GET', r'/', 'app'),
+        ('GET', r'/index\.html', 'app'),
+        ('GET', r'/room', 'list_rooms'),
+        ('GET', r'/report/room/(\d+)', 'room_report'),
+        ('GET', r'/booking', 'list_bookings'),
+        ('POST', r'/booking', 'create_booking'),
+        ('DELETE', r'/booking/(\d+)', 'delete_booking'),
+        ('GET', r'/message', 'list_messages'),
+        ('GET', r'/message/count', 'count_messages'),
+        ('GET', r'/message/(\d+)', 'get_message'),
+        ('PUT', r'/message/(\d+)/read', 'read_message'),
+        ('POST', r'/message', 'create_message'),
+        ('DELETE', r'/message/(\d+)', 'delete_message'),
+        ('POST', r'/auth/login', 'login'),
+        ('POST', r'/auth/validate', 'validate'),
+        ('POST', r'/auth/logout', 'logout'),
+    ]
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are separate writes; with Nagle's algorithm every keep-alive response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        self.query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                return getattr(self, handler)(*match.groups())
+        self._send_json(404, {'error': 'Not found'})
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return {}
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode(), 'application/json', headers)
+
+    def _token(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return cookie['token'].value if 'token' in cookie else None
+
+    def _is_authenticated(self):
+        authorization = self.headers.get('Authorization', '')
+        if authorization.startswith('Basic '):
+            try:
+                username, _, password = base64.b64decode(authorization[6:]).decode().partition(':')
+            except ValueError:
+                return False
+            return (username, password) == (self.store.username, self.store.password)
+        return self.store.is_valid_token(self._token())
+
+    def _forbidden(self):
+        self._send_json(403, {'error': 'Forbidden'})
+
+    def app(self):
+        with open(APP_PATH, 'rb') as f:
+            self._send(200, f.read(), 'text/html; charset=utf-8')
+
+    def list_rooms(self):
+        self._send_json(200, {'rooms': self.store.rooms})
+
+    def room_report(self, room_id):
+        bookings = self.store.find_bookings(int(room_id))
+        self._send_json(200, {'report': [{'start': booking['bookingdates']['checkin'],
+                                          'end': booking['bookingdates']['checkout'],
+                                          'title': 'Unavailable'} for booking in bookings]})
+
+    def list_bookings(self):
+        if not self._is_authenticated():
+            return self._forbidden()
+        room_id = self.query.get('roomid')
+        self._send_json(200, {'bookings': self.store.find_bookings(int(room_id) if room_id else None)})
+
+    def create_booking(self):
+        data = self._read_json()
+        errors = validate_booking(data)
+        if errors:
+            return self._send_json(400, {'errors': errors})
+        if self.store.get_room(data['roomid']) is None:
+            return self._send_json(400, {'errors': ['Room not found']})
+        booking = self.store.create_booking(data)
+        if booking is None:
+            return self._send_json(409, {'errors': ['The room dates are either invalid or are already booked '
+                                                    'for one or more of the dates that you have selected.']})
+        self._send_json(201, {'bookingid': booking['bookingid'], 'booking': booking})
+
+    def delete_booking(self, booking_id):
+        if not self._is_authenticated():
+            return self._forbidden()
+        if not self.store.delete('bookings', 'bookingid', int(booking_id)):
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(202, {})
+
+    def list_messages(self):
+        self._send_json(200, {'messages': [{'id': message['messageid'], 'name': message['name'],
+                                            'subject': message['subject'], 'read': message['read']}
+                                           for message in self.store.messages]})
+
+    def count_messages(self):
+        self._send_json(200, {'count': sum(not message['read'] for message in self.store.messages)})
+
+    def get_message(self, message_id):
+        message = self.store.get_message(int(message_id))
+        if message is None:
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(200, message)
+
+    def read_message(self, message_id):
+        if not self._is_authenticated():
+            return self._forbidden()
+        if not self.store.mark_message_read(int(message_id)):
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(202, {})
+
+    def create_message(self):
+        data = self._read_json()
+        errors = validate_message(data)
+        if errors:
+            return self._send_json(400, {'errors': errors})
+        data['phone'] = str(data['phone'])
+        self._send_json(201, self.store.create_message(data))
+
+    def delete_message(self, message_id):
+        if not self._is_authenticated():
+            return self._forbidden()
+        if not self.store.delete('messages', 'messageid', int(message_id)):
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(202, {})
+
+    def login(self):
+        data = self._read_json()
+        token = self.store.login(data.get('username'), data.get('password'))
+        if token is None:
+            return self._forbidden()
+        self._send_json(200, {'token': token}, {'Set-Cookie': f'token={token}; Path=/'})
+
+    def validate(self):
+        token = self._read_json().get('token') or self._token()
+        if not self.store.is_valid_token(token):
+            return self._forbidden()
+        self._send_json(200, {})
+
+    def logout(self):
+        token = self._read_json().get('token') or self._token()
+        self.store.logout(token)
+        self._send_json(200, {}, {'Set-Cookie': 'token=; Path=/; Max-Age=0'})
+
+
+class FakeBooker:
+    """The fake platform served from a background thread of this process.
+
+        with FakeBooker(port=0) as fake:
+            os.environ['BASE_URL'] = fake.base_url
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, store=None, verbose=False):
+        self.store = store or BookerStore()
+        self._server = ThreadingHTTPServer((host, port), FakeBookerHandler)
+        self._server.daemon_threads = True
+        self._server.store = self.store
+        self._server.verbose = verbose
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,420 @@
+"""Load the platform with concurrent virtual users walking the models over its REST API.
+
+Every virtual user is an asyncio task walking its own machine over the given models
+(see tests/walker), with a seed derived from the run seed, and sending for each edge
+the API requests the UI sends for it: e_load_frontpage lists the rooms,
+e_submit_valid_contact_data posts a message with MyContactProvider data,
+e_click_last_message opens it in the inbox, e_confirm_booking books a room, and so
+on. Once a walk is over (or one of its edges failed) the user starts a new one.
+
+Users are started evenly over the ramp-up, and requests are paced so that all the
+users together don't exceed the target rate. Requests are sent by a shared BookerAPI
+through AsyncBookerAPI, which runs them on a thread pool (requests has no asyncio
+client): ``--connections`` threads and pooled connections, one per user by default,
+cap the requests in flight, and users beyond it wait for a thread. The
+duration of every edge and of every request is aggregated in the histograms of
+tests/timing.py and reported as throughput and latency percentiles, along with
+the error responses; those an edge expects (400 for invalid contact data, 409 for
+a booking of dates taken meanwhile) are not counted as errors:
+
+    python -m tests.load -m models/contact_form.json -m models/message_backoffice.json \\
+        --users 200 --ramp-up 30 --duration 120 --rate 100 -o load.json
+
+``--fake-sut`` runs the users against the local stand-in (tests/fake_sut), to try
+the load mode itself; it shares the process with the users, so don't take its
+numbers as those of the platform.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from configparser import ConfigParser
+from datetime import date, timedelta
+
+import requests
+from faker import Faker
+
+from tests.booker_api import AsyncBookerAPI, BookerAPI
+from tests.cleanup import Ledger
+from tests.my_contact_provider import MyContactProvider
+from tests.timing import Timings, instrument_booker_api, request_name
+from tests.walker.compiler import check_models
+from tests.walker.expressions import ExpressionError
+from tests.walker.machine import Machine, MachineError
+from tests.walker.model import ModelError, load_model_options
+from tests.walker.parallel import worker_seed
+
+
+# seconds the current user's edge spent waiting for the rate limiter, not part of its latency
+_paced_seconds = contextvars.ContextVar('paced_seconds', default=None)
+# error statuses the current user's requests are expected to get, not counted as errors
+_expected_statuses = contextvars.ContextVar('expected_statuses', default=frozenset())
+
+
+@contextlib.contextmanager
+def expect_statuses(*statuses):
+    """Expect the requests sent within to be answered with these error statuses, e.g. 400 for invalid data."""
+    token = _expected_statuses.set(frozenset(statuses))
+    try:
+        yield
+    finally:
+        _expected_statuses.reset(token)
+
+
+class RateLimiter:
+    """Spread calls evenly, at most ``rate`` per second over all the users; no limit if ``rate`` is None."""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.rate:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+            paced = _paced_seconds.get()
+            if paced is not None:
+                paced[0] += slot - now
+
+
+class PacedBookerAPI(AsyncBookerAPI):
+    """AsyncBookerAPI whose requests wait for a slot of a RateLimiter.
+
+    Requests run in the context of the user sending them, so that the response
+    hooks see the statuses it expects (see expect_statuses()).
+    """
+
+    def __init__(self, booker_api, limiter, max_workers=None):
+        super().__init__(booker_api, max_workers)
+        self.limiter = limiter
+
+    async def _call(self, func, *args, **kwargs):
+        await self.limiter.wait()
+        return await super()._call(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+class VirtualUser:
+    """The requests sent by the UI for each edge of the models, for one user.
+
+    Methods take the model data, with the same variables as tests/test.py. Edges
+    that only happen in the browser (e.g. picking dates) send nothing, and vertices
+    are not checked beyond the responses of the edges leading to them.
+    """
+
+    def __init__(self, api, fake, rng):
+        self.api = api
+        self.fake = fake
+        self.rng = rng
+        self.rooms = []
+        self.room = None
+        self.checkin = self.checkout = None
+        self.guest = None
+
+    def _valid_contact(self):
+        return {'name': self.fake.valid_name(), 'email': self.fake.valid_email(), 'phone': self.fake.valid_phone(),
+                'subject': self.fake.valid_subject(), 'description': self.fake.valid_description()}
+
+    async def _submit_invalid_contact(self, contact):
+        try:
+            with expect_statuses(400):
+                await self.api.create_message(**contact)
+        except requests.HTTPError as e:
+            if e.response.status_code != 400:
+                raise
+        else:
+            raise AssertionError("invalid message was accepted")
+
+    async def _submit_invalid_field(self, field, invalid_value):
+        await self._submit_invalid_contact(dict(self._valid_contact(), **{field: invalid_value}))
+
+    async def e_load_frontpage(self, data):
+        self.rooms = await self.api.get_rooms()
+
+    async def e_submit_valid_contact_data(self, data):
+        contact = self._valid_contact()
+        for field, value in contact.items():
+            data[f'global.last_contact_{field}'] = value
+        await self.api.create_message(**contact)
+
+    async def e_submit_invalid_contact_data(self, data):
+        await self._submit_invalid_contact(self.fake.invalid_contact_data())
+
+    async def e_submit_invalid_contact_name(self, data):
+        await self._submit_invalid_field('name', self.fake.invalid_name())
+
+    async def e_submit_invalid_contact_email(self, data):
+        await self._submit_invalid_field('email', self.fake.invalid_email())
+
+    async def e_submit_invalid_contact_phone(self, data):
+        await self._submit_invalid_field('phone', self.fake.invalid_phone())
+
+    async def e_submit_invalid_contact_subject(self, data):
+        await self._submit_invalid_field('subject', self.fake.invalid_subject())
+
+    async def e_submit_invalid_contact_message(self, data):
+        await self._submit_invalid_field('description', self.fake.invalid_description())
+
+    async def e_click_admin_panel(self, data):
+        # the login form needs no data; once logged in, the panel opens on the rooms
+        if data.get('logged_in'):
+            await self.api.get_rooms()
+
+    async def e_admin_correct_login(self, data):
+        await self.api.login()
+        await self.api.get_rooms()
+
+    async def e_admin_click_inbox(self, data):
+        await self.api.get_messages()
+
+    async def e_admin_click_rooms(self, data):
+        await self.api.get_rooms()
+
+    async def e_click_last_message(self, data):
+        message = await self.api.find_message(data['last_contact_name'], data['last_contact_subject'],
+                                              unread_only=False)
+        if message is None:
+            raise AssertionError(f"message from {data['last_contact_name']} not found")
+        message_id = message['id']
+        await self.api.get_message(message_id)
+        await self.api.mark_message_read(message_id)
+
+    async def e_close_message_details(self, data):
+        await self.api.get_messages()
+
+    async def e_click_frontpage(self, data):
+        self.rooms = await self.api.get_rooms()
+
+    async def e_click_available_room(self, data):
+        if not self.rooms:
+            self.rooms = await self.api.get_rooms()
+        self.room = self.rng.choice(self.rooms)
+        await self.api.get_room_report(self.room['roomid'])
+
+    async def e_select_calendar_dates(self, data):
+        # dates spread over years, so that the bookings of concurrent users rarely overlap
+        self.checkin = date.today() + timedelta(days=self.rng.randrange(30, 3650))
+        self.checkout = self.checkin + timedelta(days=int(data.get('total_nights', 2)))
+
+    async def e_fill_booking_contact(self, data):
+        self.guest = {'firstname': self.fake.valid_first_name(), 'lastname': self.fake.valid_last_name(),
+                      'email': self.fake.valid_email(), 'phone': self.fake.valid_phone()}
+
+    async def e_confirm_booking(self, data):
+        try:
+            with expect_statuses(409):
+                await self.api.create_booking(room_id=self.room['roomid'], checkin=self.checkin,
+                                              checkout=self.checkout, **self.guest)
+        except requests.HTTPError as e:
+            # another user booked overlapping dates first, and the platform refused these as it should
+            if e.response.status_code != 409:
+                raise
+
+
+class LoadTest:
+    """Run ``users`` virtual users walking the models for ``duration`` seconds."""
+
+    def __init__(self, models, api, fake, users, duration, ramp_up=0, think_time=0, seed=None):
+        self.models = models
+        self.api = api
+        self.fake = fake
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.timings = Timings()
+        self.errors = Counter()
+        self.error_samples = {}
+        self.request_errors = Counter()
+        self._request_errors_lock = threading.Lock()
+        self.walks = 0
+        self.elapsed = 0
+
+    def count_request_error(self, response, *args, **kwargs):
+        """Response hook counting the error responses of every request, except those the user expected."""
+        if response.status_code >= 400 and response.status_code not in _expected_statuses.get():
+            with self._request_errors_lock:
+                self.request_errors[request_name(response)] += 1
+
+    def missing_edges(self):
+        """Edges of the models without requests defined in VirtualUser."""
+        names = {(model.name, edge.name) for model, _ in self.models for edge in model.edges.values() if edge.name}
+        return sorted(f'{model}.{name}' for model, name in names if not hasattr(VirtualUser, name))
+
+    async def _walk(self, user, machine, deadline):
+        """Walk until the stop conditions, a dead end or a failed edge; return the number of edges passed."""
+        loop = asyncio.get_running_loop()
+        edges = 0
+        while machine.has_next_step() and loop.time() < deadline:
+            try:
+                step = machine.get_next_step()
+            except MachineError:
+                if not edges:
+                    raise
+                # a dead end (e.g. a booking made): the user leaves
+                break
+            if step['type'] != 'edge' or not step['name']:
+                continue
+            name = f"{step['modelName']}.{step['name']}"
+            data = machine.get_data()
+            original = dict(data)
+            paced = [0.0]
+            _paced_seconds.set(paced)
+            start = time.perf_counter()
+            try:
+                await getattr(user, step['name'])(data)
+            except Exception as e:
+                self.timings.record('step', name, time.perf_counter() - start - paced[0])
+                self.errors[name] += 1
+                self.error_samples.setdefault(name, f'{type(e).__name__}: {e}')
+                # the user's state is unknown after a failed edge: start over
+                return edges
+            self.timings.record('step', name, time.perf_counter() - start - paced[0])
+            machine.set_data(data, original)
+            edges += 1
+            if self.think_time:
+                await asyncio.sleep(user.rng.uniform(0, 2 * self.think_time))
+        self.walks += 1
+        return edges
+
+    async def _run_user(self, index, start, deadline):
+        loop = asyncio.get_running_loop()
+        if self.users > 1:
+            await asyncio.sleep(max(0.0, start + self.ramp_up * index / self.users - loop.time()))
+        rng = random.Random(worker_seed(self.seed, index))
+        user = VirtualUser(self.api, self.fake, rng)
+        while loop.time() < deadline:
+            try:
+                await self._walk(user, Machine(self.models, seed=rng.randrange(2 ** 32)), deadline)
+            except (MachineError, ExpressionError) as e:
+                self.errors['walker'] += 1
+                self.error_samples.setdefault('walker', str(e))
+                return
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(self._run_user(index, start, start + self.duration) for index in range(self.users)))
+        self.elapsed = loop.time() - start
+
+    def results(self):
+        summary = self.timings.summary()
+
+        def rows(category, errors=None):
+            return {name: dict(stats, errors=(errors or {}).get(name, 0),
+                               per_second=round(stats['count'] / self.elapsed, 2) if self.elapsed else 0)
+                    for name, stats in summary[category].items()}
+
+        return {'users': self.users, 'duration': self.duration, 'ramp_up': self.ramp_up, 'seed': self.seed,
+                'elapsed_seconds': round(self.elapsed, 3), 'walks': self.walks,
+                'edges': rows('step', self.errors), 'requests': rows('api', self.request_errors),
+                'errors': dict(self.errors), 'error_samples': self.error_samples}
+
+
+def print_results(results, stream=sys.stdout):
+    print(f"{results['users']} users, {results['elapsed_seconds']:.1f}s, {results['walks']} walks completed, "
+          f"seed {results['seed']}", file=stream)
+    for title, rows in (('edge', results['edges']), ('request', results['requests'])):
+        print(f"\n{title:<52}{'count':>8}{'errors':>8}{'per s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}",
+              file=stream)
+        for name, row in sorted(rows.items(), key=lambda item: item[1]['count'], reverse=True):
+            print(f"{name:<52}{row['count']:>8}{row['errors']:>8}{row['per_second']:>9.2f}{row['p50']:>8.3f}"
+                  f"{row['p95']:>8.3f}{row['p99']:>8.3f}{row['max']:>8.3f}", file=stream)
+    for name, sample in results['error_samples'].items():
+        print(f"\n{results['errors'][name]} errors in {name}, e.g. {sample}", file=stream)
+
+
+def main(argv=None):
+    config = ConfigParser()
+    config.read('config.ini')
+    parser = argparse.ArgumentParser(prog='python -m tests.load', description=__doc__.splitlines()[0])
+    parser.add_argument('-m', '--model', nargs='+', action='append', required=True,
+                        help="model file and optionally its generator (default: the model's)")
+    parser.add_argument('--users', type=int, default=10, help="number of virtual users (default: 10)")
+    parser.add_argument('--duration', type=float, default=60, help="seconds, including the ramp-up (default: 60)")
+    parser.add_argument('--ramp-up', type=float, default=0, help="seconds over which the users are started")
+    parser.add_argument('--rate', type=float, help="target requests per second of all the users (default: no limit)")
+    parser.add_argument('--think-time', type=float, default=0, help="mean pause of a user between edges, in seconds")
+    parser.add_argument('--connections', type=int, help="threads and connections, i.e. requests in flight at most (default: one per user)")
+    parser.add_argument('--seed', type=int, help="run seed, from which every user's seed is derived")
+    parser.add_argument('--base-url', default=os.environ.get("BASE_URL", config.get('app', 'base_url')))
+    parser.add_argument('--fake-sut', action='store_true', help="run against the local stand-in, in this process")
+    parser.add_argument('-o', '--output', help="save the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        models, file_seed = load_model_options(args.model)
+    except (ModelError, OSError, ValueError) as e:
+        parser.error(str(e))
+    problems = check_models(models)
+    if problems:
+        # e.g. a model sharing no state with the others would never be walked
+        parser.error('; '.join(problems))
+    seed = args.seed if args.seed is not None else file_seed
+    fake = Faker()
+    fake.add_provider(MyContactProvider)
+    if seed is not None:
+        Faker.seed(seed)
+
+    fake_sut = None
+    base_url = args.base_url
+    if args.fake_sut:
+        from tests.fake_sut.server import FakeBooker
+
+        fake_sut = FakeBooker(port=0)
+        base_url = fake_sut.start()
+
+    connections = args.connections or args.users
+    # the entities created are recorded in batches, not with a file write per request
+    ledger = Ledger(config.get('app', 'booker_api_ledger', fallback='.booker_ledger.jsonl'), batch_size=500)
+    # no retries: a load test has to see the failures
+    booker_api = BookerAPI(base_url, config.get('app', 'booker_api_username'), config.get('app', 'booker_api_password'),
+                           pool_size=connections, max_retries=0,
+                           timeout=config.getfloat('app', 'booker_api_timeout', fallback=10), cache_ttl={'/room': 0},
+                           ledger=ledger)
+    api = PacedBookerAPI(booker_api, RateLimiter(args.rate), max_workers=connections)
+    load = LoadTest(models, api, fake, args.users, args.duration, args.ramp_up, args.think_time, seed)
+    missing = load.missing_edges()
+    if missing:
+        parser.error(f"no requests defined for {', '.join(missing)}")
+    instrument_booker_api(booker_api, timings=load.timings)
+    booker_api.add_response_hook(load.count_request_error)
+
+    print(f"Load on {base_url}: {args.users} users for {args.duration}s")
+    if connections < args.users:
+        print(f"At most {connections} requests in flight (--connections): the other users wait for a thread")
+    try:
+        asyncio.run(load.run())
+        # before the cleanup, whose requests are not part of the load
+        results = load.results()
+    finally:
+        api.close()
+        if config.getboolean('app', 'cleanup', fallback=True):
+            print("Deleted {} test entities, {} failed".format(*booker_api.delete_created()))
+        ledger.flush()
+        booker_api.close()
+        if fake_sut is not None:
+            fake_sut.stop()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+    return 1 if load.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
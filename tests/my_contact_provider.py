@@ -1,6 +1,10 @@
 from faker import Faker
 from faker.providers import BaseProvider
 
+# shared by the valid contacts of all runs, which is how tests/cleanup.py tells their messages apart
+VALID_SUBJECT = "doubt about bathroom"
+VALID_DESCRIPTION = "This is a sample doubt. I wonder if all rooms have a private bathroom?"
+
 
 class MyContactProvider(BaseProvider):
     # name_size > 0
@@ -8,6 +12,7 @@ class MyContactProvider(BaseProvider):
     # 11 <= phone_size <= 21
     # 5 <= subject_size <= 100
     # 20 <= message_size <= 2000
+    # 3 <= booking first_name_size, last_name_size <= 18
 
     def text_less_than_or_greater_than(self, min_chars=0, max_chars=0):
         if self.generator.pyint(max_value=1) > 0:
@@ -21,6 +26,19 @@ class MyContactProvider(BaseProvider):
     def invalid_name(self):
         return ''
 
+    def _name_of_size(self, name, min_chars, max_chars):
+        for _ in range(10):
+            value = name()
+            if min_chars <= len(value) <= max_chars:
+                break
+        return value[:max_chars].ljust(min_chars, 'x')
+
+    def valid_first_name(self):
+        return self._name_of_size(self.generator.first_name, 3, 18)
+
+    def valid_last_name(self):
+        return self._name_of_size(self.generator.last_name, 3, 18)
+
     def valid_email(self):
         return self.generator.email()
 
@@ -35,7 +53,7 @@ class MyContactProvider(BaseProvider):
         return self.random_number(digits=None, fix_len=False)
 
     def valid_subject(self):
-        subject = "doubt about bathroom"
+        subject = VALID_SUBJECT
         try_nr = 10
         while try_nr < 10:
             try_nr += 1
@@ -48,7 +66,7 @@ class MyContactProvider(BaseProvider):
         return self.text_less_than_or_greater_than(min_chars=5, max_chars=100)
 
     def valid_description(self):
-        description = "This is a sample doubt. I wonder if all rooms have a private bathroom?"
+        description = VALID_DESCRIPTION
         try_nr = 10
         while try_nr < 10:
             try_nr += 1
@@ -59,3 +77,38 @@ class MyContactProvider(BaseProvider):
 
     def invalid_description(self):
         return self.generator.pystr(min_chars=0, max_chars=19)
+
+    def invalid_contact_data(self):
+        """ a contact where at least one of the fields is invalid, chosen randomly """
+        invalid = False
+
+        if self.generator.pyint(max_value=1) > 0:
+            name = self.generator.invalid_name()
+        else:
+            name = self.generator.valid_name()
+            invalid = True
+
+        if self.generator.pyint(max_value=1) > 0:
+            email = self.generator.invalid_email()
+        else:
+            email = self.generator.valid_email()
+            invalid = True
+
+        if self.generator.pyint(max_value=1) > 0:
+            phone = self.generator.invalid_phone()
+        else:
+            phone = self.generator.valid_phone()
+            invalid = True
+
+        if self.generator.pyint(max_value=1) > 0:
+            subject = self.generator.invalid_subject()
+        else:
+            subject = self.generator.valid_subject()
+            invalid = True
+
+        if self.generator.pyint(max_value=1) > 0 or invalid:
+            description = self.generator.invalid_description()
+        else:
+            description = self.generator.valid_description()
+
+        return {'name': name, 'email': email, 'phone': phone, 'subject': subject, 'description': description}
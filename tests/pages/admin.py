@@ -1,11 +1,12 @@
-from pypom import Page
-from pypom import Region
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from tests.pages.scripts import click_if_texts, read_texts
+from tests.pages.waits import BasePage, BaseRegion
 
-class AdminPage(Page):
+
+class AdminPage(BasePage):
     """Interact with adminpage."""
 
     _rooms_menu_locator = (By.XPATH, '//a[@href="#/admin/"]')
@@ -21,10 +22,11 @@ class AdminPage(Page):
     VALID_ADMIN_PASSWORD = "password"
     
 
-    class Inbox(Region):
+    class Inbox(BaseRegion):
 
         _message_section_locator = (
         By.XPATH, '//div[@class="messages"]//div/p[contains(text(),"Subject")]')
+        _message_row_locator = (By.CSS_SELECTOR, '.messages .detail')
 
         _message_details_name_locator = (
             By.XPATH, '//div[@class="ReactModal__Content ReactModal__Content--after-open message-modal"]/div[@class="form-row"]/div[1]')
@@ -43,9 +45,18 @@ class AdminPage(Page):
         def is_message_section_open(self):
             return self.is_element_present(*self._message_section_locator)
 
-        @property
+        def message_details_snapshot(self):
+            """ texts of all fields of the opened message, read in one go """
+            self.find_element(*self._message_details_name_locator)
+            return read_texts(self.driver, {'name': self._message_details_name_locator,
+                                            'email': self._message_details_email_locator,
+                                            'phone': self._message_details_phone_locator,
+                                            'subject': self._message_details_subject_locator,
+                                            'description': self._message_details_description_locator})
+
         def contains_message(self, name="", email="", phone="", subject="", message=""):
-            return self.find_element(*self._message_details_name_locator).text == name and self.find_element(*self._message_details_name_locator).text == email and self.find_element(*self._message_details_phone_locator).text == phone and self.find_element(*self._message_details_subject_locator).text == subject and self.find_element(*self._message_details_description_locator).text == message
+            return self.message_details_snapshot() == {'name': name, 'email': email, 'phone': phone,
+                                                       'subject': subject, 'description': message}
 
         @property
         def message_detail_name(self):
@@ -67,14 +78,37 @@ class AdminPage(Page):
         def message_detail_description(self):
             return self.find_element(*self._message_details_description_locator).text
 
-        def find_and_open_unread_message(self, name="", subject=""):
-            self.driver.find_element_by_xpath(
+        def open_message(self, index, name, subject):
+            """ open the message of the inbox row at ``index``; False if that row isn't a message with this name and subject
+
+            The inbox renders the messages in the order the API lists them, as rows with the ids message0,
+            message1, ..., so the row is looked up by id; its name and subject are checked, since a message
+            deleted meanwhile shifts the rows after it """
+            if not self.is_element_present(*self._message_row_locator):
+                return False
+            return click_if_texts(self.driver, f'message{index}',
+                                  {f'message{index}': name, f'messageDescription{index}': subject})
+
+        def find_and_open_unread_message(self, name="", subject="", booker_api=None):
+            """ open the newest unread message with this name and subject; return how its row was found, 'id' or 'search'
+
+            If a BookerAPI is given, the message's position in the API listing gives the id of its row
+            (see open_message); otherwise, or if that row isn't the message, all the rows of the inbox
+            are searched by name and subject """
+            message = booker_api.find_message(name=name, subject=subject) if booker_api else None
+            if message and self.open_message(message['index'], name, subject):
+                return 'id'
+            if booker_api:
+                print(f"Message from {name} ({'row message%d' % message['index'] if message else 'not found through the API'}) "
+                      "not at its row, searching the inbox rows")
+            self.find_element(By.XPATH,
                 f'//div[@class="messages"]/div[contains(@class,"detail") and contains(@class,"read-false")]//p[contains(text(),"{name}")]/parent::div/following-sibling::div/p[contains(text(),"{subject}")]').click()
+            return 'search'
 
         def close_message_details(self):
             return self.find_element(*self._message_details_close_button_locator).click()
 
-    class Rooms(Region):
+    class Rooms(BaseRegion):
 
         _rooms_section_locator = (By.XPATH, '(//div[@class="row"])//div/p[contains(text(),"Room #")]')
 
@@ -109,6 +143,11 @@ class AdminPage(Page):
     def authenticate_with_valid_credentials(self):
         self.authenticate(username=self.VALID_ADMIN_USERNAME, password=self.VALID_ADMIN_PASSWORD)
 
+    def authenticate_with_token(self, token):
+        """ log in by injecting the auth cookie obtained from the API, instead of using the login form """
+        self.driver.add_cookie({'name': 'token', 'value': token, 'path': '/'})
+        self.driver.refresh()
+
     @property
     def is_login_form_available(self):
         return self.is_element_present(*self._login_username_locator) and self.is_element_present(*self._login_password_locator) and self.is_element_present(*self._login_submit_locator)
@@ -1,17 +1,25 @@
-from pypom import Page
-from pypom import Region
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver import ActionChains
 
+from tests.pages.scripts import change_route, page_state, read_values, set_values
+from tests.pages.waits import BasePage, BaseRegion, waits
+
 
-class FrontPage(Page):
+class FrontPage(BasePage):
     """Interact with frontpage."""
 
+    ROUTE = '#/'
+
     _admin_panel_locator = (By.LINK_TEXT, "Admin panel")
+    # the contact form's name field, rendered after the last change of route
+    _fresh_page_locator = (By.CSS_SELECTOR, '#name:not([data-stale-route])')
 
-    class ContactForm(Region):
+    class ContactForm(BaseRegion):
 
         _contact_form_name_locator = (By.ID, "name")
         _contact_form_email_locator = (By.ID, "email")
@@ -24,7 +32,19 @@ class FrontPage(Page):
         _contact_error_message_locator = (
             By.XPATH, '//div[@class="row contact"]//div[@class="alert alert-danger"]')
 
-        def fill_contact_data(self, name="", email="", phone="", subject="", description=""):
+        def fill_contact_data(self, name="", email="", phone="", subject="", description="", keystrokes=False):
+            """ fill and submit the form. Values are set at once by a script, unless keystrokes is True """
+
+            if not keystrokes:
+                self.find_element(*self._contact_form_name_locator)
+                set_values(self.driver, [(self._contact_form_name_locator, name),
+                                         (self._contact_form_email_locator, email),
+                                         (self._contact_form_phone_locator, phone),
+                                         (self._contact_form_subject_locator, subject),
+                                         (self._contact_form_description_locator, description)])
+                self.find_element(*self._contact_form_submit_locator).click()
+                return
+
             self.find_element(*self._contact_form_name_locator).clear()
             self.find_element(*self._contact_form_name_locator).send_keys(name)
             self.find_element(*self._contact_form_email_locator).clear()
@@ -41,6 +61,15 @@ class FrontPage(Page):
                 *self._contact_form_description_locator).send_keys(description)
             self.find_element(*self._contact_form_submit_locator).click()
 
+        def snapshot(self):
+            """ values of all form fields, read in one go """
+            self.find_element(*self._contact_form_name_locator)
+            return read_values(self.driver, {'name': self._contact_form_name_locator,
+                                             'email': self._contact_form_email_locator,
+                                             'phone': self._contact_form_phone_locator,
+                                             'subject': self._contact_form_subject_locator,
+                                             'description': self._contact_form_description_locator})
+
         @property
         def contact_feedback_message(self):
             return self.find_element(*self._contact_feedback_message_locator).text
@@ -53,7 +82,7 @@ class FrontPage(Page):
         def is_form_available(self):
             return self.is_element_present(*self._contact_form_name_locator) and self.is_element_present(*self._contact_form_email_locator) and self.is_element_present(*self._contact_form_phone_locator) and self.is_element_present(*self._contact_form_subject_locator) and self.is_element_present(*self._contact_form_description_locator) and self.is_element_present(*self._contact_form_submit_locator)
 
-    class Rooms(Region):
+    class Rooms(BaseRegion):
 
         _booking_calendar_locator = (
             By.XPATH, '//div[@class="rbc-calendar"]')
@@ -75,7 +104,17 @@ class FrontPage(Page):
         _available_rooms_locator = (
             By.XPATH, '//div[@class="row hotel-room-info"]')
 
-        def fill_booking_contact_data(self, first_name="", last_name="", email="", phone="", subject="", description=""):
+        def fill_booking_contact_data(self, first_name="", last_name="", email="", phone="", subject="", description="", keystrokes=False):
+            """ fill the booking contact. Values are set at once by a script, unless keystrokes is True """
+
+            if not keystrokes:
+                self.find_element(*self._booking_firstname_locator)
+                set_values(self.driver, [(self._booking_firstname_locator, first_name),
+                                         (self._booking_lastname_locator, last_name),
+                                         (self._booking_email_locator, email),
+                                         (self._booking_phone_locator, phone)])
+                return
+
             self.find_element(*self._booking_firstname_locator).clear()
             self.find_element(
                 *self._booking_firstname_locator).send_keys(first_name)
@@ -88,7 +127,7 @@ class FrontPage(Page):
             self.find_element(*self._booking_phone_locator).send_keys(phone)
 
         def click_book_room(self, room):
-            room.find_element(*self._booking_book_this_room_locator).click()
+            waits.until(room, self._booking_book_this_room_locator).click()
 
         def click_submit_booking(self):
             self.find_element(*self._booking_submit_locator).click()
@@ -99,9 +138,9 @@ class FrontPage(Page):
         def select_calendar_dates(self, start_day=1, end_day=1):
             """ select dates in calendar. Note: works only for days in current month """
 
-            src = self.driver.find_element_by_xpath(
+            src = self.find_element(By.XPATH,
                 f'(//div[contains(@class,"rbc-date-cell") and not(contains(@class,"rbc-off-range"))])[{start_day}]')
-            dst = self.driver.find_element_by_xpath(
+            dst = self.find_element(By.XPATH,
                 f'(//div[contains(@class,"rbc-date-cell") and not(contains(@class,"rbc-off-range"))])[{end_day}]')
             self.driver.execute_script("arguments[0].scrollIntoView();", src)
             action = ActionChains(self.driver)
@@ -123,9 +162,17 @@ class FrontPage(Page):
         def is_booking_contact_form_present(self):
             return self.is_element_present(*self._booking_firstname_locator) and self.is_element_present(*self._booking_lastname_locator) and self.is_element_present(*self._booking_email_locator) and self.is_element_present(*self._booking_phone_locator)
 
+        def booking_contact_snapshot(self):
+            """ values of all booking contact fields, read in one go """
+            self.find_element(*self._booking_firstname_locator)
+            return read_values(self.driver, {'firstname': self._booking_firstname_locator,
+                                             'lastname': self._booking_lastname_locator,
+                                             'email': self._booking_email_locator,
+                                             'phone': self._booking_phone_locator})
+
         @property
         def is_booking_contact_filled(self):
-            return self.find_element(*self._booking_firstname_locator).get_attribute('value') and self.find_element(*self._booking_lastname_locator).get_attribute('value') and self.find_element(*self._booking_email_locator).get_attribute('value') and self.find_element(*self._booking_phone_locator).get_attribute('value')
+            return all(self.booking_contact_snapshot().values())
 
         @property
         def booking_confirmed_message(self):
@@ -142,5 +189,37 @@ class FrontPage(Page):
     def rooms(self):
         return FrontPage.Rooms(self)
 
+    def needs_reload(self, state):
+        """Whether the page must be loaded from scratch instead of through the app's router."""
+        app_url, current_url = urlsplit(self.seed_url), urlsplit(state['url'])
+        return (current_url[:2] != app_url[:2] or current_url.path.rstrip('/') != app_url.path.rstrip('/')
+                or not state['ready'] or state['modal'])
+
+    def navigate(self, fresh=True):
+        """Go to the frontpage with a client-side route change, loading it only if needed.
+
+        The page is loaded from scratch if the browser is not on the app (e.g. a new
+        session), the document is still loading or a modal is open, and also, as a
+        fallback, if the app didn't react to the route change or it didn't render the
+        page. Unless ``fresh``, an already shown frontpage is kept as it is.
+        Returns how the frontpage was reached: 'none', 'soft', 'hard' or 'fallback'.
+        """
+        try:
+            state = page_state(self.driver)
+        except WebDriverException:
+            # e.g. an alert is open
+            state = None
+        if state is None or self.needs_reload(state):
+            self.open()
+            return 'hard'
+        if not fresh and state['route'] == self.ROUTE:
+            return 'none'
+
+        # no reaction at all: load the page right away instead of waiting for it to render
+        if not change_route(self.driver, self.ROUTE) or not self.is_element_present(*self._fresh_page_locator):
+            self.open()
+            return 'fallback'
+        return 'soft'
+
     def click_admin_panel(self):
         self.find_element(*self._admin_panel_locator).click()
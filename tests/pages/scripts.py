@@ -0,0 +1,143 @@
+from selenium.common.exceptions import NoSuchElementException
+
+
+# resolves a (By.*, value) locator in the page, like find_element does
+_FIND_ELEMENT_JS = """
+function findElement(by, value) {
+    switch (by) {
+        case 'id':
+            return document.getElementById(value);
+        case 'name':
+            return document.getElementsByName(value)[0] || null;
+        case 'css selector':
+            return document.querySelector(value);
+        case 'link text':
+            return Array.from(document.links).find(link => link.innerText.trim() === value) || null;
+        case 'xpath':
+            return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    throw new Error('unsupported locator strategy: ' + by);
+}
+"""
+
+# sets the values through the native setter and fires the events React listens to,
+# so that the component state is updated as if the user had typed them
+_SET_VALUES_JS = _FIND_ELEMENT_JS + """
+const missing = [];
+for (const [by, value, text] of arguments[0]) {
+    const element = findElement(by, value);
+    if (!element) {
+        missing.push(by + '=' + value);
+        continue;
+    }
+    const prototype = Object.getPrototypeOf(element);
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, text);
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return missing;
+"""
+
+# reads the rendered text (or the value) of several elements, null for missing ones
+_READ_FIELDS_JS = _FIND_ELEMENT_JS + """
+const result = {};
+for (const [key, by, value] of arguments[0]) {
+    const element = findElement(by, value);
+    result[key] = element ? (arguments[1] ? element.value : element.innerText.trim()) : null;
+}
+return result;
+"""
+
+# clicks the first cell of the element with an id, if its cells (by data-testid) have the expected texts;
+# only the element's own cells are searched, so the lookup doesn't grow with the page
+_CLICK_IF_TEXTS_JS = """
+const [id, expected] = arguments;
+const element = document.getElementById(id);
+if (!element) return false;
+const cells = Object.entries(expected).map(([testid, text]) => [element.querySelector(`[data-testid="${testid}"]`), text]);
+if (cells.some(([cell, text]) => !cell || cell.innerText.trim() !== text)) return false;
+cells[0][0].click();
+return true;
+"""
+
+# what decides whether the app can be navigated in place: where the browser is, whether the
+# document finished loading and whether a modal dialog (which outlives route changes) is open
+_PAGE_STATE_JS = """
+return {
+    url: location.origin + location.pathname,
+    route: location.hash || '#/',
+    ready: document.readyState === 'complete',
+    modal: document.querySelector('.ReactModal__Overlay') !== null,
+};
+"""
+
+# a client-side route change; elements with an id are marked as stale first, so the render of
+# the new route can be told apart from what was there before. Calls back with whether the app
+# reacted, i.e. added or removed elements with an id, within the given milliseconds
+_CHANGE_ROUTE_JS = """
+const [route, timeout, done] = arguments;
+document.querySelectorAll('[id]').forEach(element => element.setAttribute('data-stale-route', ''));
+const hasId = node => node.nodeType === Node.ELEMENT_NODE && (node.id || node.querySelector('[id]'));
+const observer = new MutationObserver(records => {
+    if (records.some(record => [...record.addedNodes, ...record.removedNodes].some(hasId))) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeout);
+observer.observe(document.body, {childList: true, subtree: true});
+if ((location.hash || '#/') === route) {
+    // the router only re-mounts a page on a change of route: leave it for a route that renders nothing first
+    history.replaceState(null, '', '#/soft-navigation');
+    window.dispatchEvent(new HashChangeEvent('hashchange'));
+}
+location.hash = route;
+"""
+
+
+def set_values(driver, fields):
+    """Set the value of several fields with a single script execution.
+
+    ``fields`` is a list of ``(locator, value)`` pairs, where locator is a ``(By.*, value)`` tuple.
+    """
+    missing = driver.execute_script(
+        _SET_VALUES_JS, [[by, value, str(text)] for (by, value), text in fields])
+    if missing:
+        raise NoSuchElementException(f"Unable to locate: {', '.join(missing)}")
+
+
+def read_texts(driver, locators):
+    """Return the text of several elements with a single script execution.
+
+    ``locators`` maps a key to a ``(By.*, value)`` locator; missing elements read as None.
+    """
+    return driver.execute_script(_READ_FIELDS_JS, [[key, by, value] for key, (by, value) in locators.items()], False)
+
+
+def read_values(driver, locators):
+    """Like read_texts, but for the value of form fields."""
+    return driver.execute_script(_READ_FIELDS_JS, [[key, by, value] for key, (by, value) in locators.items()], True)
+
+
+def click_if_texts(driver, element_id, expected):
+    """Click the element with this id, through its first cell, if its cells have the expected texts.
+
+    ``expected`` maps the data-testid of a cell of the element to its text. Returns
+    whether it clicked, in a single script execution.
+    """
+    return driver.execute_script(_CLICK_IF_TEXTS_JS, element_id, expected)
+
+
+def page_state(driver):
+    """Return the URL (without route), the hash route, and whether the document is ready and a modal is open."""
+    return driver.execute_script(_PAGE_STATE_JS)
+
+
+def change_route(driver, route, timeout=0.5):
+    """Navigate to a hash route of the app in place, re-mounting the page even if it's the current route.
+
+    Elements rendered before the change are marked with a ``data-stale-route`` attribute.
+    Returns False if the app didn't react to the change within ``timeout`` seconds.
+    """
+    return driver.execute_async_script(_CHANGE_ROUTE_JS, route, timeout * 1000)
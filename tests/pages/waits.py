@@ -0,0 +1,136 @@
+import threading
+import time
+
+from pypom import Page
+from pypom import Region
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+def _present(locator):
+    return lambda context: context.find_element(*locator)
+
+
+def _all_present(locator):
+    return lambda context: context.find_elements(*locator) or False
+
+
+CONDITIONS = {
+    'present': _present,
+    'all_present': _all_present,
+    'visible': EC.visibility_of_element_located,
+    'clickable': EC.element_to_be_clickable,
+}
+
+
+class Waits:
+    """Explicit, per locator waits replacing the driver's implicit wait.
+
+    Each condition has its own timeout; ``presence_check`` is the one used by
+    the ``is_*_present`` style checks, which fail fast instead of waiting the full
+    timeout of a lookup when an element is (correctly) absent. The time spent
+    waiting is accumulated per locator, see ``statistics()``.
+    """
+
+    DEFAULT_TIMEOUTS = {
+        'present': 15,
+        'all_present': 15,
+        'visible': 15,
+        'clickable': 15,
+        'presence_check': 3,
+    }
+
+    def __init__(self, timeouts=None, poll_interval=0.1):
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.poll_interval = poll_interval
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, timeouts=None, poll_interval=None):
+        self.timeouts.update(timeouts or {})
+        if poll_interval is not None:
+            self.poll_interval = poll_interval
+
+    def _record(self, locator, condition, elapsed, timed_out):
+        key = (f'{locator[0]}={locator[1]}', condition)
+        with self._lock:
+            stats = self._stats.setdefault(key, {'waits': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'timeouts': 0})
+            stats['waits'] += 1
+            stats['seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            stats['timeouts'] += timed_out
+
+    def until(self, context, locator, condition='present', timeout=None):
+        """Wait for a condition on a locator, searching within ``context`` (driver or element)."""
+        timeout = self.timeouts[condition] if timeout is None else timeout
+        start = time.monotonic()
+        timed_out = False
+        try:
+            return WebDriverWait(context, timeout, poll_frequency=self.poll_interval,
+                                 ignored_exceptions=(NoSuchElementException,)).until(CONDITIONS[condition](locator))
+        except TimeoutException:
+            timed_out = True
+            raise NoSuchElementException(f"{condition} {locator} not met after {timeout}s")
+        finally:
+            self._record(locator, condition, time.monotonic() - start, timed_out)
+
+    def is_present(self, context, locator, timeout=None):
+        """Fast-fail presence check: look once, then poll only for the ``presence_check`` timeout."""
+        timeout = self.timeouts['presence_check'] if timeout is None else timeout
+        start = time.monotonic()
+        while True:
+            if context.find_elements(*locator):
+                self._record(locator, 'presence_check', time.monotonic() - start, False)
+                return True
+            if time.monotonic() - start >= timeout:
+                self._record(locator, 'presence_check', time.monotonic() - start, True)
+                return False
+            time.sleep(self.poll_interval)
+
+    def statistics(self):
+        """Wait time per locator and condition, the most expensive first."""
+        with self._lock:
+            rows = [dict(stats, locator=locator, condition=condition)
+                    for (locator, condition), stats in self._stats.items()]
+        return sorted(rows, key=lambda row: row['seconds'], reverse=True)
+
+    def print_statistics(self, top=10):
+        print("Wait time per locator (top {}):".format(top))
+        for row in self.statistics()[:top]:
+            print("  {seconds:.2f}s (max {max_seconds:.2f}s) in {waits} waits, {timeouts} timeouts: {condition} {locator}".format(**row))
+
+    def reset_statistics(self):
+        with self._lock:
+            self._stats = {}
+
+
+# shared by all page objects; tune it with waits.configure(...)
+waits = Waits()
+
+
+class WaitingMixin:
+    """Make pypom's element lookups use the explicit waits instead of the implicit one."""
+
+    def _search_context(self):
+        return getattr(self, 'root', None) or self.driver
+
+    def find_element(self, strategy, locator):
+        return waits.until(self._search_context(), (strategy, locator))
+
+    def find_elements(self, strategy, locator):
+        try:
+            return waits.until(self._search_context(), (strategy, locator), 'all_present')
+        except NoSuchElementException:
+            return []
+
+    def is_element_present(self, strategy, locator):
+        return waits.is_present(self._search_context(), (strategy, locator))
+
+
+class BasePage(WaitingMixin, Page):
+    pass
+
+
+class BaseRegion(WaitingMixin, Region):
+    pass
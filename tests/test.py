@@ -1,9 +1,13 @@
 import unittest
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
 
 from tests.pages.front import FrontPage
 from tests.pages.admin import AdminPage
+from tests.pages.scripts import page_state
+from tests.pages.waits import waits
+from tests.timing import instrument_booker_api, timings
+from tests.driver_factory import create_firefox
+from tests.driver_pool import SessionRecycler
+from tests.artifacts import ArtifactWriter
 from tests.my_contact_provider import MyContactProvider
 
 import sys
@@ -11,11 +15,15 @@ import os
 import time
 import pdb
 import json
+from collections import Counter
 from datetime import date, datetime, timedelta
 from configparser import ConfigParser
 from faker import Faker
+from selenium.common.exceptions import WebDriverException
 from tests.my_contact_provider import MyContactProvider
 from tests.booker_api import BookerAPI
+from tests.cleanup import Ledger
+from tests.data_pool import PooledContactProvider, load_shard
 
 
 def setUpRun():
@@ -23,56 +31,115 @@ def setUpRun():
 
     global driver
     global booker_api
+    global recycler
 
-    options = Options()
-    if HEADLESS:
-        options.add_argument('-headless')
-
-    print("Create a new Firefox session")
-    driver = webdriver.Firefox(options=options)
-
-    print("Set implicitly wait")
-    driver.implicitly_wait(15)
+    print(f"Create a new Firefox session ({BROWSER_PROFILE} profile)")
+    driver = new_driver()
     print("Window size: {width}x{height}".format(**driver.get_window_size()))
+    if RECYCLE_MEMORY_MB or RECYCLE_LATENCY_DRIFT:
+        recycler = SessionRecycler(new_driver, max_memory_mb=RECYCLE_MEMORY_MB or None,
+                                   max_latency_drift=RECYCLE_LATENCY_DRIFT or None)
 
     booker_api = BookerAPI(
-        base_url=BASE_URL, username=BOOKER_API_USERNAME, password=BOOKER_API_PASSWORD)
+        base_url=BASE_URL, username=BOOKER_API_USERNAME, password=BOOKER_API_PASSWORD,
+        pool_size=BOOKER_API_POOL_SIZE, max_retries=BOOKER_API_MAX_RETRIES, timeout=BOOKER_API_TIMEOUT,
+        cache_ttl={'/room': BOOKER_API_ROOMS_CACHE_TTL}, ledger=Ledger(BOOKER_API_LEDGER))
+    instrument_booker_api(booker_api)
 
 
 def tearDownRun():
-    """Close the webdriver."""
+    """Close the webdriver and the API session."""
 
     global driver
-    screenshot_filename = "result_{}.png".format(
-        time.strftime("%Y%m%d-%H%M%S"))
-    screenshots_dir = "screenshots"
-    screenshot_path = "{}/{}".format(screenshots_dir, screenshot_filename)
-    print("Saving screenshot: %s" % screenshot_path)
-    if not os.path.exists(screenshots_dir):
-        os.mkdir(screenshots_dir)
-    driver.save_screenshot(screenshot_path)
+    global booker_api
+
+    # screenshots are only taken of failed steps, see afterStep()
+    artifacts.close()
+    waits.print_statistics()
+    timings.print_summary()
+    print("Frontpage navigations: {hard} loads, {soft} route changes, {none} already there, "
+          "{fallback} loads after a failed route change".format(**navigations))
+    print("Inbox messages opened: {id} by row id, {search} by searching the rows".format(**message_lookups))
+    if recycler is not None:
+        print("Firefox sessions recycled: {memory} for memory, {latency} for latency".format(**recycler.recycles))
+    if TIMINGS_DIR:
+        os.makedirs(TIMINGS_DIR, exist_ok=True)
+        timings_path = os.path.join(TIMINGS_DIR, "timings-{}".format(os.environ.get("WALKER_WORKER", os.getpid())))
+        print("Saving timings: {0}.json, {0}.prom".format(timings_path))
+        timings.export_json(timings_path + ".json")
+        timings.export_prometheus(timings_path + ".prom")
 
     print("Close the Firefox session")
     driver.quit()
 
+    if CLEANUP:
+        print("Deleted {} test entities, {} failed".format(*booker_api.delete_created()))
+    booker_api.close()
+
+
+def restartRun():
+    """Replace the Firefox session after a failed step, before the walker recovers from it (see --recover)."""
+
+    global driver
+
+    print("Replace the Firefox session")
+    try:
+        driver.quit()
+    except WebDriverException:
+        # the session may be what failed in the first place
+        pass
+    driver = new_driver()
+    if recycler is not None:
+        recycler.reset()
+
+
+def new_driver():
+    return create_firefox(headless=HEADLESS, profile=BROWSER_PROFILE, blocked_urls=BLOCKED_URLS)
+
+
+def beforeStep(data, step):
+    global step_start
+    step_start = time.perf_counter()
+
+
+def afterStep(data, step):
+    global driver
+
+    step_name = "{}.{}".format(step.get('modelName'), step.get('name'))
+    seconds = time.perf_counter() - step_start
+    timings.record('step', step_name, seconds)
+    if step.get('status') is False and driver is not None:
+        print("Saving screenshot and page source: {}".format(artifacts.capture(driver, step_name)))
+    elif recycler is not None and step.get('status'):
+        recycler.record(step_name, seconds)
+        # only in a vertex, whose state is the page the next edge starts from, and not
+        # with a modal open, since only the URL, cookies and storage are carried over
+        if step.get('type') == 'vertex':
+            reason = recycler.check(driver)
+            if reason and not page_state(driver)['modal']:
+                print(f"Recycle the Firefox session ({reason}), keeping its URL, cookies and storage")
+                driver = recycler.recycle(driver, reason)
+
 
 class BaseModel(unittest.TestCase):
     """Contains common methods for all models."""
 
     def setUpModel(self):
-        global driver
         global booker_api
         
         print("Set up for: {}".format(type(self).__name__))
-        self.driver = driver
         self.booker_api = booker_api
         
         self.name = None
         self.subject = None
 
+    @property
+    def driver(self):
+        # the module's session, which restartRun() and the recycler replace during a walk
+        return driver
+
     def e_load_frontpage(self):
-        page = FrontPage(self.driver, BASE_URL)
-        page.open()
+        self.load_frontpage()
 
     def e_submit_valid_contact_data(self, data):
         page = FrontPage(self.driver, BASE_URL)
@@ -94,8 +161,17 @@ class BaseModel(unittest.TestCase):
         data['global.last_contact_subject'] = subject
         data['global.last_contact_description'] = description
 
+        global last_contact_via_api
+        last_contact_via_api = self.uses_api_shortcut('e_submit_valid_contact_data')
+        if last_contact_via_api:
+            # setup only: create the message directly, the contact form is not under test here
+            self.booker_api.create_message(
+                name=name, email=email, phone=phone, subject=subject, description=description)
+            return
+
         page.contact_form.fill_contact_data(
             name=name, email=email, phone=phone, subject=subject, description=description)
+        self.booker_api.track_created('message', name=name, subject=subject)
 
     def v_contact_successful(self, data):
         page = FrontPage(self.driver, BASE_URL)
@@ -106,6 +182,9 @@ class BaseModel(unittest.TestCase):
 
         name = data['last_contact_name']
         subject = data['last_contact_subject']
+        if last_contact_via_api:
+            # the message was created through the API, so there's no feedback on the page
+            return
         self.assertEqual(page.contact_form.contact_feedback_message,
                          f"Thanks for getting in touch {name}!\nWe'll get back to you about\n{subject}\nas soon as possible.")
 
@@ -122,53 +201,34 @@ class BaseModel(unittest.TestCase):
     def v_start(self):
         pass
 
+    def uses_api_shortcut(self, edge_name):
+        """Whether an edge is configured to set up its state through the API instead of the UI.
 
-class ContactForm(BaseModel):
+        Shortcuts are given as edge names, or as Model.edge names to apply them to a single model.
+        """
+        return edge_name in API_SHORTCUTS or f'{type(self).__name__}.{edge_name}' in API_SHORTCUTS
 
-    def e_submit_invalid_contact_data(self):
+    def load_frontpage(self, fresh=True):
+        """Go to the frontpage through the app's router if possible (see FrontPage.navigate), else load it."""
         page = FrontPage(self.driver, BASE_URL)
-        page.contact_form.wait_for_region_to_load()
-
-        name = ""
-        email = ""
-        phone = ""
-        subject = ""
-        description = ""
-        invalid = False
-
-        # randomly generate invalid contact fields (at least one of them)
-
-        if fake.pyint(max_value=1) > 0:
-            name = fake.invalid_name()
+        if SOFT_NAVIGATION:
+            navigations[page.navigate(fresh=fresh)] += 1
         else:
-            name = fake.valid_name()
-            invalid = True
+            page.open()
+            navigations['hard'] += 1
+        return page
 
-        if fake.pyint(max_value=1) > 0:
-            email = fake.invalid_email()
-        else:
-            email = fake.valid_email()
-            invalid = True
 
-        if fake.pyint(max_value=1) > 0:
-            phone = fake.invalid_phone()
-        else:
-            phone = fake.valid_phone()
-            invalid = True
+class ContactForm(BaseModel):
 
-        if fake.pyint(max_value=1) > 0:
-            subject = fake.invalid_subject()
-        else:
-            subject = fake.valid_subject()
-            invalid = True
+    def e_submit_invalid_contact_data(self):
+        page = FrontPage(self.driver, BASE_URL)
+        page.contact_form.wait_for_region_to_load()
 
-        if fake.pyint(max_value=1) > 0 or invalid:
-            description = fake.invalid_description()
-        else:
-            description = fake.valid_description()
+        # randomly generate invalid contact fields (at least one of them)
+        contact = fake.invalid_contact_data()
 
-        page.contact_form.fill_contact_data(
-            name=name, email=email, phone=phone, subject=subject, description=description)
+        page.contact_form.fill_contact_data(**contact)
 
 
 class ContactFormDetailed(BaseModel):
@@ -229,13 +289,18 @@ class MessageBackoffice(BaseModel):
 
     def e_admin_correct_login(self):
         page = AdminPage(self.driver)
+        if self.uses_api_shortcut('e_admin_correct_login'):
+            page.authenticate_with_token(self.booker_api.token or self.booker_api.login(
+                AdminPage.VALID_ADMIN_USERNAME, AdminPage.VALID_ADMIN_PASSWORD))
+            return
         page.authenticate_with_valid_credentials()
 
     def e_click_last_message(self, data):
         page = AdminPage(self.driver)
         name = data['last_contact_name']
         subject = data['last_contact_subject']
-        page.inbox.find_and_open_unread_message(name=name, subject=subject)
+        message_lookups[page.inbox.find_and_open_unread_message(
+            name=name, subject=subject, booker_api=self.booker_api)] += 1
 
     def e_close_message_details(self):
         page = AdminPage(self.driver)
@@ -263,23 +328,24 @@ class MessageBackoffice(BaseModel):
         phone = data['last_contact_phone']
         subject = data['last_contact_subject']
         description = data['last_contact_description']
-        self.assertEqual(page.inbox.message_detail_name,
+        details = page.inbox.message_details_snapshot()
+        self.assertEqual(details['name'],
                          f"From: {name}", "message's name doesnt match")
-        self.assertEqual(page.inbox.message_detail_email,
+        self.assertEqual(details['email'],
                          f"Email: {email}", "message's email doesnt match")
-        self.assertEqual(page.inbox.message_detail_phone,
+        self.assertEqual(details['phone'],
                          f"Phone: {phone}", "message's phone doesnt match")
-        self.assertEqual(page.inbox.message_detail_subject, subject,
+        self.assertEqual(details['subject'], subject,
                          "message's subject doesnt match")
-        self.assertEqual(page.inbox.message_detail_description,
+        self.assertEqual(details['description'],
                          description, "message's description doesnt match")
 
 
 class NewBooking1(BaseModel):
 
     def e_click_available_room(self):
-        page = FrontPage(self.driver, BASE_URL)
-        page.open()
+        # usually right after e_load_frontpage, so there's no need to load it again
+        page = self.load_frontpage(fresh=False)
 
         # click on first room
         room = page.rooms.available_rooms()[0]
@@ -337,35 +403,78 @@ class NewBooking1(BaseModel):
     def v_room_booked(self):
         page = FrontPage(self.driver, BASE_URL)
         # check confirmation message and stored booking on system
-        last_booking = self.booker_api.get_bookings()[-1]
         start_date_str = self.start_date.isoformat()
         end_date_str = self.end_date.isoformat()
         self.assertEqual(page.rooms.booking_confirmed_message,
                          f"Booking Successful!\nCongratulations! Your booking has been confirmed for:\n{start_date_str} - {end_date_str}\nClose")
-        self.assertTrue(last_booking['firstname'] == self.first_name and last_booking['lastname'] == self.last_name and last_booking['bookingdates']['checkin']
-                        == start_date_str and last_booking['bookingdates']['checkout'] == end_date_str, f"booking not found (last_booking={last_booking}")
+        room_id = self.booker_api.get_rooms()[0]['roomid']
+        booking = self.booker_api.find_booking(room_id=room_id, firstname=self.first_name, lastname=self.last_name,
+                                               checkin=start_date_str, checkout=end_date_str)
+        self.assertIsNotNone(booking, f"booking not found (room={room_id}, guest={self.first_name} {self.last_name}, dates={start_date_str} - {end_date_str})")
+        self.booker_api.track_created('booking', booking['bookingid'])
 
 #########
 
 
-HEADLESS = False
 driver = None
+recycler = None
+# how the frontpage was reached: 'hard' (loaded), 'soft' (route change), 'none' (already shown)
+# or 'fallback' (loaded after a route change the app didn't react to or render)
+navigations = Counter(hard=0, soft=0, none=0, fallback=0)
+# how inbox messages were opened: 'id' (row located by id, from the listing index) or 'search' (rows searched by name and subject)
+message_lookups = Counter(id=0, search=0)
+last_contact_via_api = False
+step_start = None
 
 config = ConfigParser()
 config.read('config.ini')
 BASE_URL = os.environ.get("BASE_URL", config.get('app', 'base_url'))
 BOOKER_API_USERNAME = config.get('app', 'booker_api_username')
 BOOKER_API_PASSWORD = config.get('app', 'booker_api_password')
+BOOKER_API_POOL_SIZE = config.getint('app', 'booker_api_pool_size', fallback=10)
+BOOKER_API_MAX_RETRIES = config.getint('app', 'booker_api_max_retries', fallback=3)
+BOOKER_API_TIMEOUT = config.getfloat('app', 'booker_api_timeout', fallback=10)
+BOOKER_API_ROOMS_CACHE_TTL = config.getfloat('app', 'booker_api_rooms_cache_ttl', fallback=300)
+BOOKER_API_LEDGER = config.get('app', 'booker_api_ledger', fallback='.booker_ledger.jsonl')
+CLEANUP = config.getboolean('app', 'cleanup', fallback=True)
+SOFT_NAVIGATION = config.getboolean('browser', 'soft_navigation', fallback=True)
+RECYCLE_MEMORY_MB = config.getint('browser', 'recycle_memory_mb', fallback=0)
+RECYCLE_LATENCY_DRIFT = config.getfloat('browser', 'recycle_latency_drift', fallback=0)
+if "HEADLESS" in os.environ:
+    config.set('browser', 'headless', os.environ["HEADLESS"])
+HEADLESS = config.getboolean('browser', 'headless', fallback=False)
+BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE", config.get('browser', 'profile', fallback='lean'))
+# URL patterns blocked by the lean profile; empty for the defaults of tests/driver_factory.py
+BLOCKED_URLS = [pattern.strip() for pattern in config.get('browser', 'blocked_urls', fallback='').split(',')
+                if pattern.strip()] or None
+# edges whose state is set up through the API, e.g. "e_submit_valid_contact_data, e_admin_correct_login"
+API_SHORTCUTS = {name.strip() for name in os.environ.get(
+    "API_SHORTCUTS", config.get('other', 'api_shortcuts', fallback='')).split(',') if name.strip()}
+# where the step/command/API timings are exported at the end of the run; empty to disable
+TIMINGS_DIR = os.environ.get("TIMINGS_DIR", config.get('timing', 'output_dir', fallback='timings'))
+ARTIFACTS_DIR = config.get('artifacts', 'directory', fallback='screenshots')
+ARTIFACTS_MAX_FILES = config.getint('artifacts', 'max_files', fallback=50)
+artifacts = ArtifactWriter(ARTIFACTS_DIR, max_files=ARTIFACTS_MAX_FILES)
+WAIT_TIMEOUT = config.getfloat('waits', 'timeout', fallback=15)
+WAIT_PRESENCE_CHECK_TIMEOUT = config.getfloat('waits', 'presence_check_timeout', fallback=3)
+WAIT_POLL_INTERVAL = config.getfloat('waits', 'poll_interval', fallback=0.1)
+waits.configure(timeouts={'present': WAIT_TIMEOUT, 'all_present': WAIT_TIMEOUT, 'visible': WAIT_TIMEOUT,
+                          'clickable': WAIT_TIMEOUT, 'presence_check': WAIT_PRESENCE_CHECK_TIMEOUT},
+                poll_interval=WAIT_POLL_INTERVAL)
 
 debugger = pdb.Pdb(skip=['altwalker.*'], stdout=sys.stdout)
 
 fake = Faker()
 fake.add_provider(MyContactProvider)
+# optionally take the contacts from a pre-generated data pool (see tests/data_pool.py), one shard per worker
+DATA_POOL = os.environ.get("DATA_POOL", config.get('other', 'data_pool', fallback=''))
+if DATA_POOL:
+    fake.add_provider(PooledContactProvider(fake, load_shard(DATA_POOL, os.environ.get("WALKER_WORKER", 0))))
 # Enforce a specific seed; there are currently some limitations in both AltWalker and GraphWalker though
 # seed works in GW 4.3 but AltWaker doesn't have a way to enforce it or obtain it
 with open('models/contact_form.json') as f:
     models_data = json.load(f)
-seed = models_data["seed"] or os.environ.get(
-    "SEED", config.getint('other', 'seed'))
+seed = os.environ.get("SEED") or models_data["seed"] or config.getint(
+    'other', 'seed')
 print(f'seed: {seed}')
 Faker.seed(int(seed))
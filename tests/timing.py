@@ -0,0 +1,149 @@
+"""Timing of the model steps, the WebDriver commands and the API calls.
+
+Durations are aggregated in fixed, logarithmic bucket histograms, so memory does
+not grow with the number of steps and percentiles (p50/p95/p99) can be estimated
+at any point, interpolated within a bucket. The results can be exported as JSON or in the Prometheus text format.
+"""
+
+import bisect
+import contextlib
+import json
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+# upper bounds, in seconds, from 1ms to ~2min growing by 2^(1/4) (~19%); anything slower goes to +Inf
+BUCKETS = tuple(round(0.001 * 2 ** (i / 4), 6) for i in range(69))
+
+METRICS = {
+    'step': ('mbt_step_duration_seconds', 'step', 'Duration of the model steps'),
+    'webdriver': ('mbt_webdriver_command_duration_seconds', 'command', 'Duration of the WebDriver commands'),
+    'api': ('mbt_api_request_duration_seconds', 'request', 'Duration of the Booker API requests'),
+}
+
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Estimated p-th percentile, interpolated linearly within the bucket it falls in.
+
+        The bucket's bounds are narrowed to the min and max seen, so e.g. a single
+        duration is returned exactly.
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = max(BUCKETS[i - 1] if i else 0.0, self.min)
+                upper = min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+                return round(lower + (upper - lower) * max(rank - cumulative, 0) / count, 6)
+            cumulative += count
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6),
+                'p50': self.percentile(50), 'p95': self.percentile(95), 'p99': self.percentile(99)}
+
+
+class Timings:
+    """Histograms per category ('step', 'webdriver', 'api') and name."""
+
+    def __init__(self):
+        self._histograms = {category: {} for category in METRICS}
+        self._lock = threading.Lock()
+
+    def record(self, category, name, seconds):
+        with self._lock:
+            histogram = self._histograms[category].get(name)
+            if histogram is None:
+                histogram = self._histograms[category][name] = Histogram()
+            histogram.record(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, category, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, time.perf_counter() - start)
+
+    def summary(self):
+        with self._lock:
+            return {category: {name: histogram.to_dict() for name, histogram in sorted(histograms.items())}
+                    for category, histograms in self._histograms.items()}
+
+    def print_summary(self, category='step', top=10):
+        rows = sorted(self.summary()[category].items(), key=lambda item: item[1]['sum'], reverse=True)
+        print(f"Slowest by total time, {category} (top {top}):")
+        for name, stats in rows[:top]:
+            print("  {sum:.2f}s in {count}, p50 {p50:.3f}s, p95 {p95:.3f}s, p99 {p99:.3f}s: {name}".format(name=name, **stats))
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_prometheus(self, path):
+        lines = []
+        with self._lock:
+            for category, (metric, label, description) in METRICS.items():
+                lines += [f'# HELP {metric} {description}.', f'# TYPE {metric} histogram']
+                for name, histogram in sorted(self._histograms[category].items()):
+                    value = name.replace('\\', '\\\\').replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {category: {} for category in METRICS}
+
+
+# shared by the test code; see instrument_driver() and instrument_booker_api()
+timings = Timings()
+
+
+def instrument_driver(driver, timings=timings):
+    """Time every command the driver sends (findElement, executeScript, get, ...)."""
+    execute = driver.execute
+
+    def timed_execute(driver_command, params=None):
+        with timings.timer('webdriver', driver_command):
+            return execute(driver_command, params)
+
+    driver.execute = timed_execute
+    return driver
+
+
+def request_name(response):
+    # group /message/12 and /message/13 together
+    path = re.sub(r'/\d+', '/{id}', urlsplit(response.request.url).path.rstrip('/')) or '/'
+    return f'{response.request.method} {path}'
+
+
+def instrument_booker_api(booker_api, timings=timings):
+    """Time every request made by a BookerAPI (time until the response headers are received)."""
+    booker_api.add_response_hook(
+        lambda response, *args, **kwargs: timings.record('api', request_name(response), response.elapsed.total_seconds()))
+    return booker_api
@@ -0,0 +1,70 @@
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tests.pages.admin import AdminPage
+
+BASE_URL = 'https://sut.example'
+
+
+class StubDriver(WebDriver):
+    """Just enough of a WebDriver for Inbox.find_and_open_unread_message(), without a browser."""
+
+    def __init__(self, rows):
+        # the (name, subject) of the rendered inbox rows, in order
+        self.rows = rows
+        self.clicked = []
+        self.searched = []
+
+    def execute_script(self, script, element_id, expected):
+        index = int(element_id[len('message'):])
+        if index < len(self.rows) and self.rows[index] == (expected[element_id], expected[f'messageDescription{index}']):
+            self.clicked.append(element_id)
+            return True
+        return False
+
+    def find_elements(self, by, value):
+        return [object()] if self.rows else []
+
+    def find_element(self, by, value):
+        self.searched.append(value)
+        return StubElement()
+
+
+class StubElement:
+
+    def click(self):
+        pass
+
+
+class StubBookerAPI:
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def find_message(self, name, subject):
+        return next((dict(message, index=index) for index, message in reversed(list(enumerate(self.messages)))
+                     if (message['name'], message['subject']) == (name, subject)), None)
+
+
+class OpenMessageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = [{'id': 1, 'name': 'Ann Lee', 'subject': 'Booking'},
+                         {'id': 2, 'name': 'Jane Roe', 'subject': 'Bathroom'}]
+
+    def open(self, driver):
+        return AdminPage(driver, BASE_URL).inbox.find_and_open_unread_message('Jane Roe', 'Bathroom', booker_api=StubBookerAPI(self.messages))
+
+    def test_opens_the_row_at_the_listing_index(self):
+        driver = StubDriver([('Ann Lee', 'Booking'), ('Jane Roe', 'Bathroom')])
+        self.assertEqual(self.open(driver), 'id')
+        self.assertEqual(driver.clicked, ['message1'])
+        self.assertEqual(driver.searched, [])
+
+    def test_searches_the_rows_when_they_shifted(self):
+        # a message deleted after the inbox was rendered
+        driver = StubDriver([('Jane Roe', 'Bathroom')])
+        self.assertEqual(self.open(driver), 'search')
+        self.assertEqual(driver.clicked, [])
+        self.assertEqual(len(driver.searched), 1)
@@ -0,0 +1,48 @@
+import base64
+import os
+import tempfile
+import unittest
+
+from tests.artifacts import ArtifactWriter
+
+
+class FakeDriver:
+    page_source = '<html></html>'
+
+    def get_screenshot_as_base64(self):
+        return base64.b64encode(b'png').decode()
+
+
+class ArtifactWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def capture(self, writer, count):
+        for i in range(count):
+            path = writer.capture(FakeDriver(), f'Model.v_step{i}')
+            writer.close()
+            # distinct modification times, oldest first
+            for extension in ('.png', '.html'):
+                os.utime(path + extension, (1000 + i, 1000 + i))
+
+    def test_keeps_the_newest_captures_with_both_files(self):
+        writer = ArtifactWriter(self.directory.name, max_files=3)
+        self.capture(writer, 5)
+        files = sorted(os.listdir(self.directory.name))
+        self.assertEqual(len(files), 6)
+        self.assertEqual({os.path.splitext(name)[0].rsplit('-', 1)[1] for name in files},
+                         {'Model.v_step2', 'Model.v_step3', 'Model.v_step4'})
+
+    def test_leaves_other_files_alone(self):
+        for name in ('diagram.png', 'report.html'):
+            with open(os.path.join(self.directory.name, name), 'w') as f:
+                f.write('not an artifact')
+        os.utime(os.path.join(self.directory.name, 'diagram.png'), (1, 1))
+        writer = ArtifactWriter(self.directory.name, max_files=1)
+        self.capture(writer, 3)
+        files = os.listdir(self.directory.name)
+        self.assertIn('diagram.png', files)
+        self.assertIn('report.html', files)
+        self.assertEqual(len(files), 4)
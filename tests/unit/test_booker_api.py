@@ -0,0 +1,93 @@
+import json
+import unittest
+
+from tests.booker_api import BookerAPI, _iter_json_array
+from tests.fake_sut.server import FakeBooker
+
+
+class ChunkedResponse:
+
+    def __init__(self, data, chunk_size):
+        self._data = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self._chunk_size = chunk_size
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self._data), self._chunk_size):
+            yield self._data[start:start + self._chunk_size]
+
+
+class IterJsonArrayTestCase(unittest.TestCase):
+
+    def test_items_split_across_chunks(self):
+        items = [{'id': i, 'name': 'Zoë Ünal', 'tags': [1, [2, 3]], 'text': 'a, ] }'} for i in range(20)]
+        data = {'before': [0, 1], 'messages': items, 'after': True}
+        for chunk_size in (1, 2, 7, 64, 100000):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(_iter_json_array(ChunkedResponse(data, chunk_size), 'messages')), items)
+
+    def test_empty_array(self):
+        self.assertEqual(list(_iter_json_array(ChunkedResponse({'messages': []}, 3), 'messages')), [])
+
+    def test_stops_early(self):
+        iterator = _iter_json_array(ChunkedResponse({'bookings': [{'id': 1}, {'id': 2}]}, 1), 'bookings')
+        self.assertEqual(next(iterator), {'id': 1})
+
+
+class FindMessageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeBooker(port=0)
+        self.addCleanup(self.fake.stop)
+        self.booker_api = BookerAPI(self.fake.start(), 'admin', 'password')
+        self.addCleanup(self.booker_api.close)
+        self.booker_api.login()
+
+    def create_message(self):
+        return self.booker_api.create_message(name='Jane Roe', email='jane@example.com', phone='01234567890',
+                                              subject='Booking enquiry', description='x' * 30)
+
+    def test_returns_the_newest_match_with_its_id(self):
+        self.create_message()
+        newest = self.create_message()
+        found = self.booker_api.find_message('Jane Roe', 'Booking enquiry')
+        self.assertEqual(found['id'], newest['messageid'])
+        # its position in the listing, i.e. its row in the inbox
+        self.assertEqual(self.booker_api.get_messages()[found['index']]['id'], newest['messageid'])
+
+    def test_skips_read_messages(self):
+        older = self.create_message()
+        newest = self.create_message()
+        self.booker_api.mark_message_read(newest['messageid'])
+        self.assertEqual(self.booker_api.find_message('Jane Roe', 'Booking enquiry')['id'], older['messageid'])
+        self.assertEqual(self.booker_api.find_message('Jane Roe', 'Booking enquiry', unread_only=False)['id'],
+                         newest['messageid'])
+
+    def test_not_found(self):
+        self.assertIsNone(self.booker_api.find_message('Nobody', 'Booking enquiry'))
+
+
+class FindBookingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeBooker(port=0)
+        self.addCleanup(self.fake.stop)
+        self.booker_api = BookerAPI(self.fake.start(), 'admin', 'password')
+        self.addCleanup(self.booker_api.close)
+
+    def create_booking(self, checkin, checkout, firstname='Jane'):
+        return self.booker_api.create_booking(1, firstname, 'Roe', 'jane@example.com', '01234567890', checkin, checkout)
+
+    def test_returns_the_newest_match(self):
+        self.create_booking('2030-01-01', '2030-01-03')
+        newest = self.create_booking('2030-02-01', '2030-02-03')
+        self.create_booking('2030-03-01', '2030-03-03', firstname='John')
+        found = self.booker_api.find_booking(room_id=1, firstname='Jane', lastname='Roe')
+        self.assertEqual(found['bookingid'], newest['bookingid'])
+
+    def test_matches_the_dates(self):
+        older = self.create_booking('2030-01-01', '2030-01-03')
+        self.create_booking('2030-02-01', '2030-02-03')
+        found = self.booker_api.find_booking(room_id=1, firstname='Jane', lastname='Roe',
+                                             checkin='2030-01-01', checkout='2030-01-03')
+        self.assertEqual(found['bookingid'], older['bookingid'])
+        self.assertIsNone(self.booker_api.find_booking(room_id=1, firstname='Jane', checkin='2030-04-01'))
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tests.booker_api import BookerAPI
+from tests.cleanup import Ledger, sweep
+from tests.fake_sut.server import FakeBooker
+from tests.my_contact_provider import VALID_DESCRIPTION, VALID_SUBJECT
+
+BASE_URL = 'http://sut'
+DAY = 24 * 3600
+
+
+class LedgerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.ledger = Ledger(os.path.join(directory.name, 'ledger.jsonl'))
+
+    def test_pending_until_deleted(self):
+        self.ledger.record_created(BASE_URL, {'kind': 'message', 'id': 1, 'ref': 'a'})
+        self.ledger.record_created(BASE_URL, {'kind': 'booking', 'id': 2, 'ref': 'b'})
+        self.ledger.record_created('http://other', {'kind': 'booking', 'id': 3, 'ref': 'c'})
+        self.ledger.record_deleted(BASE_URL, ['a'])
+        self.assertEqual([entry['ref'] for entry in self.ledger.pending(BASE_URL)], ['b'])
+
+    def test_pending_older_than(self):
+        self.ledger.record_created(BASE_URL, {'kind': 'message', 'id': 1, 'ref': 'a'})
+        self.assertEqual(self.ledger.pending(BASE_URL, older_than=3600), [])
+        with mock.patch('time.time', return_value=time.time() + 2 * 3600):
+            self.assertEqual(len(self.ledger.pending(BASE_URL, older_than=3600)), 1)
+
+    def test_batches(self):
+        ledger = Ledger(self.ledger.path, batch_size=3)
+        for ref in ('a', 'b'):
+            ledger.record_created(BASE_URL, {'kind': 'message', 'id': 1, 'ref': ref})
+        self.assertFalse(os.path.exists(ledger.path))
+        ledger.record_deleted(BASE_URL, ['a'])
+        with open(ledger.path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        ledger.record_created(BASE_URL, {'kind': 'message', 'id': 1, 'ref': 'c'})
+        ledger.flush()
+        self.assertEqual([entry['ref'] for entry in self.ledger.pending(BASE_URL)], ['b', 'c'])
+
+    def test_compact_drops_deleted_entities(self):
+        self.ledger.record_created(BASE_URL, {'kind': 'message', 'id': 1, 'ref': 'a'})
+        self.ledger.record_seen(BASE_URL, [{'kind': 'message', 'id': 2, 'ref': 'b'}])
+        self.ledger.record_created(BASE_URL, {'kind': 'booking', 'id': 3, 'ref': 'c'})
+        self.ledger.record_deleted(BASE_URL, ['a'])
+        self.ledger.compact()
+        with open(self.ledger.path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual([entry['ref'] for entry in self.ledger.pending(BASE_URL)], ['c'])
+        self.assertEqual(list(self.ledger.seen(BASE_URL)), ['b'])
+
+
+class SweepTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fake = FakeBooker(port=0)
+        self.addCleanup(self.fake.stop)
+        self.base_url = self.fake.start()
+        self.ledger = Ledger(os.path.join(directory.name, 'ledger.jsonl'))
+
+    def booker_api(self, ledger=None):
+        booker_api = BookerAPI(self.base_url, 'admin', 'password', ledger=ledger)
+        self.addCleanup(booker_api.close)
+        return booker_api
+
+    def message_ids(self):
+        booker_api = self.booker_api()
+        booker_api.login()
+        return {message['id'] for message in booker_api.get_messages()}
+
+    def create_message(self, booker_api, name='Jane Roe'):
+        return booker_api.create_message(name=name, email='jane@example.com', phone='01234567890',
+                                         subject=VALID_SUBJECT, description=VALID_DESCRIPTION)['messageid']
+
+    def test_deletes_pending_entities_older_than_the_limit(self):
+        run = self.booker_api(self.ledger)
+        message_id = self.create_message(run)
+        self.assertEqual(sweep(self.booker_api(self.ledger), self.ledger, 1, listing=False), (0, 0, 0))
+        self.assertIn(message_id, self.message_ids())
+        with mock.patch('time.time', return_value=time.time() + 2 * 3600):
+            self.assertEqual(sweep(self.booker_api(self.ledger), self.ledger, 1, listing=False), (1, 0, 0))
+        self.assertNotIn(message_id, self.message_ids())
+        self.assertEqual(self.ledger.pending(self.fake.base_url), [])
+        with open(self.ledger.path) as f:
+            self.assertEqual(f.read(), '')
+
+    def test_unresolved_messages_stay_pending(self):
+        run = self.booker_api(self.ledger)
+        run.track_created('message', name='Nobody', subject='never sent')
+        self.assertEqual(run.delete_created(), (0, 1))
+        self.assertEqual(len(self.ledger.pending(self.fake.base_url)), 1)
+        self.assertEqual(sweep(self.booker_api(self.ledger), self.ledger, 0, listing=False), (0, 0, 1))
+        self.assertEqual(len(self.ledger.pending(self.fake.base_url)), 1)
+
+    def test_messages_sent_by_others_with_the_same_name_stay(self):
+        others = self.create_message(self.booker_api())
+        run = self.booker_api(self.ledger)
+        ours = self.create_message(self.booker_api())
+        run.track_created('message', name='Jane Roe', subject=VALID_SUBJECT)
+        # two messages match, only one of them is this run's
+        self.assertEqual(run.delete_created(), (0, 1))
+        self.assertLessEqual({others, ours}, self.message_ids())
+
+        run.track_created('message', name='Jane Roe', subject=VALID_SUBJECT)
+        run.track_created('message', name='Jane Roe', subject=VALID_SUBJECT)
+        self.assertEqual(run.delete_created(), (2, 0))
+        self.assertFalse({others, ours} & self.message_ids())
+
+    def test_listing_is_opt_in(self):
+        message_id = self.create_message(self.booker_api())
+        with mock.patch('time.time', return_value=time.time() + 2 * DAY):
+            self.assertEqual(sweep(self.booker_api(self.ledger), self.ledger, 0), (0, 0, 0))
+        self.assertIn(message_id, self.message_ids())
+        self.assertEqual(self.ledger.seen(self.fake.base_url), {})
+
+    def test_sweeps_test_messages_of_the_listing_by_age(self):
+        # created elsewhere: not in this ledger
+        message_id = self.create_message(self.booker_api())
+        sweep(self.booker_api(self.ledger), self.ledger, 24, listing=True)
+        self.assertIn(message_id, self.message_ids())
+        self.assertEqual(len(self.ledger.seen(self.fake.base_url)), 1)
+
+        with mock.patch('time.time', return_value=time.time() + 2 * DAY):
+            self.assertEqual(sweep(self.booker_api(self.ledger), self.ledger, 24, listing=True), (1, 0, 0))
+        self.assertNotIn(message_id, self.message_ids())
+        # the message sent by someone else is left alone
+        self.assertIn(1, self.message_ids())
+        self.assertEqual(self.ledger.seen(self.fake.base_url), {})
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.walker import compiler
+from tests.walker.model import load_model_options
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TESTS = os.path.join(ROOT, 'tests')
+MODEL_OPTIONS = [(os.path.join(ROOT, 'models', 'contact_form.json'), 'random(edge_coverage(100))')]
+
+
+class ContentHashTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.walker_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.walker_dir)
+        for filename in os.listdir(compiler.WALKER_DIR):
+            if filename.endswith('.py'):
+                shutil.copy(os.path.join(compiler.WALKER_DIR, filename), self.walker_dir)
+        patcher = mock.patch.object(compiler, 'WALKER_DIR', self.walker_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_inputs_same_hash(self):
+        self.assertEqual(compiler.content_hash(MODEL_OPTIONS, TESTS, 1),
+                         compiler.content_hash(MODEL_OPTIONS, TESTS, 1))
+
+    def test_seed_changes_the_hash(self):
+        self.assertNotEqual(compiler.content_hash(MODEL_OPTIONS, TESTS, 1),
+                            compiler.content_hash(MODEL_OPTIONS, TESTS, 2))
+
+    def test_walker_sources_change_the_hash(self):
+        before = compiler.content_hash(MODEL_OPTIONS, TESTS, 1)
+        with open(os.path.join(self.walker_dir, 'generators.py'), 'a') as f:
+            f.write('\n# changed\n')
+        self.assertNotEqual(before, compiler.content_hash(MODEL_OPTIONS, TESTS, 1))
+
+
+class CheckModelsTestCase(unittest.TestCase):
+
+    def check(self, *filenames):
+        models, _ = load_model_options([[os.path.join(ROOT, 'models', filename)] for filename in filenames])
+        return compiler.check_models(models)
+
+    def test_models_sharing_states(self):
+        self.assertEqual(self.check('contact_form.json', 'message_backoffice.json'), [])
+
+    def test_model_sharing_no_state(self):
+        # NewBooking1 has a start element of its own, but walks begin at ContactForm's
+        self.assertEqual(self.check('contact_form.json', 'new_booking1.json'),
+                         ["NewBooking1: not reachable from the start element of ContactForm through shared states"])
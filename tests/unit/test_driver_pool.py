@@ -0,0 +1,121 @@
+import unittest
+from unittest import mock
+
+from tests import driver_pool
+from tests.driver_pool import SessionRecycler, capture_state, restore_state
+
+
+class StubDriver:
+    """Keeps the URL, cookies and storage the state functions read and write."""
+
+    def __init__(self, url='about:blank', cookies=(), local_storage=(), session_storage=()):
+        self.current_url = url
+        self.cookies = list(cookies)
+        self.local_storage = list(local_storage)
+        self.session_storage = list(session_storage)
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append('execute_script')
+        if not self.current_url.startswith('http'):
+            raise Exception("no storage")
+        if args:
+            self.local_storage, self.session_storage = [list(item) for item in args[0]], [list(item) for item in args[1]]
+            return None
+        return [self.local_storage, self.session_storage]
+
+    def get_cookies(self):
+        return self.cookies
+
+    def add_cookie(self, cookie):
+        self.calls.append('add_cookie')
+        self.cookies.append(cookie)
+
+    def get(self, url):
+        self.calls.append('get')
+        self.current_url = url
+
+    def refresh(self):
+        self.calls.append('refresh')
+
+    def quit(self):
+        self.calls.append('quit')
+
+
+class StateTestCase(unittest.TestCase):
+
+    def test_capture_and_restore(self):
+        old = StubDriver('https://example.test/#/admin', cookies=[{'name': 'token', 'value': 'abc'}],
+                         local_storage=[['key', 'value']], session_storage=[['tab', '1']])
+        new = StubDriver()
+
+        restore_state(new, capture_state(old))
+
+        self.assertEqual(capture_state(new), capture_state(old))
+        # the page is reloaded once it has the cookies and storage
+        self.assertEqual(new.calls, ['get', 'add_cookie', 'execute_script', 'refresh', 'execute_script'])
+
+    def test_capture_page_without_storage(self):
+        state = capture_state(StubDriver())
+        self.assertEqual(state, {'url': 'about:blank', 'cookies': [], 'local_storage': [], 'session_storage': []})
+
+    def test_restore_page_without_url(self):
+        driver = StubDriver()
+        restore_state(driver, capture_state(StubDriver()))
+        self.assertEqual(driver.calls, [])
+
+
+class SessionRecyclerTestCase(unittest.TestCase):
+
+    def recycler(self, **kwargs):
+        return SessionRecycler(StubDriver, **dict(dict(window=4, baseline_samples=2), **kwargs))
+
+    def test_no_drift_until_the_window_is_full(self):
+        recycler = self.recycler(max_latency_drift=2)
+        for seconds in (1, 1, 3, 3, 3):
+            recycler.record('e_step', seconds)
+        self.assertIsNone(recycler.latency_drift())
+        self.assertIsNone(recycler.check(StubDriver()))
+
+    def test_latency_drift(self):
+        recycler = self.recycler(max_latency_drift=2)
+        for seconds in (1, 1, 2, 2, 3, 3):
+            recycler.record('e_step', seconds)
+        self.assertEqual(recycler.latency_drift(), 2.5)
+        self.assertEqual(recycler.check(StubDriver()), 'latency')
+
+    def test_fast_steps_are_ignored(self):
+        recycler = self.recycler(max_latency_drift=2, min_seconds=0.05)
+        for seconds in (0.01, 0.01) + (0.04,) * 4:
+            recycler.record('v_fast', seconds)
+        self.assertIsNone(recycler.latency_drift())
+
+    def test_memory_is_checked_every_few_checks(self):
+        recycler = self.recycler(max_memory_mb=100, check_every=3)
+        with mock.patch.object(driver_pool, 'psutil', object()), \
+                mock.patch.object(driver_pool, 'browser_memory_mb', return_value=200) as memory:
+            self.assertEqual([recycler.check(StubDriver()) for _ in range(3)], [None, None, 'memory'])
+        self.assertEqual(memory.call_count, 1)
+
+    def test_off_without_limits(self):
+        recycler = self.recycler()
+        for seconds in (1, 1, 9, 9, 9, 9):
+            recycler.record('e_step', seconds)
+        with mock.patch.object(driver_pool, 'browser_memory_mb', return_value=10 ** 6):
+            self.assertIsNone(recycler.check(StubDriver()))
+
+    def test_recycle_keeps_the_state_and_the_baselines(self):
+        recycler = self.recycler(max_latency_drift=2)
+        for seconds in (1, 1, 3, 3, 3, 3):
+            recycler.record('e_step', seconds)
+        old = StubDriver('https://example.test/', cookies=[{'name': 'token', 'value': 'abc'}])
+
+        new = recycler.recycle(old, 'latency')
+
+        self.assertIn('quit', old.calls)
+        self.assertEqual(capture_state(new), capture_state(old))
+        self.assertEqual(recycler.recycles, {'memory': 0, 'latency': 1})
+        self.assertIsNone(recycler.latency_drift())
+        for seconds in (1, 1, 1, 1):
+            recycler.record('e_step', seconds)
+        self.assertEqual(recycler.latency_drift(), 1)
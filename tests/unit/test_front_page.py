@@ -0,0 +1,70 @@
+import time
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tests.pages.front import FrontPage
+from tests.pages.waits import waits
+
+BASE_URL = 'https://sut.example'
+
+
+class StubDriver(WebDriver):
+    """Just enough of a WebDriver for FrontPage.navigate(), without a browser."""
+
+    def __init__(self, reacts=True, renders=True, route='#/'):
+        self.state = {'url': BASE_URL + '/', 'route': route, 'ready': True, 'modal': False}
+        self.reacts = reacts
+        self.renders = renders
+        self.loads = []
+        self.route_changes = 0
+
+    def execute_script(self, script, *args):
+        return self.state
+
+    def execute_async_script(self, script, *args):
+        self.route_changes += 1
+        return self.reacts
+
+    def get(self, url):
+        self.loads.append(url)
+
+    def find_elements(self, by, value):
+        return [object()] if self.renders and self.reacts else []
+
+
+class NavigateTestCase(unittest.TestCase):
+
+    def navigate(self, driver, fresh=True):
+        return FrontPage(driver, BASE_URL).navigate(fresh=fresh)
+
+    def test_route_change(self):
+        driver = StubDriver()
+        self.assertEqual(self.navigate(driver), 'soft')
+        self.assertEqual(driver.loads, [])
+
+    def test_already_there(self):
+        driver = StubDriver()
+        self.assertEqual(self.navigate(driver, fresh=False), 'none')
+        self.assertEqual(driver.route_changes, 0)
+
+    def test_loads_another_site(self):
+        driver = StubDriver()
+        driver.state['url'] = 'about:blank'
+        self.assertEqual(self.navigate(driver), 'hard')
+        self.assertEqual(driver.route_changes, 0)
+
+    def test_no_reaction_loads_right_away(self):
+        driver = StubDriver(reacts=False)
+        start = time.monotonic()
+        self.assertEqual(self.navigate(driver), 'fallback')
+        self.assertLess(time.monotonic() - start, waits.timeouts['presence_check'])
+        self.assertEqual(len(driver.loads), 1)
+
+    def test_not_rendered_loads(self):
+        driver = StubDriver(renders=False)
+        original = waits.timeouts['presence_check']
+        waits.configure(timeouts={'presence_check': 0.1})
+        self.addCleanup(waits.configure, timeouts={'presence_check': original})
+        self.assertEqual(self.navigate(driver), 'fallback')
+        self.assertEqual(len(driver.loads), 1)
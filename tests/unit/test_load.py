@@ -0,0 +1,65 @@
+import asyncio
+import os
+import unittest
+
+import requests
+from faker import Faker
+
+from tests.booker_api import BookerAPI
+from tests.fake_sut.server import FakeBooker
+from tests.load import LoadTest, PacedBookerAPI, RateLimiter, VirtualUser, expect_statuses
+from tests.my_contact_provider import MyContactProvider
+from tests.walker.model import load_model_options
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LoadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake_sut = FakeBooker(port=0)
+        self.addCleanup(self.fake_sut.stop)
+        self.booker_api = BookerAPI(self.fake_sut.start(), 'admin', 'password', max_retries=0)
+        self.addCleanup(self.booker_api.close)
+        self.api = PacedBookerAPI(self.booker_api, RateLimiter())
+        self.addCleanup(self.api.close)
+        self.fake = Faker()
+        self.fake.add_provider(MyContactProvider)
+        self.fake.seed_instance(1)
+
+    def load_test(self, model, duration=1.0):
+        models, _ = load_model_options([[os.path.join(ROOT, 'models', model), 'random(edge_coverage(100))']])
+        load = LoadTest(models, self.api, self.fake, users=4, duration=duration, seed=1)
+        self.booker_api.add_response_hook(load.count_request_error)
+        return load
+
+    def test_expected_statuses_are_not_errors(self):
+        load = self.load_test('contact_form_detailed.json')
+        asyncio.run(load.run())
+        self.assertEqual(load.errors, {})
+        self.assertEqual(load.request_errors, {})
+        # invalid contacts were submitted, and refused
+        steps = load.timings.summary()['step']
+        self.assertGreater(sum(stats['count'] for name, stats in steps.items() if '_invalid_' in name), 0)
+
+    def test_unexpected_statuses_are_errors(self):
+        load = self.load_test('contact_form.json')
+        user = VirtualUser(self.api, self.fake, None)
+
+        invalid_contact = {'name': '', 'email': '', 'phone': '', 'subject': '', 'description': ''}
+
+        async def submit():
+            # where a valid contact was expected
+            with self.assertRaises(requests.HTTPError):
+                await self.api.create_message(**invalid_contact)
+            with self.assertRaises(requests.HTTPError), expect_statuses(400):
+                await self.api.create_message(**invalid_contact)
+            await user.e_submit_invalid_contact_name({})
+
+        asyncio.run(submit())
+        self.assertEqual(dict(load.request_errors), {'POST /message': 1})
+
+    def test_booking_names_are_within_the_limits(self):
+        for _ in range(500):
+            self.assertTrue(3 <= len(self.fake.valid_first_name()) <= 18)
+            self.assertTrue(3 <= len(self.fake.valid_last_name()) <= 18)
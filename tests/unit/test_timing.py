@@ -0,0 +1,31 @@
+import random
+import unittest
+
+from tests.timing import BUCKETS, Histogram
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+    def test_single_duration_is_exact(self):
+        histogram = Histogram()
+        histogram.record(0.07)
+        self.assertEqual([histogram.percentile(p) for p in (50, 95, 99)], [0.07, 0.07, 0.07])
+
+    def test_slower_than_the_buckets(self):
+        histogram = Histogram()
+        histogram.record(BUCKETS[-1] * 2)
+        self.assertEqual(histogram.percentile(99), BUCKETS[-1] * 2)
+
+    def test_close_to_the_exact_percentiles(self):
+        rng = random.Random(1)
+        durations = sorted(rng.lognormvariate(-2.5, 0.6) for _ in range(10000))
+        histogram = Histogram()
+        for seconds in durations:
+            histogram.record(seconds)
+        for p in (50, 95, 99):
+            with self.subTest(p=p):
+                exact = durations[int(p / 100 * len(durations)) - 1]
+                self.assertAlmostEqual(histogram.percentile(p) / exact, 1, delta=0.05)
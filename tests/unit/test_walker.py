@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import unittest
+
+from tests.walker.machine import Machine, ReplayMachine
+from tests.walker.model import load_models
+from tests.walker.planner import Planner
+from tests.walker.runner import Reporter, Walker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_contact_and_backoffice():
+    contact_form, _ = load_models(os.path.join(ROOT, 'models', 'contact_form.json'))
+    message_backoffice, _ = load_models(os.path.join(ROOT, 'models', 'message_backoffice.json'))
+    return contact_form + message_backoffice
+
+
+class StubExecutor:
+    """Has every step; fails the steps in ``failing`` once, and tells sent contacts apart like test.py."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.executed = []
+        self.contacts = 0
+
+    def has_model(self, model_name):
+        return True
+
+    def has_step(self, model_name, name):
+        return True
+
+    def execute_step(self, model_name, name, data=None, step=None):
+        self.executed.append((name, step['id'] if step else None, dict(data or {})))
+        result = {'data': data, 'result': None, 'error': None}
+        if name == 'e_submit_valid_contact_data':
+            self.contacts += 1
+            data['global.last_contact'] = self.contacts
+        if step and step['id'] in self.failing:
+            self.failing.discard(step['id'])
+            result['error'] = {'message': 'failed', 'trace': None}
+        return result
+
+
+class CheckpointTestCase(unittest.TestCase):
+
+    def test_restore_goes_back_to_the_checkpoint(self):
+        models = load_contact_and_backoffice()
+        machine = Machine([(model, 'random(edge_coverage(100))') for model in models], seed=3)
+        for _ in range(10):
+            machine.get_next_step()
+        checkpoint = json.loads(json.dumps(machine.checkpoint()))
+        following = [machine.get_next_step()['id'] for _ in range(10)]
+
+        machine.restore(checkpoint)
+
+        self.assertEqual(dict(machine.checkpoint(), elapsed=None), dict(checkpoint, elapsed=None))
+        self.assertEqual([machine.get_next_step()['id'] for _ in range(10)], following)
+
+
+class RouteFromStartTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = Planner(load_contact_and_backoffice())
+
+    def route_names(self, logged_in):
+        variables = {'MessageBackoffice': {'logged_in': logged_in, 'last_message_read': False}}
+        route = self.planner.route_from_start('MessageBackoffice', 'v23', variables, {})
+        return [step['name'] for step in route]
+
+    def test_route_to_the_variables(self):
+        self.assertNotIn('e_admin_correct_login', self.route_names(False))
+        self.assertIn('e_admin_correct_login', self.route_names(True))
+        self.assertEqual(self.route_names(True)[-1], 'v_contact_successful')
+
+    def test_variables_set_by_the_test_code_are_not_compared(self):
+        variables = {'MessageBackoffice': {'logged_in': False, 'last_message_read': False}}
+        route = self.planner.route_from_start('MessageBackoffice', 'v23', variables, {'last_contact': 7})
+        self.assertIsNotNone(route)
+
+    def test_unreachable_state(self):
+        variables = {'MessageBackoffice': {'logged_in': False, 'last_message_read': True}}
+        self.assertIsNone(self.planner.route_from_start('MessageBackoffice', 'v23', variables, {}))
+
+
+class RecoveryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.models = load_contact_and_backoffice()
+        self.steps, _ = Planner(self.models).plan()
+
+    def walk(self, executor):
+        walker = Walker(ReplayMachine(self.models, self.steps), executor, Reporter(io.StringIO()), max_recoveries=1)
+        return walker, walker.run()
+
+    def test_recovers_after_login(self):
+        # e73 is the admin panel link of a logged in admin, so its checkpoint is after the login
+        executor = StubExecutor(failing={'e73'})
+        walker, status = self.walk(executor)
+
+        self.assertFalse(status)
+        self.assertEqual(walker.recoveries, 1)
+        self.assertEqual(walker.failures, 1)
+        names = [name for name, _, _ in executor.executed]
+        restart = names.index('restartRun')
+        retry = next(i for i, (name, step_id, _) in enumerate(executor.executed)
+                     if i > restart and (name, step_id) == ('e_click_admin_panel', 'e73'))
+        self.assertIn('e_admin_correct_login', names[restart:retry])
+        # the retried step sees the contact sent while rebuilding, not the one of the checkpoint
+        self.assertEqual(executor.executed[retry][2]['last_contact'],
+                         names[:retry].count('e_submit_valid_contact_data'))
+
+    def test_fails_when_the_checkpoint_cant_be_rebuilt(self):
+        executor = StubExecutor(failing={'e73'})
+        walker = Walker(ReplayMachine(self.models, self.steps), executor, Reporter(io.StringIO()), max_recoveries=1)
+
+        def save_checkpoint():
+            Walker._save_checkpoint(walker)
+            # test code logging out on its own leaves a state the models can't reach
+            walker.checkpoint['contexts']['MessageBackoffice']['variables']['logged_in'] = False
+            walker.checkpoint['contexts']['MessageBackoffice']['variables']['last_message_read'] = True
+
+        walker._save_checkpoint = save_checkpoint
+        self.assertFalse(walker.run())
+        self.assertEqual(walker.recoveries, 0)
+        self.assertNotIn('restartRun', [name for name, _, _ in executor.executed])
+        self.assertIn("can't be reached from the start", walker.reporter.stream.getvalue())
@@ -0,0 +1,173 @@
+"""Command line interface of the in-process walker, mirroring ``altwalker check|verify|online``.
+
+    python -m tests.walker check -m models/contact_form.json "random(vertex_coverage(100) and edge_coverage(100))"
+    python -m tests.walker verify -m models/contact_form.json tests
+    python -m tests.walker online tests -m models/contact_form.json "random(vertex_coverage(100) and edge_coverage(100))"
+    python -m tests.walker compile tests -m models/contact_form.json "random(vertex_coverage(100) and edge_coverage(100))"
+    python -m tests.walker plan -m models/contact_form.json -o contact_form.path.json
+    python -m tests.walker online tests --path contact_form.path.json
+    python -m tests.walker online tests -m models/contact_form.json "random(edge_coverage(100))" --recover 3 --checkpoint walk.checkpoint.json
+    python -m tests.walker online tests -m models/contact_form.json "random(edge_coverage(100))" --resume walk.checkpoint.json
+    python -m tests.walker parallel tests -m models/contact_form.json "random(edge_coverage(100))" --workers 4
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from tests.walker.compiler import CACHE_DIR, check_models, compile_path, verify_code
+from tests.walker.executor import Executor
+from tests.walker.generators import GeneratorError
+from tests.walker.machine import Machine, ReplayMachine
+from tests.walker.model import ModelError, load_model_options, load_models
+from tests.walker.parallel import make_jobs, report, run_parallel
+from tests.walker.planner import Planner, PlanningError, load_path, save_path
+from tests.walker.runner import Walker
+
+
+def check(args):
+    models, _ = load_model_options(args.model)
+    problems = check_models(models)
+    if problems:
+        print("\n".join(problems))
+        return 1
+    print("No issues found with the model(s).")
+    return 0
+
+
+def verify(args):
+    models, _ = load_model_options([[path] for path in args.model])
+    missing = verify_code(models, Executor(args.tests))
+    if missing:
+        print("Missing in the test code:\n  " + "\n  ".join(missing))
+        return 1
+    print("No issues found with the code.")
+    return 0
+
+
+def compile_(args):
+    # with --quiet the path file is the only output (e.g. for PATH_FILE=$(...)), the rest goes to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.quiet else sys.stdout):
+        path_file, cached = compile_path(args.model, args.tests, seed=args.seed, cache_dir=args.cache_dir)
+    if args.quiet:
+        print(path_file)
+    else:
+        print(f"{'Using the cached' if cached else 'Compiled the'} path {path_file}; "
+              f"run it with: python -m tests.walker online {args.tests} --path {path_file}")
+    return 0
+
+
+def plan(args):
+    models = []
+    for path in args.model:
+        models += load_models(path)[0]
+    steps, unreachable = Planner(models).plan()
+    save_path(args.output, args.model, steps, generator='planner')
+    print(f"Planned {len(steps)} steps covering all edges and vertices, saved to {args.output}")
+    if unreachable:
+        print(f"Unreachable: {', '.join(f'{model_name}.{element_id}' for model_name, element_id in unreachable)}")
+        return 1
+    return 0
+
+
+def online(args):
+    resume = None
+    if args.resume:
+        with open(args.resume) as f:
+            resume = json.load(f)
+    if args.path:
+        models, steps = load_path(args.path)
+        machine = ReplayMachine(models, steps)
+        print(f"replaying {len(steps)} steps from {args.path}")
+    elif args.model:
+        models, seed = load_model_options(args.model)
+        if args.seed is not None:
+            seed = args.seed
+        machine = Machine(models, seed=resume['seed'] if resume else seed)
+        print(f"path seed: {machine.seed}")
+    else:
+        raise ModelError("either -m or --path is required")
+    walker = Walker(machine, Executor(args.tests), max_recoveries=args.recover, checkpoint_file=args.checkpoint)
+    return 0 if walker.run(resume=resume) else 1
+
+
+def parallel(args):
+    _, seed = load_model_options(args.model)
+    if args.seed is not None:
+        seed = args.seed
+    jobs = make_jobs(args.model, args.walks or args.workers, seed, split_models=args.split_models)
+    print(f"running {len(jobs)} walks on {args.workers} workers (seed: {seed})")
+    results = run_parallel(args.tests, jobs, args.workers, log_dir=args.log_dir)
+    return 0 if report(results) else 1
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m tests.walker', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = subparsers.add_parser('check', help="check the models and their generators")
+    check_parser.add_argument('-m', '--model', nargs='+', action='append', required=True,
+                              metavar=('MODEL', 'GENERATOR'))
+    check_parser.set_defaults(func=check)
+
+    verify_parser = subparsers.add_parser('verify', help="verify the test code against the models")
+    verify_parser.add_argument('tests', help="tests package (e.g. tests)")
+    verify_parser.add_argument('-m', '--model', action='append', required=True)
+    verify_parser.set_defaults(func=verify)
+
+    online_parser = subparsers.add_parser('online', help="walk the models executing the test code")
+    online_parser.add_argument('tests', help="tests package (e.g. tests)")
+    online_parser.add_argument('-m', '--model', nargs='+', action='append',
+                               metavar=('MODEL', 'GENERATOR'))
+    online_parser.add_argument('--seed', type=int, help="seed of the path generator")
+    online_parser.add_argument('--path', help="replay the steps of a path file instead of generating them")
+    online_parser.add_argument('--recover', type=int, default=0, metavar='N',
+                               help="after a failed step, restart and continue from the last vertex, up to N times")
+    online_parser.add_argument('--checkpoint', help="save the state of the walk to this file at every vertex")
+    online_parser.add_argument('--resume', help="continue the walk from a checkpoint file (same models and test code)")
+    online_parser.set_defaults(func=online)
+
+    parallel_parser = subparsers.add_parser('parallel', help="run several walks at once, one browser per worker")
+    parallel_parser.add_argument('tests', help="tests package (e.g. tests)")
+    parallel_parser.add_argument('-m', '--model', nargs='+', action='append', required=True,
+                                 metavar=('MODEL', 'GENERATOR'))
+    parallel_parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    parallel_parser.add_argument('--walks', type=int,
+                                 help="independent walks per model group (default: one per worker)")
+    parallel_parser.add_argument('--split-models', action='store_true',
+                                 help="walk each -m model on its own instead of all of them together")
+    parallel_parser.add_argument('--seed', type=int, help="run seed, from which every walk's seed is derived")
+    parallel_parser.add_argument('--log-dir', default='walker-logs', help="directory for the per walk logs")
+    parallel_parser.set_defaults(func=parallel)
+
+    compile_parser = subparsers.add_parser('compile', help="check, verify and generate the path once, caching it")
+    compile_parser.add_argument('tests', help="tests package (e.g. tests)")
+    compile_parser.add_argument('-m', '--model', nargs='+', action='append', required=True,
+                                metavar=('MODEL', 'GENERATOR'))
+    compile_parser.add_argument('--seed', type=int, help="seed of the path generator (default: the model's)")
+    compile_parser.add_argument('--cache-dir', default=CACHE_DIR, help="where compiled paths are kept")
+    compile_parser.add_argument('-q', '--quiet', action='store_true', help="only print the path file")
+    compile_parser.set_defaults(func=compile_)
+
+    plan_parser = subparsers.add_parser('plan', help="plan a short walk covering all edges and vertices")
+    plan_parser.add_argument('-m', '--model', action='append', required=True)
+    plan_parser.add_argument('-o', '--output', required=True, help="path file to write")
+    plan_parser.set_defaults(func=plan)
+
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ModelError, GeneratorError, PlanningError) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
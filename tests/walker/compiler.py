@@ -0,0 +1,145 @@
+"""Validate models against the test code and generate their path ahead of time, with a cache.
+
+Guards and actions only use the models' own variables, so the path a generator
+produces for a seed doesn't depend on the test code being executed: it can be
+generated offline and replayed later (``ReplayMachine`` still checks every step).
+Compiled paths are stored under a hash of the model files, the test code, the
+generators, the seed and the walker's own sources (which decide how a path is
+generated); as long as none of them changes, later runs skip the
+validation and the generation and go straight to execution, and a failed walk
+can be replayed step by step from the same file.
+"""
+
+import hashlib
+import json
+import os
+
+from tests.walker.executor import Executor
+from tests.walker.generators import GeneratorError, TimeDuration
+from tests.walker.machine import Machine
+from tests.walker.model import ModelError, load_model_options
+from tests.walker.planner import save_path
+
+CACHE_DIR = '.walker_cache'
+WALKER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def check_models(models):
+    """Return the problems of the (model, generator) pairs: no start element, unreachable models or vertices.
+
+    Walks begin at the first start element (see Machine), so the other models are only
+    reached through shared states, whatever their own start element.
+    """
+    start = next((model for model, _ in models if model.start_element_id), None)
+    if start is None:
+        return ["none of the models has a start element"]
+
+    shared_states = {}
+    for model, _ in models:
+        for vertex in model.vertices.values():
+            if vertex.shared_state:
+                shared_states.setdefault(vertex.shared_state, []).append(vertex)
+    reachable = {(start.name, start.start_element_id)}
+    pending = [(start, start.start_element_id)]
+    while pending:
+        model, element_id = pending.pop()
+        element = model.get_element(element_id)
+        if hasattr(element, 'out_edges'):
+            following = [(model, edge.id) for edge in element.out_edges]
+            following += [(vertex.model, vertex.id) for vertex in shared_states.get(element.shared_state, [])]
+        else:
+            following = [(model, element.target_id)]
+        for model, element_id in following:
+            if (model.name, element_id) not in reachable:
+                reachable.add((model.name, element_id))
+                pending.append((model, element_id))
+
+    problems = []
+    for model, _ in models:
+        unreachable = sorted(set(model.vertices) - {element_id for name, element_id in reachable if name == model.name})
+        if model.vertices and len(unreachable) == len(model.vertices):
+            problems.append(f"{model.name}: not reachable from the start element of {start.name} through shared states")
+        elif unreachable:
+            problems.append(f"{model.name}: unreachable vertices {', '.join(unreachable)}")
+    return problems
+
+
+def verify_code(models, executor):
+    """Return the classes and methods the models need but the test code lacks."""
+    missing = []
+    for model, _ in models:
+        if not executor.has_model(model.name):
+            missing.append(f"class {model.name}")
+            continue
+        names = {element.name for element in list(model.vertices.values()) + list(model.edges.values()) if element.name}
+        missing += [f"{model.name}.{name}" for name in sorted(names) if not executor.has_step(model.name, name)]
+    return missing
+
+
+def content_hash(model_options, tests_path, seed):
+    """Hash of everything the compiled path depends on."""
+    digest = hashlib.sha256()
+    for option in model_options:
+        with open(option[0], 'rb') as f:
+            digest.update(f.read())
+        digest.update(json.dumps(option[1:]).encode())
+    with open(os.path.join(tests_path, 'test.py'), 'rb') as f:
+        digest.update(f.read())
+    for filename in sorted(os.listdir(WALKER_DIR)):
+        if filename.endswith('.py'):
+            with open(os.path.join(WALKER_DIR, filename), 'rb') as f:
+                digest.update(filename.encode())
+                digest.update(f.read())
+    digest.update(str(seed).encode())
+    return digest.hexdigest()
+
+
+def _has_time_condition(condition):
+    if isinstance(condition, TimeDuration):
+        return True
+    return any(_has_time_condition(child) for child in getattr(condition, 'conditions', []))
+
+
+def generate_steps(models, seed, max_steps=100000):
+    """Walk the models without executing anything and return the steps."""
+    for model, generator in models:
+        if _has_time_condition(generator.stop_condition):
+            raise GeneratorError(f"{model.name}: time_duration stop conditions can't be compiled into a path")
+    machine = Machine(models, seed=seed)
+    steps = []
+    while machine.has_next_step():
+        if len(steps) >= max_steps:
+            raise GeneratorError(f"the stop conditions are not fulfilled after {max_steps} steps")
+        step = machine.get_next_step()
+        steps.append({'modelName': step['modelName'], 'id': step['id'], 'name': step['name']})
+    return steps
+
+
+def compile_path(model_options, tests_path, seed=None, cache_dir=CACHE_DIR):
+    """Return the path file for the models, generators and seed, and whether it came from the cache.
+
+    Raises ModelError if the models or the test code don't pass the validation.
+    """
+    models, file_seed = load_model_options(model_options)
+    seed = seed if seed is not None else file_seed
+    key = content_hash(model_options, tests_path, seed)
+    path_file = os.path.join(cache_dir, f'{key[:16]}.json')
+    if seed is not None and os.path.exists(path_file):
+        return path_file, True
+
+    problems = check_models(models) + [f"missing in the test code: {name}"
+                                       for name in verify_code(models, Executor(tests_path))]
+    if problems:
+        raise ModelError('; '.join(problems))
+
+    machine_seed = Machine([], seed=seed).seed
+    steps = generate_steps(models, machine_seed)
+    if seed is None:
+        # a random seed: cache the path under the seed actually used
+        key = content_hash(model_options, tests_path, machine_seed)
+        path_file = os.path.join(cache_dir, f'{key[:16]}.json')
+
+    os.makedirs(cache_dir, exist_ok=True)
+    save_path(path_file, [option[0] for option in model_options], steps,
+              generator=[option[1:] for option in model_options], seed=machine_seed, hash=key)
+    return path_file, False
@@ -0,0 +1,60 @@
+"""Run the test code of the models (e.g. ``tests/test.py``) in process, the way AltWalker does."""
+
+import importlib
+import os
+import sys
+import traceback
+from inspect import signature
+
+
+class ExecutorError(Exception):
+    """Raised when the test code doesn't match what a step expects."""
+
+
+class Executor:
+    """Load ``<tests package>/test.py`` and call its fixtures and model methods.
+
+    Methods receive no arguments, the model data or the data and the current step,
+    depending on how many parameters they take.
+    """
+
+    def __init__(self, tests_path='tests'):
+        if os.getcwd() not in sys.path:
+            sys.path.insert(0, os.getcwd())
+        package = os.path.normpath(tests_path).replace(os.sep, '.')
+        self.module = importlib.import_module(f'{package}.test')
+        self._instances = {}
+
+    def has_model(self, model_name):
+        return isinstance(getattr(self.module, model_name, None), type)
+
+    def has_step(self, model_name, name):
+        if model_name is None:
+            return callable(getattr(self.module, name, None))
+        return self.has_model(model_name) and callable(getattr(getattr(self.module, model_name), name, None))
+
+    def instance(self, model_name):
+        if model_name not in self._instances:
+            self._instances[model_name] = getattr(self.module, model_name)()
+        return self._instances[model_name]
+
+    def execute_step(self, model_name, name, data=None, step=None):
+        """Execute a step (or a fixture, if ``model_name`` is None) and return its data and error."""
+        if model_name is None:
+            func = getattr(self.module, name)
+        else:
+            func = getattr(self.instance(model_name), name)
+
+        nr_args = len(signature(func).parameters)
+        if nr_args > 2:
+            raise ExecutorError(f"{model_name or 'module'}.{name} must take 0, 1 or 2 parameters")
+
+        result = {'data': data, 'result': None, 'error': None}
+        try:
+            result['result'] = func(*(data, step)[:nr_args])
+        except Exception as e:
+            result['error'] = {'message': str(e) or type(e).__name__, 'trace': traceback.format_exc()}
+        return result
+
+    def reset(self):
+        self._instances = {}
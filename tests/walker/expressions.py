@@ -0,0 +1,257 @@
+"""Evaluate the JavaScript snippets used by the models in guards and actions.
+
+Only the small subset of JavaScript that GraphWalker models typically use is
+supported: literals, variables (``global.`` prefixed ones live in the shared
+global scope), arithmetic, comparison and logical operators, and assignment
+statements separated by ``;`` (e.g. ``logged_in=true;``, ``total_nights = 2;``,
+``last_message_read == false``).
+"""
+
+import functools
+import re
+
+
+class ExpressionError(Exception):
+    """Raised when an expression can't be parsed or evaluated."""
+
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+(?:\.\d*)?|\.\d+)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<name>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)
+      | (?P<op>===|!==|==|!=|<=|>=|&&|\|\||\+\+|--|\+=|-=|\*=|/=|[-+*/%<>!=();])
+    )''', re.VERBOSE)
+
+_ESCAPE_RE = re.compile(r'\\(.)')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+_KEYWORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+_BINARY_OPS = [
+    ('||',),
+    ('&&',),
+    ('==', '!=', '===', '!=='),
+    ('<', '<=', '>', '>='),
+    ('+', '-'),
+    ('*', '/', '%'),
+]
+
+_ASSIGN_OPS = ('=', '+=', '-=', '*=', '/=')
+
+
+def _tokenize(source):
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = _TOKEN_RE.match(source, pos)
+        if not match:
+            raise ExpressionError(f"unexpected character {source[pos]!r} in {source!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'number':
+            value = float(value) if '.' in value else int(value)
+        elif kind == 'string':
+            value = _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), value[1:-1])
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser producing a tuple based syntax tree."""
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.pos = 0
+
+    def _peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _accept(self, *ops):
+        kind, value = self._peek()
+        if kind == 'op' and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def _expect(self, op):
+        if not self._accept(op):
+            raise ExpressionError(f"expected {op!r} in {self.source!r}")
+
+    def parse_statements(self):
+        statements = []
+        while self.pos < len(self.tokens):
+            if self._accept(';'):
+                continue
+            statements.append(self._statement())
+            if self.pos < len(self.tokens):
+                self._expect(';')
+        return statements
+
+    def parse_expression(self):
+        expression = self._binary(0)
+        self._accept(';')
+        if self.pos < len(self.tokens):
+            raise ExpressionError(f"unexpected {self._peek()[1]!r} in {self.source!r}")
+        return expression
+
+    def _statement(self):
+        kind, name = self._peek()
+        if kind == 'name' and name not in _KEYWORDS:
+            _, op = self._peek(1)
+            if op in _ASSIGN_OPS:
+                self.pos += 2
+                return ('assign', name, op, self._binary(0))
+            if op in ('++', '--'):
+                self.pos += 2
+                return ('assign', name, op[0] + '=', ('literal', 1))
+        return self._binary(0)
+
+    def _binary(self, level):
+        if level == len(_BINARY_OPS):
+            return self._unary()
+        left = self._binary(level + 1)
+        while True:
+            op = self._accept(*_BINARY_OPS[level])
+            if op is None:
+                return left
+            left = ('binary', op, left, self._binary(level + 1))
+
+    def _unary(self):
+        op = self._accept('!', '-', '+')
+        if op:
+            return ('unary', op, self._unary())
+        return self._primary()
+
+    def _primary(self):
+        kind, value = self._peek()
+        self.pos += 1
+        if kind in ('number', 'string'):
+            return ('literal', value)
+        if kind == 'name':
+            if value in _KEYWORDS:
+                return ('literal', _KEYWORDS[value])
+            return ('name', value)
+        if kind == 'op' and value == '(':
+            expression = self._binary(0)
+            self._expect(')')
+            return expression
+        raise ExpressionError(f"unexpected {value!r} in {self.source!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_statements(source):
+    return _Parser(source).parse_statements()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_expression(source):
+    return _Parser(source).parse_expression()
+
+
+class Scope:
+    """Variables visible to a model: its own ones plus the shared ``global.`` ones."""
+
+    GLOBAL_PREFIX = 'global.'
+
+    def __init__(self, local_variables, global_variables):
+        self.local = local_variables
+        self.globals = global_variables
+
+    def get(self, name):
+        if name.startswith(self.GLOBAL_PREFIX):
+            key = name[len(self.GLOBAL_PREFIX):]
+            if key in self.globals:
+                return self.globals[key]
+        elif name in self.local:
+            return self.local[name]
+        elif name in self.globals:
+            return self.globals[name]
+        raise ExpressionError(f"{name} is not defined")
+
+    def set(self, name, value):
+        if name.startswith(self.GLOBAL_PREFIX):
+            self.globals[name[len(self.GLOBAL_PREFIX):]] = value
+        else:
+            self.local[name] = value
+
+
+def _add(left, right):
+    if isinstance(left, str) or isinstance(right, str):
+        return _to_string(left) + _to_string(right)
+    return left + right
+
+
+def _to_string(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    return str(value)
+
+
+_OPERATIONS = {
+    '+': _add,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    '/': lambda left, right: left / right,
+    '%': lambda left, right: left % right,
+    '==': lambda left, right: left == right,
+    '!=': lambda left, right: left != right,
+    '===': lambda left, right: type(left) is type(right) and left == right,
+    '!==': lambda left, right: not (type(left) is type(right) and left == right),
+    '<': lambda left, right: left < right,
+    '<=': lambda left, right: left <= right,
+    '>': lambda left, right: left > right,
+    '>=': lambda left, right: left >= right,
+}
+
+
+def _evaluate(node, scope):
+    kind = node[0]
+    if kind == 'literal':
+        return node[1]
+    if kind == 'name':
+        return scope.get(node[1])
+    if kind == 'unary':
+        value = _evaluate(node[2], scope)
+        if node[1] == '!':
+            return not value
+        return -value if node[1] == '-' else +value
+    if kind == 'binary':
+        op = node[1]
+        left = _evaluate(node[2], scope)
+        if op == '&&':
+            return _evaluate(node[3], scope) if left else left
+        if op == '||':
+            return left if left else _evaluate(node[3], scope)
+        try:
+            return _OPERATIONS[op](left, _evaluate(node[3], scope))
+        except TypeError as e:
+            raise ExpressionError(str(e))
+    if kind == 'assign':
+        _, name, op, expression = node
+        value = _evaluate(expression, scope)
+        if op != '=':
+            value = _evaluate(('binary', op[0], ('name', name), ('literal', value)), scope)
+        scope.set(name, value)
+        return value
+    raise ExpressionError(f"unknown node {node!r}")
+
+
+def evaluate(expression, scope):
+    """Return the value of an expression, such as an edge guard."""
+    return _evaluate(compile_expression(expression), scope)
+
+
+def execute(actions, scope):
+    """Run a list of action statements (each may hold several ``;`` separated ones)."""
+    if isinstance(actions, str):
+        actions = [actions]
+    for action in actions or []:
+        for statement in compile_statements(action):
+            _evaluate(statement, scope)
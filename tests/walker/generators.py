@@ -0,0 +1,206 @@
+"""Path generators and stop conditions, e.g. ``random(edge_coverage(100) && vertex_coverage(100))``."""
+
+import re
+
+
+class GeneratorError(Exception):
+    """Raised when a generator/stop condition string can't be parsed."""
+
+
+class EdgeCoverage:
+
+    def __init__(self, percent):
+        self.percent = percent
+
+    def is_fulfilled(self, context):
+        return context.edge_coverage >= self.percent
+
+
+class VertexCoverage:
+
+    def __init__(self, percent):
+        self.percent = percent
+
+    def is_fulfilled(self, context):
+        return context.vertex_coverage >= self.percent
+
+
+class ReachedVertex:
+
+    def __init__(self, name):
+        self.name = name
+
+    def is_fulfilled(self, context):
+        return any(vertex.name == self.name for vertex in context.visited_elements(context.model.vertices))
+
+
+class ReachedEdge:
+
+    def __init__(self, name):
+        self.name = name
+
+    def is_fulfilled(self, context):
+        return any(edge.name == self.name for edge in context.visited_elements(context.model.edges))
+
+
+class TimeDuration:
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def is_fulfilled(self, context):
+        return context.elapsed >= self.seconds
+
+
+class Length:
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def is_fulfilled(self, context):
+        return context.length >= self.steps
+
+
+class Never:
+
+    def is_fulfilled(self, context):
+        return False
+
+
+class AllOf:
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+
+    def is_fulfilled(self, context):
+        return all(condition.is_fulfilled(context) for condition in self.conditions)
+
+
+class AnyOf:
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+
+    def is_fulfilled(self, context):
+        return any(condition.is_fulfilled(context) for condition in self.conditions)
+
+
+STOP_CONDITIONS = {
+    'edge_coverage': lambda value: EdgeCoverage(int(value)),
+    'vertex_coverage': lambda value: VertexCoverage(int(value)),
+    'reached_vertex': ReachedVertex,
+    'reached_edge': ReachedEdge,
+    'time_duration': lambda value: TimeDuration(float(value)),
+    'length': lambda value: Length(int(value)),
+    'never': Never,
+}
+
+
+class RandomGenerator:
+    """Pick the next step uniformly at random among the available ones."""
+
+    def __init__(self, stop_condition):
+        self.stop_condition = stop_condition
+
+    def is_fulfilled(self, context):
+        return self.stop_condition.is_fulfilled(context)
+
+    def choose(self, candidates, rng):
+        return rng.choice(candidates)
+
+
+class WeightedRandomGenerator(RandomGenerator):
+    """Like random, but honouring the ``weight`` (0 to 1) set on edges."""
+
+    def choose(self, candidates, rng):
+        weighted = [getattr(candidate, 'weight', None) for candidate in candidates]
+        reserved = sum(weight for weight in weighted if weight)
+        unweighted = weighted.count(None) + weighted.count(0)
+        rest = max(0.0, 1.0 - reserved) / unweighted if unweighted else 0.0
+        weights = [weight or rest for weight in weighted]
+        if not any(weights):
+            return rng.choice(candidates)
+        return rng.choices(candidates, weights=weights)[0]
+
+
+GENERATORS = {
+    'random': RandomGenerator,
+    'weighted_random': WeightedRandomGenerator,
+}
+
+
+_TOKEN_RE = re.compile(r'\s*(&&|\|\||[(),]|[^\s(),&|]+)')
+
+
+class _StopConditionParser:
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = _TOKEN_RE.findall(source)
+        if ''.join(self.tokens) != re.sub(r'\s+', '', source):
+            raise GeneratorError(f"can't parse {source!r}")
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise GeneratorError(f"unexpected end of {self.source!r}")
+        self.pos += 1
+        return token
+
+    def _expect(self, token):
+        if self._next() != token:
+            raise GeneratorError(f"expected {token!r} in {self.source!r}")
+
+    def parse_generator(self):
+        name = self._next()
+        if name not in GENERATORS:
+            raise GeneratorError(f"unsupported generator {name!r} in {self.source!r}")
+        self._expect('(')
+        stop_condition = self._or()
+        self._expect(')')
+        if self._peek() is not None:
+            raise GeneratorError(f"unexpected {self._peek()!r} in {self.source!r}")
+        return GENERATORS[name](stop_condition)
+
+    def _or(self):
+        conditions = [self._and()]
+        while self._peek() in ('or', '||'):
+            self._next()
+            conditions.append(self._and())
+        return conditions[0] if len(conditions) == 1 else AnyOf(conditions)
+
+    def _and(self):
+        conditions = [self._condition()]
+        while self._peek() in ('and', '&&'):
+            self._next()
+            conditions.append(self._condition())
+        return conditions[0] if len(conditions) == 1 else AllOf(conditions)
+
+    def _condition(self):
+        name = self._next()
+        if name == '(':
+            condition = self._or()
+            self._expect(')')
+            return condition
+        if name not in STOP_CONDITIONS:
+            raise GeneratorError(f"unsupported stop condition {name!r} in {self.source!r}")
+        self._expect('(')
+        args = []
+        while self._peek() != ')':
+            args.append(self._next())
+            if self._peek() == ',':
+                self._next()
+        self._expect(')')
+        try:
+            return STOP_CONDITIONS[name](*args)
+        except (TypeError, ValueError):
+            raise GeneratorError(f"invalid arguments for {name} in {self.source!r}")
+
+
+def parse_generator(source):
+    """Parse a GraphWalker ``generator(stop_condition)`` string."""
+    return _StopConditionParser(source).parse_generator()
@@ -0,0 +1,286 @@
+"""Walk one or more models, GraphWalker style, producing the next step to execute."""
+
+import copy
+import random
+import time
+
+from tests.walker.expressions import Scope, evaluate, execute
+from tests.walker.generators import parse_generator
+from tests.walker.model import Edge, Vertex
+
+
+class MachineError(Exception):
+    """Raised when the machine can't produce a next step."""
+
+
+class Context:
+    """Execution state of one model: its variables, generator and coverage."""
+
+    def __init__(self, machine, model, generator):
+        self.machine = machine
+        self.model = model
+        # generator may be None when the path doesn't come from one (e.g. a replayed path)
+        self.generator = parse_generator(generator) if isinstance(generator, str) else generator
+        self.variables = {}
+        self.scope = Scope(self.variables, machine.global_variables)
+        self.vertex_visits = {}
+        self.edge_visits = {}
+        self.length = 0
+
+        execute(model.actions, self.scope)
+
+    @property
+    def edge_coverage(self):
+        if not self.model.edges:
+            return 100
+        return 100 * len(self.edge_visits) // len(self.model.edges)
+
+    @property
+    def vertex_coverage(self):
+        if not self.model.vertices:
+            return 100
+        return 100 * len(self.vertex_visits) // len(self.model.vertices)
+
+    @property
+    def elapsed(self):
+        return self.machine.elapsed
+
+    @property
+    def is_fulfilled(self):
+        return self.generator is not None and self.generator.is_fulfilled(self)
+
+    def visited_elements(self, elements):
+        return [elements[element_id] for element_id in list(self.vertex_visits) + list(self.edge_visits)
+                if element_id in elements]
+
+    def is_available(self, edge):
+        return not edge.guard or bool(evaluate(edge.guard, self.scope))
+
+    def available_edges(self, vertex):
+        return [edge for edge in vertex.out_edges if self.is_available(edge)]
+
+    def visit(self, element):
+        self.length += 1
+        if isinstance(element, Edge):
+            self.edge_visits[element.id] = self.edge_visits.get(element.id, 0) + 1
+            execute(element.actions, self.scope)
+        else:
+            self.vertex_visits[element.id] = self.vertex_visits.get(element.id, 0) + 1
+
+    def statistics(self):
+        return {
+            'modelName': self.model.name,
+            'steps': self.length,
+            'edgeCoverage': self.edge_coverage,
+            'vertexCoverage': self.vertex_coverage,
+            'unvisitedEdges': sorted(edge_id for edge_id in self.model.edges if edge_id not in self.edge_visits),
+            'unvisitedVertices': sorted(vertex_id for vertex_id in self.model.vertices if vertex_id not in self.vertex_visits),
+            'fulfilled': self.is_fulfilled,
+        }
+
+
+class Machine:
+    """Generate a path through the given models.
+
+    ``models`` is a list of ``(model, generator)`` pairs. Vertices sharing the same
+    ``sharedState`` let the walk jump from one model to another, and the walk ends
+    once the stop conditions of every model are fulfilled.
+    """
+
+    def __init__(self, models, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.global_variables = {}
+        self.contexts = [Context(self, model, generator) for model, generator in models]
+        self._contexts_by_model = {context.model.name: context for context in self.contexts}
+        self._shared_states = {}
+        for context in self.contexts:
+            for vertex in context.model.vertices.values():
+                if vertex.shared_state:
+                    self._shared_states.setdefault(vertex.shared_state, []).append(vertex)
+
+        self.current_context = None
+        self.current_element = None
+        self._start_time = None
+        self._jumped_from = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._start_time if self._start_time else 0
+
+    def context_of(self, element):
+        return self._contexts_by_model[element.model.name]
+
+    def candidates(self):
+        """Return the elements that may be stepped into from the current vertex."""
+        vertex = self.current_element
+        candidates = self.current_context.available_edges(vertex)
+        if vertex.shared_state:
+            jumps = [other for other in self._shared_states[vertex.shared_state] if other is not vertex]
+            if self._jumped_from in jumps and (candidates or len(jumps) > 1):
+                # don't bounce straight back unless there's nowhere else to go
+                jumps.remove(self._jumped_from)
+            candidates += jumps
+        return candidates
+
+    @property
+    def is_fulfilled(self):
+        return all(context.is_fulfilled for context in self.contexts)
+
+    def has_next_step(self):
+        return not self.is_fulfilled
+
+    def _start(self):
+        for context in self.contexts:
+            if context.model.start_element is not None:
+                return context, context.model.start_element
+        raise MachineError("none of the models has a start element")
+
+    def _choose(self, candidates):
+        if self.current_context.is_fulfilled:
+            # this model is done, head for one that isn't
+            pending = [candidate for candidate in candidates
+                       if isinstance(candidate, Vertex) and not self.context_of(candidate).is_fulfilled]
+            if pending:
+                candidates = pending
+        return self.current_context.generator.choose(candidates, self.rng)
+
+    def get_next_step(self):
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+
+        if self.current_element is None:
+            context, element = self._start()
+        elif isinstance(self.current_element, Edge):
+            context, element = self.current_context, self.current_element.target
+        else:
+            candidates = self.candidates()
+            if not candidates:
+                raise MachineError(f"no way out of {self.current_element} and the stop conditions are not fulfilled")
+            element = self._choose(candidates)
+            context = self.context_of(element)
+
+        return self.step_into(context, element)
+
+    def step_into(self, context, element):
+        """Move the machine to ``element`` and return the corresponding step."""
+        jumped = isinstance(element, Vertex) and isinstance(self.current_element, Vertex)
+        self._jumped_from = self.current_element if jumped else None
+        self.current_context = context
+        self.current_element = element
+        context.visit(element)
+        return {
+            'id': element.id,
+            'name': element.name,
+            'modelName': context.model.name,
+            'type': 'edge' if isinstance(element, Edge) else 'vertex',
+        }
+
+    def get_data(self):
+        """Return the variables visible to the current model, as handed over to the test code."""
+        data = dict(self.global_variables)
+        data.update(self.current_context.variables)
+        return data
+
+    def set_data(self, data, original):
+        """Store back the variables the test code changed; ``global.`` keys go to the shared scope."""
+        for key, value in data.items():
+            if key.startswith(Scope.GLOBAL_PREFIX):
+                self.global_variables[key[len(Scope.GLOBAL_PREFIX):]] = value
+            elif key not in original or original[key] != value:
+                self.current_context.variables[key] = value
+
+    def statistics(self):
+        return [context.statistics() for context in self.contexts]
+
+    def checkpoint(self):
+        """Return the state of the walk, JSON serializable: where it is, the variables, the rng and the coverage.
+
+        Generators are stateless, so together with the rng state this is enough to
+        continue the walk exactly as it would have gone on.
+        """
+        version, internal_state, gauss_next = self.rng.getstate()
+        return {
+            'seed': self.seed,
+            'rng': [version, list(internal_state), gauss_next],
+            'elapsed': self.elapsed,
+            'modelName': self.current_context.model.name if self.current_context else None,
+            'elementId': self.current_element.id if self.current_element else None,
+            'jumpedFrom': self._jumped_from.id if self._jumped_from else None,
+            'globalVariables': copy.deepcopy(self.global_variables),
+            'contexts': {context.model.name: {'variables': copy.deepcopy(context.variables),
+                                              'vertexVisits': dict(context.vertex_visits),
+                                              'edgeVisits': dict(context.edge_visits),
+                                              'length': context.length}
+                         for context in self.contexts},
+        }
+
+    def restore(self, checkpoint):
+        """Put the machine back in the state of a checkpoint()."""
+        version, internal_state, gauss_next = checkpoint['rng']
+        self.seed = checkpoint['seed']
+        self.rng.setstate((version, tuple(internal_state), gauss_next))
+        if self._start_time is None:
+            # resuming in a new process: the time already walked counts for time_duration()
+            self._start_time = time.monotonic() - checkpoint['elapsed']
+        self.global_variables.clear()
+        self.global_variables.update(copy.deepcopy(checkpoint['globalVariables']))
+        for context in self.contexts:
+            state = checkpoint['contexts'][context.model.name]
+            context.variables.clear()
+            context.variables.update(copy.deepcopy(state['variables']))
+            context.vertex_visits = dict(state['vertexVisits'])
+            context.edge_visits = dict(state['edgeVisits'])
+            context.length = state['length']
+
+        self.current_context = self._contexts_by_model.get(checkpoint['modelName'])
+        self.current_element = self.current_context.model.get_element(checkpoint['elementId']) if self.current_context else None
+        self._jumped_from = None
+        if checkpoint['jumpedFrom']:
+            self._jumped_from = next(vertex for context in self.contexts for vertex in context.model.vertices.values()
+                                     if vertex.id == checkpoint['jumpedFrom'])
+
+
+class ReplayMachine(Machine):
+    """Follow a previously recorded list of steps instead of generating them.
+
+    Every step must be a legal move from the previous one, so guards, actions and
+    shared state jumps behave exactly as in a generated walk.
+    """
+
+    def __init__(self, models, steps):
+        super().__init__([(model, None) for model in models], seed=0)
+        self.steps = steps
+        self.position = 0
+
+    def has_next_step(self):
+        return self.position < len(self.steps)
+
+    def get_next_step(self):
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+
+        recorded = self.steps[self.position]
+        context = self._contexts_by_model.get(recorded['modelName'])
+        element = context.model.get_element(recorded['id']) if context else None
+        if element is None:
+            raise MachineError(f"step {self.position} ({recorded}) is not part of the models")
+
+        if self.current_element is None:
+            expected = [self._start()[1]]
+        elif isinstance(self.current_element, Edge):
+            expected = [self.current_element.target]
+        else:
+            expected = self.candidates()
+        if element not in expected:
+            raise MachineError(f"step {self.position} ({recorded}) can't follow {self.current_element}")
+
+        self.position += 1
+        return self.step_into(context, element)
+
+    def checkpoint(self):
+        return dict(super().checkpoint(), position=self.position)
+
+    def restore(self, checkpoint):
+        super().restore(checkpoint)
+        self.position = checkpoint['position']
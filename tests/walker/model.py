@@ -0,0 +1,133 @@
+"""Load the GraphWalker JSON models found under ``models/``."""
+
+import json
+
+from tests.walker.expressions import ExpressionError, compile_expression, compile_statements
+from tests.walker.generators import GeneratorError, parse_generator
+
+
+class ModelError(Exception):
+    """Raised when a model file is invalid."""
+
+
+class Vertex:
+
+    def __init__(self, model, data):
+        self.model = model
+        self.id = data['id']
+        self.name = data.get('name')
+        self.shared_state = data.get('sharedState')
+        self.properties = data.get('properties', {})
+        self.out_edges = []
+
+    def __repr__(self):
+        return f'<Vertex {self.model.name}.{self.name} ({self.id})>'
+
+
+class Edge:
+
+    def __init__(self, model, data):
+        self.model = model
+        self.id = data['id']
+        self.name = data.get('name')
+        self.source_id = data.get('sourceVertexId')
+        self.target_id = data['targetVertexId']
+        self.guard = data.get('guard')
+        self.actions = data.get('actions', [])
+        self.weight = data.get('weight')
+        self.properties = data.get('properties', {})
+
+    @property
+    def source(self):
+        return self.model.vertices.get(self.source_id)
+
+    @property
+    def target(self):
+        return self.model.vertices[self.target_id]
+
+    def __repr__(self):
+        return f'<Edge {self.model.name}.{self.name} ({self.id})>'
+
+
+class Model:
+
+    def __init__(self, data, path=None):
+        self.path = path
+        self.name = data['name']
+        self.generator = data.get('generator')
+        self.start_element_id = data.get('startElementId')
+        self.actions = data.get('actions', [])
+        self.vertices = {}
+        self.edges = {}
+
+        for vertex_data in data.get('vertices', []):
+            vertex = Vertex(self, vertex_data)
+            self.vertices[vertex.id] = vertex
+        for edge_data in data.get('edges', []):
+            edge = Edge(self, edge_data)
+            self.edges[edge.id] = edge
+
+        self._validate()
+        for edge in self.edges.values():
+            if edge.source:
+                edge.source.out_edges.append(edge)
+
+    def _validate(self):
+        for edge in self.edges.values():
+            if edge.source_id is not None and edge.source_id not in self.vertices:
+                raise ModelError(f"{self.name}: edge {edge.id} has an unknown source vertex {edge.source_id}")
+            if edge.target_id not in self.vertices:
+                raise ModelError(f"{self.name}: edge {edge.id} has an unknown target vertex {edge.target_id}")
+        if self.start_element_id is not None and self.get_element(self.start_element_id) is None:
+            raise ModelError(f"{self.name}: unknown start element {self.start_element_id}")
+
+        try:
+            for actions in [self.actions] + [edge.actions for edge in self.edges.values()]:
+                for action in actions or []:
+                    compile_statements(action)
+            for edge in self.edges.values():
+                if edge.guard:
+                    compile_expression(edge.guard)
+        except ExpressionError as e:
+            raise ModelError(f"{self.name}: {e}")
+
+    def get_element(self, element_id):
+        return self.vertices.get(element_id) or self.edges.get(element_id)
+
+    @property
+    def start_element(self):
+        return self.get_element(self.start_element_id) if self.start_element_id else None
+
+    def __repr__(self):
+        return f'<Model {self.name}>'
+
+
+def load_models(path):
+    """Return the models defined in a GraphWalker JSON file, and the file's seed."""
+    with open(path) as f:
+        data = json.load(f)
+    models = [Model(model_data, path=path) for model_data in data.get('models', [])]
+    if not models:
+        raise ModelError(f"{path}: no models found")
+    return models, data.get('seed')
+
+
+def load_model_options(model_options):
+    """Return the (model, generator) pairs for ``-m path [generator]`` options, and the first seed found.
+
+    Models without a generator option use the one set in their model file.
+    """
+    models = []
+    seed = None
+    for option in model_options:
+        if len(option) > 2:
+            raise ModelError(f"-m expects a model path and optionally a generator, got {option}")
+        path = option[0]
+        file_models, file_seed = load_models(path)
+        seed = seed if seed is not None else file_seed
+        for model in file_models:
+            generator = option[1] if len(option) > 1 else model.generator
+            if not generator:
+                raise GeneratorError(f"{path}: no generator given for model {model.name}")
+            models.append((model, parse_generator(generator)))
+    return models, seed
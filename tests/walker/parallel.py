@@ -0,0 +1,96 @@
+"""Run several walks at once, each in its own process with its own browser and API client.
+
+Every job is one walk: either another independent walk of the same models or the
+walk of a model group when the models are split across workers. Jobs run in fresh
+processes, so the test module's ``setUpRun()`` gives each of them a WebDriver and a
+BookerAPI of its own, and each job gets a seed derived from the run seed, used both
+for its path and (through the ``SEED`` environment variable) for its Faker data.
+"""
+
+import contextlib
+import hashlib
+import multiprocessing
+import os
+import time
+
+from tests.walker.executor import Executor
+from tests.walker.machine import Machine
+from tests.walker.model import load_model_options
+from tests.walker.runner import Reporter, Walker
+
+
+def worker_seed(seed, index):
+    """Deterministic seed of worker/shard ``index`` for a run using ``seed``."""
+    digest = hashlib.sha256(f'{seed}:{index}'.encode()).hexdigest()
+    return int(digest[:8], 16)
+
+
+def make_jobs(model_options, walks, seed, split_models=False):
+    """Return one job per walk; with ``split_models`` each ``-m`` option gets its own walks."""
+    groups = [[option] for option in model_options] if split_models else [model_options]
+    jobs = []
+    for group in groups:
+        for _ in range(walks):
+            index = len(jobs)
+            jobs.append({'index': index, 'model_options': group, 'seed': worker_seed(seed, index)})
+    return jobs
+
+
+def run_job(job, tests_path, log_dir):
+    """Run one job (in a worker process) and return its outcome."""
+    os.environ['SEED'] = str(job['seed'])
+    os.environ['WALKER_WORKER'] = str(job['index'])
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"job{job['index']}.log")
+
+    start = time.monotonic()
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        models, _ = load_model_options(job['model_options'])
+        machine = Machine(models, seed=job['seed'])
+        print(f"path seed: {machine.seed}")
+        walker = Walker(machine, Executor(tests_path), Reporter(log))
+        status = walker.run()
+
+    return dict(job, status=status, statistics=machine.statistics(),
+                duration=time.monotonic() - start, log=log_path)
+
+
+def merge_statistics(results):
+    """Merge the per job statistics: steps add up, an element is covered if any job covered it."""
+    merged = {}
+    for result in results:
+        for model in result['statistics']:
+            total = merged.setdefault(model['modelName'], {
+                'modelName': model['modelName'], 'steps': 0,
+                'unvisitedEdges': set(model['unvisitedEdges']),
+                'unvisitedVertices': set(model['unvisitedVertices']),
+            })
+            total['steps'] += model['steps']
+            total['unvisitedEdges'] &= set(model['unvisitedEdges'])
+            total['unvisitedVertices'] &= set(model['unvisitedVertices'])
+    return list(merged.values())
+
+
+def run_parallel(tests_path, jobs, workers, log_dir='walker-logs'):
+    """Run the jobs on ``workers`` processes; return the results in job order."""
+    # one fresh process per job, so module level state (driver, seed) is never shared
+    with multiprocessing.Pool(processes=workers, maxtasksperchild=1) as pool:
+        pending = [pool.apply_async(run_job, (job, tests_path, log_dir)) for job in jobs]
+        return [result.get() for result in pending]
+
+
+def report(results, stream=None):
+    reporter = Reporter(stream)
+    for result in results:
+        reporter._print(f"job {result['index']} (seed {result['seed']}): "
+                        f"{'PASSED' if result['status'] else 'FAILED'} in {result['duration']:.1f}s, log: {result['log']}")
+    reporter._print('Merged coverage:')
+    for model in merge_statistics(results):
+        reporter._print(f"  {model['modelName']}: {model['steps']} steps")
+        if model['unvisitedEdges']:
+            reporter._print(f"    unvisited edges: {', '.join(sorted(model['unvisitedEdges']))}")
+        if model['unvisitedVertices']:
+            reporter._print(f"    unvisited vertices: {', '.join(sorted(model['unvisitedVertices']))}")
+    status = all(result['status'] for result in results)
+    reporter._print(f"Status: {'PASSED' if status else 'FAILED'}")
+    return status
@@ -0,0 +1,173 @@
+"""Plan a short walk covering every edge and vertex of the models, and store it as a path file.
+
+Random generators tend to revisit cheap self loops many times before reaching full
+coverage, and every extra step is a browser round trip. The planner explores the
+models offline, over states made of the current element and the model variables
+(so guards and actions are honoured, as are shared state jumps), and repeatedly
+extends the walk with the cheapest route to an element not covered yet. This
+Chinese-postman-style greedy tour is usually close to the minimal one.
+
+The resulting path file can be replayed with ``python -m tests.walker online --path``.
+"""
+
+import heapq
+import itertools
+import json
+
+from tests.walker.machine import Machine
+from tests.walker.model import Edge, load_models
+
+
+class PlanningError(Exception):
+    """Raised when the state space of the models is too big to be explored."""
+
+
+class Planner:
+
+    def __init__(self, models, max_states=100000):
+        self.models = models
+        self.max_states = max_states
+        self._machine = Machine([(model, None) for model in models], seed=0)
+        self._moves = {}
+
+    def _snapshot(self):
+        machine = self._machine
+        return (
+            machine.current_context.model.name,
+            machine.current_element.id,
+            machine._jumped_from.id if machine._jumped_from else None,
+            tuple(tuple(sorted(context.variables.items())) for context in machine.contexts),
+            tuple(sorted(machine.global_variables.items())),
+        )
+
+    def _restore(self, state):
+        machine = self._machine
+        model_name, element_id, jumped_from_id, variables, global_variables = state
+        machine.current_context = machine._contexts_by_model[model_name]
+        machine.current_element = machine.current_context.model.get_element(element_id)
+        machine._jumped_from = None
+        if jumped_from_id:
+            machine._jumped_from = next(vertex for context in machine.contexts
+                                        for vertex in context.model.vertices.values() if vertex.id == jumped_from_id)
+        for context, context_variables in zip(machine.contexts, variables):
+            context.variables.clear()
+            context.variables.update(context_variables)
+        machine.global_variables.clear()
+        machine.global_variables.update(global_variables)
+
+    def _start(self):
+        """Step into the start element with the initial variables; return the steps taken."""
+        self._machine = Machine([(model, None) for model in self.models], seed=0)
+        context, element = self._machine._start()
+        return self._step(context, element)
+
+    def _step(self, context, element):
+        """Step into ``element`` (and through it, if it's an edge); return the steps taken."""
+        steps = [(context.model.name, element.id, element.name)]
+        self._machine.step_into(context, element)
+        if isinstance(element, Edge):
+            steps.append((context.model.name, element.target.id, element.target.name))
+            self._machine.step_into(context, element.target)
+        return steps
+
+    def _moves_from(self, state):
+        """Return the (steps, next state) pairs available from a state."""
+        if state not in self._moves:
+            if len(self._moves) >= self.max_states:
+                raise PlanningError(f"more than {self.max_states} model states, the variables don't converge")
+            self._restore(state)
+            moves = []
+            for element in self._machine.candidates():
+                self._restore(state)
+                steps = self._step(self._machine.context_of(element), element)
+                moves.append((steps, self._snapshot()))
+            self._moves[state] = moves
+        return self._moves[state]
+
+    @staticmethod
+    def _cost(steps):
+        # unnamed elements aren't executed, so they don't cost a round trip
+        return sum(1 for _, _, name in steps if name)
+
+    def _route(self, state, reaches):
+        """Cheapest sequence of moves from ``state`` whose last move ``reaches(steps, next state)``."""
+        counter = itertools.count()
+        queue = [(0, next(counter), state, [], False)]
+        settled = set()
+        while queue:
+            cost, _, current, route, is_goal = heapq.heappop(queue)
+            if is_goal:
+                return route, current
+            if current in settled:
+                continue
+            settled.add(current)
+            for steps, following in self._moves_from(current):
+                move_cost = cost + self._cost(steps)
+                heapq.heappush(queue, (move_cost, next(counter), following, route + steps, reaches(steps, following)))
+        return None, None
+
+    def _route_to_uncovered(self, state, uncovered):
+        """Cheapest sequence of moves from ``state`` whose last move covers something new."""
+        return self._route(state, lambda steps, _: any((model_name, element_id) in uncovered
+                                                       for model_name, element_id, _ in steps))
+
+    def _has_variables(self, state, variables, global_variables):
+        """Whether the variables of a state have the values given (by model name, None for any values)."""
+        _, _, _, contexts_variables, state_global_variables = state
+        expected = [variables.get(context.model.name) for context in self._machine.contexts] + [global_variables]
+        return all(values is None or all(key in values and values[key] == value for key, value in items)
+                   for values, items in zip(expected, contexts_variables + (state_global_variables,)))
+
+    def route_from_start(self, model_name, vertex_id, variables=None, global_variables=None):
+        """Cheapest steps from the start element, with the initial variables, to a vertex (included).
+
+        With ``variables`` (by model name) and ``global_variables``, e.g. those of a
+        checkpoint, the route must also end with the variables the models' actions set
+        at these values (e.g. logged in); those only the test code sets aren't compared.
+        Returns None if there's no such route.
+        """
+        def reaches(state):
+            return state[:2] == (model_name, vertex_id) and self._has_variables(state, variables or {}, global_variables)
+
+        path = self._start()
+        state = self._snapshot()
+        route = []
+        if not reaches(state):
+            route, _ = self._route(state, lambda _, following: reaches(following))
+            if route is None:
+                return None
+        return [{'modelName': step_model, 'id': step_id, 'name': name} for step_model, step_id, name in path + route]
+
+    def plan(self):
+        """Return the planned steps and the elements that couldn't be reached."""
+        uncovered = {(model.name, element_id) for model in self.models
+                     for element_id in itertools.chain(model.vertices, model.edges)}
+
+        path = self._start()
+        uncovered -= {(model_name, element_id) for model_name, element_id, _ in path}
+        state = self._snapshot()
+
+        while uncovered:
+            route, state = self._route_to_uncovered(state, uncovered)
+            if route is None:
+                break
+            path += route
+            uncovered -= {(model_name, element_id) for model_name, element_id, _ in route}
+
+        steps = [{'modelName': model_name, 'id': element_id, 'name': name} for model_name, element_id, name in path]
+        return steps, sorted(uncovered)
+
+
+def save_path(path_file, model_paths, steps, **metadata):
+    with open(path_file, 'w') as f:
+        json.dump(dict(metadata, models=model_paths, steps=steps), f, indent=2)
+
+
+def load_path(path_file):
+    """Return the models and the steps recorded in a path file."""
+    with open(path_file) as f:
+        data = json.load(f)
+    models = []
+    for model_path in data['models']:
+        models += load_models(model_path)[0]
+    return models, data['steps']
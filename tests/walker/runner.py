@@ -0,0 +1,231 @@
+"""Drive the machine and the executor together, reporting every step."""
+
+import copy
+import json
+import os
+import sys
+
+from tests.walker.expressions import ExpressionError
+from tests.walker.machine import MachineError, ReplayMachine
+from tests.walker.planner import Planner, PlanningError
+
+
+def _with_variables(checkpoint, machine):
+    """The checkpoint, with the variables of ``machine`` taking precedence over its own."""
+    checkpoint = copy.deepcopy(checkpoint)
+    checkpoint['globalVariables'].update(machine.global_variables)
+    for context in machine.contexts:
+        checkpoint['contexts'][context.model.name]['variables'].update(context.variables)
+    return checkpoint
+
+
+class Reporter:
+    """Print the steps and the final statistics to stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def _print(self, message):
+        print(message, file=self.stream)
+
+    def step_start(self, step):
+        self._print(f"{step['modelName'] or ''}.{step['name']} ...")
+
+    def step_end(self, step, result):
+        status = 'FAILED' if result.get('error') else 'PASSED'
+        self._print(f"{step['modelName'] or ''}.{step['name']} {status}")
+
+    def error(self, step, message, trace=None):
+        where = f"{step.get('modelName') or ''}.{step['name']}" if step else 'walker'
+        self._print(f"ERROR in {where}: {message}")
+        if trace:
+            self._print(trace)
+
+    def recovery(self, checkpoint, route):
+        self._print(f"Recovering at {checkpoint['modelName']}.{route[-1]['name'] or checkpoint['elementId']} "
+                    f"({sum(1 for step in route if step['name'])} steps to rebuild the state)")
+
+    def statistics(self, statistics, status):
+        self._print('Statistics:')
+        for model in statistics:
+            self._print(f"  {model['modelName']}: {model['steps']} steps, "
+                        f"edge coverage {model['edgeCoverage']}%, vertex coverage {model['vertexCoverage']}%")
+            if model['unvisitedEdges']:
+                self._print(f"    unvisited edges: {', '.join(model['unvisitedEdges'])}")
+            if model['unvisitedVertices']:
+                self._print(f"    unvisited vertices: {', '.join(model['unvisitedVertices'])}")
+        self._print(f"Status: {'PASSED' if status else 'FAILED'}")
+
+
+class Walker:
+    """Execute the path produced by a machine with the test code loaded by an executor.
+
+    With ``max_recoveries``, a failed step doesn't end the walk: the state of the
+    machine is checkpointed at every vertex passed, and after a failure the test
+    code's ``restartRun()`` fixture (e.g. a new browser) and ``setUpModel()`` fixtures
+    are run again, the shortest route from the start to the checkpoint's vertex, with
+    the variables the models' actions set at the checkpoint's values (e.g. logged in),
+    is executed to rebuild the state of the SUT, and the walk continues from the
+    checkpoint (variables, generator and coverage included). If there's no such route,
+    the walk ends there. The failure still fails the run. Checkpoints can also be
+    saved to ``checkpoint_file``, to resume a walk in another process, see run().
+    """
+
+    def __init__(self, machine, executor, reporter=None, max_recoveries=0, checkpoint_file=None):
+        self.machine = machine
+        self.executor = executor
+        self.reporter = reporter or Reporter()
+        self.status = True
+        self.max_recoveries = max_recoveries
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint = None
+        self.recoveries = 0
+        self.failures = 0
+
+    def _execute_fixture(self, name, model_name=None, step=None):
+        if not self.executor.has_step(model_name, name):
+            return True
+        fixture = {'name': name, 'modelName': model_name, 'type': 'fixture'}
+        result = self.executor.execute_step(model_name, name, step=step)
+        if result['error']:
+            self.reporter.error(fixture, result['error']['message'], result['error']['trace'])
+            return False
+        return True
+
+    def _execute_test(self, step):
+        if not self.executor.has_step(step['modelName'], step['name']):
+            self.reporter.error(step, "Step not found.")
+            return False
+
+        data = self.machine.get_data()
+        original = dict(data)
+        self.reporter.step_start(step)
+        result = self.executor.execute_step(step['modelName'], step['name'], data, step)
+        self.machine.set_data(result['data'], original)
+        self.reporter.step_end(step, result)
+        if result['error']:
+            self.reporter.error(step, result['error']['message'], result['error']['trace'])
+            return False
+        return True
+
+    def run_step(self, step):
+        """Execute a step along with its 'beforeStep' and 'afterStep' fixtures."""
+        if not step['name']:
+            # skip vertices and edges without names
+            return True
+
+        if not self._execute_fixture('beforeStep', step=step):
+            return False
+        if not self._execute_fixture('beforeStep', step['modelName'], step=step):
+            return False
+        step['status'] = self._execute_test(step)
+        if not self._execute_fixture('afterStep', step['modelName'], step=step):
+            return False
+        if not self._execute_fixture('afterStep', step=step):
+            return False
+        return step['status']
+
+    def _model_names(self):
+        return [context.model.name for context in self.machine.contexts]
+
+    def _save_checkpoint(self):
+        self.checkpoint = self.machine.checkpoint()
+        if self.checkpoint_file:
+            # written aside and renamed, so a crash never leaves a truncated checkpoint
+            with open(self.checkpoint_file + '.tmp', 'w') as f:
+                json.dump(self.checkpoint, f)
+            os.replace(self.checkpoint_file + '.tmp', self.checkpoint_file)
+
+    def _plan_rebuild(self, checkpoint):
+        """Route from the start to the checkpoint's vertex and model variables, or None (reported) if there's none."""
+        models = [context.model for context in self.machine.contexts]
+        variables = {model_name: state['variables'] for model_name, state in checkpoint['contexts'].items()}
+        try:
+            route = Planner(models).route_from_start(checkpoint['modelName'], checkpoint['elementId'],
+                                                     variables, checkpoint['globalVariables'])
+        except PlanningError as e:
+            self.reporter.error(None, f"can't plan the rebuild of the checkpoint: {e}")
+            return None
+        if route is None:
+            self.reporter.error(None, f"{checkpoint['modelName']}.{checkpoint['elementId']} can't be reached from the "
+                                      f"start with the checkpoint's variables, so its state can't be rebuilt")
+        return route
+
+    def _rebuild(self, checkpoint, route):
+        """Execute the route rebuilding the checkpoint's state, then restore the checkpoint."""
+        models = [context.model for context in self.machine.contexts]
+        self.reporter.recovery(checkpoint, route)
+        machine, self.machine = self.machine, ReplayMachine(models, route)
+        try:
+            rebuilt = all(self.run_step(self.machine.get_next_step()) for _ in route)
+        except (MachineError, ExpressionError) as e:
+            self.reporter.error(None, str(e))
+            rebuilt = False
+        finally:
+            replay, self.machine = self.machine, machine
+        if rebuilt:
+            # the variables of the models' actions already match the checkpoint, and those
+            # the test code set during the replay (e.g. the last contact sent) are the SUT's
+            self.machine.restore(_with_variables(checkpoint, replay))
+        return rebuilt
+
+    def _recover(self):
+        """Restart the run's resources and go back to the last checkpoint; return False once out of recoveries."""
+        if self.checkpoint is None or self.recoveries >= self.max_recoveries:
+            return False
+        route = self._plan_rebuild(self.checkpoint)
+        model_names = [name for name in self._model_names() if self.executor.has_model(name)]
+        while route is not None and self.recoveries < self.max_recoveries:
+            self.recoveries += 1
+            if (self._execute_fixture('restartRun')
+                    and all(self._execute_fixture('setUpModel', name) for name in model_names)
+                    and self._rebuild(self.checkpoint, route)):
+                return True
+        return False
+
+    def _resume(self, checkpoint):
+        route = self._plan_rebuild(checkpoint)
+        return route is not None and self._rebuild(checkpoint, route)
+
+    def walk(self):
+        """Run the steps until the stop conditions are fulfilled or a step fails (and can't be recovered from)."""
+        checkpoints = self.max_recoveries > 0 or self.checkpoint_file
+        while self.machine.has_next_step():
+            try:
+                step = self.machine.get_next_step()
+            except (MachineError, ExpressionError) as e:
+                self.reporter.error(None, str(e))
+                return False
+            if self.run_step(step):
+                if checkpoints and step['type'] == 'vertex':
+                    self._save_checkpoint()
+                continue
+            self.failures += 1
+            if not self._recover():
+                return False
+        return not self.failures
+
+    def run(self, resume=None):
+        """Run the whole walk, including the run and model fixtures; return True if it passed.
+
+        ``resume`` is a checkpoint (e.g. from the ``checkpoint_file`` of a crashed run) to
+        start from, after rebuilding its state, instead of the start element.
+        """
+        if not self._execute_fixture('setUpRun'):
+            self.status = False
+        else:
+            model_names = [name for name in self._model_names() if self.executor.has_model(name)]
+            if not all(self._execute_fixture('setUpModel', name) for name in model_names):
+                self.status = False
+            elif resume is not None and not self._resume(resume):
+                self.status = False
+            else:
+                self.checkpoint = resume
+                self.status = self.walk()
+
+            for name in model_names:
+                self.status &= self._execute_fixture('tearDownModel', name)
+            self.status &= self._execute_fixture('tearDownRun')
+
+        self.reporter.statistics(self.machine.statistics(), self.status)
+        return self.status